@@ -0,0 +1,76 @@
+"""Author dbs: benchmark of line downsampling, run with plain CPython:
+
+    python benchmarks/bench_downsample.py
+
+Downsamples noisy daily lines with lttb and minmax and prints the time,
+points kept and the error of the line drawn through the points kept,
+largest and mean distance from the original values, relative to their
+range.
+"""
+import math
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+import downsample
+
+LENGTHS = (3650, 36500, 365000)
+POINTS = 500
+
+
+def daily_line(length):
+    """Returns x and y of a noisy decline with steps, like a rate"""
+    generator = random.Random(3)
+    xs = list(range(length))
+    ys = []
+    for day in xs:
+        rate = 1000.0 * math.exp(-day / (length / 3.0))
+        if (day // (length // 12)) % 4 == 3:
+            rate *= 0.5
+        ys.append(rate * (1 + 0.05 * generator.random()))
+    return xs, ys
+
+
+def line_error(xs, ys, kept):
+    """Returns largest and mean distance of the line through kept from ys,
+       relative to the range of ys"""
+    kept_xs = [xs[index] for index in kept]
+    largest = 0.0
+    total = 0.0
+    for x, y in zip(xs, ys):
+        right = min(bisect_right(kept_xs, x), len(kept) - 1)
+        left = max(right - 1, 0)
+        x0, x1 = xs[kept[left]], xs[kept[right]]
+        y0, y1 = ys[kept[left]], ys[kept[right]]
+        drawn = y0 if x1 == x0 else y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+        distance = abs(drawn - y)
+        largest = max(largest, distance)
+        total += distance
+    span = max(ys) - min(ys)
+    return largest / span, total / len(ys) / span
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:>8} {:>7} {:>8} {:>6} {:>9} {:>9}'
+    print(line.format('length', 'method', 'seconds', 'kept', 'max err',
+                      'mean err'))
+    for length in LENGTHS:
+        xs, ys = daily_line(length)
+        for method in downsample.METHODS:
+            start = time.time()
+            kept = downsample.INDICES[method](xs, ys, POINTS)
+            seconds = time.time() - start
+            largest, mean = line_error(xs, ys, kept)
+            print(line.format(length, method, '{:.3f}'.format(seconds),
+                              len(kept), '{:.3f}'.format(largest),
+                              '{:.4f}'.format(mean)))
+
+
+if __name__ == '__main__':
+    main()
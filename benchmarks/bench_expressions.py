@@ -0,0 +1,60 @@
+"""Author dbs: benchmark of axis expressions for line charts with many
+curves, run with plain CPython:
+
+    python benchmarks/bench_expressions.py
+
+Compares the old recursive expression_maker, one pop and one string
+concatenation per curve, with the expression builder, first and cached.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+import expressions
+
+CURVE_COUNTS = (100, 1000, 4000)
+STATISTICS = ['Avg', 'P10', 'P90']
+
+
+def old_expression(ex_names, stat_type):
+    """Expression as expression_maker did it, recursing once per name"""
+    if len(ex_names) == 1:
+        return stat_type + '([' + ex_names[0] + '])'
+    current_part = ex_names.pop(-1)
+    return (old_expression(ex_names, stat_type) + ',' + stat_type + '([' +
+            current_part + '])')
+
+
+def old_create(ex_names, stat_types):
+    """Expression as create_expression meant to do it"""
+    return ','.join(old_expression(list(ex_names), stat_type)
+                    for stat_type in stat_types)
+
+
+def main():
+    """Runs benchmark and prints results"""
+    sys.setrecursionlimit(10000)
+    line = '{:>8} {:>9} {:>9} {:>9}'
+    print(line.format('curves', 'old s', 'build s', 'cached s'))
+    for curve_count in CURVE_COUNTS:
+        names = ['WOPR:OP_{}'.format(number) for number in range(curve_count)]
+        start = time.time()
+        old = old_create(names, STATISTICS)
+        old_time = time.time() - start
+        start = time.time()
+        new = expressions.axis_expression(names, STATISTICS)
+        build_time = time.time() - start
+        start = time.time()
+        expressions.axis_expression(names, STATISTICS)
+        cached_time = time.time() - start
+        assert old == new
+        print(line.format(curve_count, '{:.3f}'.format(old_time),
+                          '{:.3f}'.format(build_time),
+                          '{:.4f}'.format(cached_time)))
+
+
+if __name__ == '__main__':
+    main()
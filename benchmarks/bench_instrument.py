@@ -0,0 +1,47 @@
+"""Author dbs: benchmark of instrumentation overhead, run with plain CPython:
+
+    python benchmarks/bench_instrument.py
+
+Times a small function plain, wrapped with instrumentation off and wrapped
+with instrumentation on.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+import instrument
+
+CALLS = 1000000
+
+
+def work(value):
+    """Stands in for a helper function"""
+    return value + 1
+
+
+def timed(function):
+    """Returns microseconds per call of function"""
+    start = time.time()
+    for i in range(CALLS):
+        function(i)
+    return (time.time() - start) / CALLS * 1e6
+
+
+def main():
+    """Runs benchmark and prints results"""
+    wrapped = instrument.instrumented(work)
+    plain = timed(work)
+    instrument.disable()
+    off = timed(wrapped)
+    instrument.enable()
+    on = timed(wrapped)
+    instrument.disable()
+    print('microseconds per call, {} calls'.format(CALLS))
+    print('plain {:.3f}, off {:.3f}, on {:.3f}'.format(plain, off, on))
+
+
+if __name__ == '__main__':
+    main()
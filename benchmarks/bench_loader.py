@@ -0,0 +1,99 @@
+"""Author dbs: benchmark of startup and per call loading cost on the fake
+spotfire modules of fakespotfire.py, run with plain CPython:
+
+    python benchmarks/bench_loader.py
+
+Startup: time and helper modules loaded by importing one helper module,
+each in a fresh interpreter, against loading everything as before.
+Per call: the import statements and clr.AddReference that make_table ran
+on every call, against the cached types of loader.
+"""
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fakespotfire
+
+fakespotfire.install()
+
+from loader import add_reference, load_type, load_types
+
+HELPERS = ['aggregate', 'basic', 'batch', 'boxes', 'colours', 'columns',
+           'datatypes', 'docindex', 'instrument', 'loader', 'pages',
+           'panels', 'quantiles', 'relations', 'rowsets', 'sbdf',
+           'selection', 'summary', 'tables', 'visuals']
+STARTUPS = [('pages', 'import pages'), ('visuals', 'import visuals'),
+            ('tables', 'import tables'),
+            ('everything, as before',
+             'import visuals, tables, aggregate, quantiles, summary, sbdf')]
+CALLS = 100000
+
+STARTUP_SCRIPT = '''
+import sys, time
+sys.path.insert(0, {here!r})
+import fakespotfire
+fakespotfire.install()
+start = time.time()
+{statement}
+seconds = time.time() - start
+print(seconds, sum(1 for name in {helpers!r} if name in sys.modules))
+'''
+
+
+def startup(statement):
+    """Returns seconds and number of helper modules loaded by statement"""
+    script = STARTUP_SCRIPT.format(here=HERE, statement=statement,
+                                   helpers=HELPERS)
+    output = subprocess.check_output([sys.executable, '-c', script])
+    seconds, count = output.split()
+    return float(seconds), int(count)
+
+
+def old_loading():
+    """What make_table ran on every call"""
+    import clr
+    clr.AddReference('System.Data')
+    from System.Globalization import CultureInfo
+    from Spotfire.Dxp.Data.Import import TextFileDataSource, TextDataReaderSettings
+    from Spotfire.Dxp.Data import DataType
+    return CultureInfo, TextFileDataSource, TextDataReaderSettings, DataType
+
+
+def new_loading():
+    """What make_table runs now"""
+    add_reference('System.Data')
+    CultureInfo = load_type('System.Globalization', 'CultureInfo')
+    TextFileDataSource, TextDataReaderSettings = load_types(
+        'Spotfire.Dxp.Data.Import', ['TextFileDataSource',
+                                     'TextDataReaderSettings'])
+    DataType = load_type('Spotfire.Dxp.Data', 'DataType')
+    return CultureInfo, TextFileDataSource, TextDataReaderSettings, DataType
+
+
+def per_call(function):
+    """Returns microseconds per call of function"""
+    start = time.time()
+    for _ in range(CALLS):
+        function()
+    return (time.time() - start) / CALLS * 1e6
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:<24} {:>10} {:>8}'
+    print(line.format('startup', 'ms', 'modules'))
+    for name, statement in STARTUPS:
+        seconds, count = startup(statement)
+        print(line.format(name, '{:.1f}'.format(seconds * 1000), count))
+    print('per call, microseconds: old {:.2f}, loader {:.2f}'.format(
+        per_call(old_loading), per_call(new_loading)))
+    print('Note: clr.AddReference is a no-op here, in spotfire the old '
+          'loading also paid for it on every call')
+
+
+if __name__ == '__main__':
+    main()
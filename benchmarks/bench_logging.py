@@ -0,0 +1,72 @@
+"""Author dbs: benchmark of logging overhead with debug off, run with plain
+CPython:
+
+    python benchmarks/bench_logging.py
+
+Compares get_list_entry as it was, a logger set up and a handler added on
+every call, with the cached loggers of init_logging, and logging of large
+payloads with and without Short.
+"""
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from basic import Short, get_list_entry, init_logging
+
+CALLS = (1000, 10000, 30000)
+PAYLOAD = [['OP_{}'.format(i), i * 0.5, 'DATE'] for i in range(100000)]
+
+
+def old_get_list_entry(inlist, i):
+    """get_list_entry as it was, with a new handler on every call"""
+    logger = logging.getLogger('bench_old_get_list_entry')
+    logger.addHandler(logging.NullHandler())
+    out = ' '
+    try:
+        out = inlist[i]
+    except IndexError:
+        logger.debug('Nothing to extract at %i', i)
+    return out
+
+
+def timed(function, calls, *args):
+    """Returns seconds per call of function"""
+    start = time.time()
+    for i in range(calls):
+        function(*args + (i,))
+    return (time.time() - start) / calls
+
+
+def main():
+    """Runs benchmark and prints results"""
+    values = list(range(10))
+    line = '{:>7} {:>12} {:>12}'
+    print('get_list_entry, microseconds per call')
+    print(line.format('calls', 'old', 'cached'))
+    for calls in CALLS:
+        print(line.format(calls,
+                          '{:.2f}'.format(timed(old_get_list_entry, calls,
+                                                values) * 1e6),
+                          '{:.2f}'.format(timed(get_list_entry, calls,
+                                                values) * 1e6)))
+
+    logger = init_logging('bench_payload')
+    calls = 1000
+    start = time.time()
+    for _ in range(calls):
+        logger.debug('Rows %s', Short(PAYLOAD))
+    guarded = (time.time() - start) / calls
+    print('debug of {} rows with debug off: {:.2f} microseconds'.format(
+        len(PAYLOAD), guarded * 1e6))
+    start = time.time()
+    text = str(Short(PAYLOAD))
+    print('when emitted, {} characters in {:.2f} milliseconds'.format(
+        len(text), (time.time() - start) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
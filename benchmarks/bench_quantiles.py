@@ -0,0 +1,87 @@
+"""Author dbs: benchmark of ensemble percentiles, run with plain CPython:
+
+    python benchmarks/bench_quantiles.py
+
+Compares exact percentiles, all values kept and sorted per date, with the
+streaming sketches of make_percentile_table, reporting time, values held
+and the largest rank error of P10, P50 and P90.
+"""
+import os
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from quantiles import exact_percentile, group_sketches
+
+REALIZATIONS = (100, 1000, 10000)
+DATES = 120
+PERCENTILES = (10, 50, 90)
+
+
+def ensemble_rows(realizations):
+    """Yields rows DATE and FOPT, one per realization and date"""
+    generator = random.Random(1)
+    for real in range(realizations):
+        scale = generator.lognormvariate(0, 0.5)
+        for date in range(DATES):
+            yield [date, scale * date * 1000.0]
+
+
+def exact(realizations):
+    """Percentiles with all values kept"""
+    values = {}
+    for date, value in ensemble_rows(realizations):
+        values.setdefault(date, []).append(value)
+    result = {}
+    for date, date_values in values.items():
+        date_values.sort()
+        result[date] = [exact_percentile(date_values, percentile)
+                        for percentile in PERCENTILES]
+    return result, values
+
+
+def sketched(realizations):
+    """Percentiles with sketches, and number of values held"""
+    groups = group_sketches(ensemble_rows(realizations), 1)
+    held = 0
+    for sketches in groups.values():
+        sketch = sketches[0]
+        held += (len(sketch.exact) if sketch.compactors is None else
+                 sum(len(values) for values in sketch.compactors))
+    return dict((key[0], sketches[0].percentiles(PERCENTILES))
+                for key, sketches in groups.items()), held
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:>7} {:>9} {:>9} {:>10} {:>10} {:>10}'
+    print(line.format('reals', 'exact s', 'sketch s', 'exact n',
+                      'sketch n', 'rank err'))
+    for realizations in REALIZATIONS:
+        start = time.time()
+        exact_result, values = exact(realizations)
+        exact_time = time.time() - start
+        start = time.time()
+        sketch_result, held = sketched(realizations)
+        sketch_time = time.time() - start
+        error = 0.0
+        for date, date_values in values.items():
+            for percentile, estimate in zip(PERCENTILES, sketch_result[date]):
+                # Rank range of the estimate, ties share ranks
+                count = float(len(date_values))
+                low = bisect_left(date_values, estimate) / count
+                high = bisect_right(date_values, estimate) / count
+                target = percentile / 100.0
+                error = max(error, low - target, target - high)
+        print(line.format(realizations, '{:.2f}'.format(exact_time),
+                          '{:.2f}'.format(sketch_time),
+                          realizations * DATES, held,
+                          '{:.4f}'.format(error)))
+
+
+if __name__ == '__main__':
+    main()
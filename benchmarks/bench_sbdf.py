@@ -0,0 +1,93 @@
+"""Author dbs: benchmark of sbdf against tab separated text for numeric
+ensemble data, run with plain CPython:
+
+    python benchmarks/bench_sbdf.py
+
+Reports the time to encode, the size of the payload handed to spotfire,
+and checks that the sbdf reads back to the same values.
+"""
+import io
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import date, timedelta
+from itertools import chain
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from datatypes import ColumnTypes
+from sbdf import read_sbdf, write_sbdf
+from tables import table_text_chunks
+
+ROW_COUNTS = (10000, 50000, 100000)
+VECTORS = 20
+
+
+def make_columns(row_count):
+    """Makes ensemble like columns, REAL, DATE and a set of vectors
+    args:
+    row_count (int): number of rows
+    returns: column_names (list), columns (list)
+    """
+    rand = random.Random(1)
+    start = date(2020, 1, 1)
+    column_names = ['REAL', 'DATE']
+    columns = [[row // 365 for row in range(row_count)],
+               [start + timedelta(days=row % 365) for row in range(row_count)]]
+    for i in range(VECTORS):
+        column_names.append('FOPT{}'.format(i))
+        columns.append(array('d', (rand.random() * 1e6
+                                   for _ in range(row_count))))
+    return column_names, columns
+
+
+def text_payload(column_names, columns):
+    """Encodes as in make_table, returns number of characters"""
+    types = ColumnTypes(column_names)
+    rows = zip(*columns)
+    size = 0
+    for chunk in table_text_chunks(chain([column_names], types.encode(rows))):
+        size += len(chunk)
+    return size
+
+
+def sbdf_payload(column_names, columns):
+    """Encodes as in make_table_from_columns, returns the bytes"""
+    output = io.BytesIO()
+    write_sbdf(output, column_names, columns)
+    return output.getvalue()
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'
+    print(line.format('rows', 'text s', 'text MiB', 'sbdf s', 'sbdf MiB',
+                      'speedup'))
+    for row_count in ROW_COUNTS:
+        column_names, columns = make_columns(row_count)
+
+        start = time.perf_counter()
+        text_size = text_payload(column_names, columns)
+        text_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        payload = sbdf_payload(column_names, columns)
+        sbdf_time = time.perf_counter() - start
+
+        read_names, _, read_columns = read_sbdf(io.BytesIO(payload))
+        assert read_names == column_names
+        assert [list(column) for column in columns] == read_columns
+
+        print(line.format(row_count,
+                          '{:.3f}'.format(text_time),
+                          '{:.1f}'.format(text_size / 2.0 ** 20),
+                          '{:.3f}'.format(sbdf_time),
+                          '{:.1f}'.format(len(payload) / 2.0 ** 20),
+                          '{:.1f}x'.format(text_time / sbdf_time)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Author dbs: benchmark of row selection on ensemble sized tables, run
+with plain CPython:
+
+    python benchmarks/bench_selection.py
+
+Compares the old scan of del_based_on_column_value, text of each value
+looked up in a list, with compiled predicates evaluated in one pass.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from selection import (between, compile_predicate, is_in, matches,
+                       matching_indices)
+
+ROW_COUNTS = (100000, 1000000, 2000000)
+REALIZATIONS = 200
+WELLS = ['OP_{}'.format(i) for i in range(50)]
+REMOVE = [str(real) for real in range(0, REALIZATIONS, 4)]
+
+
+def ensemble_rows(row_count):
+    """Yields row index and values REAL, WELL and WOPR
+    args:
+    row_count (int): number of rows
+    returns: generator of tuples
+    """
+    for index in range(row_count):
+        yield index, [index % REALIZATIONS, WELLS[index % len(WELLS)],
+                      (index % 1000) * 0.5]
+
+
+def old_scan(row_count):
+    """Selection as del_based_on_column_value did it"""
+    selected = []
+    for index, values in ensemble_rows(row_count):
+        if str(values[0]) in REMOVE:
+            selected.append(index)
+    return len(selected)
+
+
+def compiled_scan(predicate, row_count):
+    """Selection with a compiled predicate"""
+    keys, test = compile_predicate(predicate)
+    positions = [['REAL', 'WELL', 'WOPR'].index(key[0]) for key in keys]
+    rows = ((index, [values[i] for i in positions])
+            for index, values in ensemble_rows(row_count))
+    return sum(1 for _ in matching_indices(test, rows))
+
+
+def main():
+    """Runs benchmark and prints results"""
+    single = is_in('REAL', range(0, REALIZATIONS, 4))
+    combined = (is_in('REAL', range(0, REALIZATIONS, 4)) &
+                (matches('WELL', r'OP_1') | between('WOPR', 100, 200)))
+    line = '{:>9} {:>12} {:>12} {:>12}'
+    print(line.format('rows', 'old s', 'in-set s', 'combined s'))
+    for row_count in ROW_COUNTS:
+        start = time.perf_counter()
+        old_count = old_scan(row_count)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_count = compiled_scan(single, row_count)
+        new_time = time.perf_counter() - start
+        assert old_count == new_count
+
+        start = time.perf_counter()
+        compiled_scan(combined, row_count)
+        combined_time = time.perf_counter() - start
+
+        print(line.format(row_count, '{:.2f}'.format(old_time),
+                          '{:.2f}'.format(new_time),
+                          '{:.2f}'.format(combined_time)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""Author dbs: benchmark suite of the helpers on the fake spotfire document
+of fakespotfire.py, at production sizes, run with plain CPython:
+
+    python benchmarks/bench_suite.py [--quick] [--report bench_report.json]
+
+Writes a json report with the time of each case and its sizes, --quick
+runs the cases at a tenth of the size or less. Times include the work of
+the stand in, like parsing the text handed to TextFileDataSource.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import fakespotfire
+
+fakespotfire.install()
+
+import boxes
+import pages
+import selection
+import summary
+import tables
+import visuals
+
+SIZES = {
+    'production': {'rows': 1000000, 'wells': 1700, 'tables': 20,
+                   'table_columns': 500, 'pages': 500, 'histograms': 200,
+                   'csv_rows': 10000, 'csv_wells': 400,
+                   'realizations': 200, 'realization_rows': 1000},
+    'quick': {'rows': 50000, 'wells': 170, 'tables': 5,
+              'table_columns': 50, 'pages': 50, 'histograms': 10,
+              'csv_rows': 1000, 'csv_wells': 40,
+              'realizations': 20, 'realization_rows': 200},
+}
+REALIZATIONS = 100
+WELL_KEYWORDS = ['WOPR', 'WWPR', 'WGPR', 'WOPT', 'WWPT', 'WGPT', 'WWCT',
+                 'WGOR', 'WBHP', 'WTHP', 'WOPRH', 'WWPRH']
+
+
+def ensemble_rows(row_count):
+    """Yields rows REAL, DATE, FOPR and FOPT"""
+    generator = random.Random(1)
+    start = date(2020, 1, 1)
+    dates = [start + timedelta(days=30 * i) for i in range(120)]
+    for index in range(row_count):
+        rate = generator.random() * 1000.0
+        yield [index % REALIZATIONS, dates[index % len(dates)], rate,
+               rate * index]
+
+
+def ensemble_columns(row_count):
+    """Returns columns REAL, DATE, FOPR and FOPT"""
+    columns = OrderedDict((name, []) for name in ('REAL', 'DATE', 'FOPR',
+                                                  'FOPT'))
+    appends = [values.append for values in columns.values()]
+    for row in ensemble_rows(row_count):
+        for append, value in zip(appends, row):
+            append(value)
+    return columns
+
+
+def timed(function, *args):
+    """Returns seconds taken by function"""
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def bench_make_table(sizes):
+    """make_table through text and through sbdf"""
+    results = []
+    rows = list(ensemble_rows(sizes['rows']))
+    names = ['REAL', 'DATE', 'FOPR', 'FOPT']
+    for use_sbdf in (False, True):
+        doc = fakespotfire.Document()
+        seconds = timed(tables.make_table, doc, 'Ensemble', names, rows,
+                        None, use_sbdf)
+        assert doc.Data.Tables['Ensemble'].RowCount == len(rows)
+        results.append({'name': 'make_table' + ('_sbdf' if use_sbdf else ''),
+                        'seconds': seconds, 'rows': len(rows),
+                        'columns': len(names)})
+    return results
+
+
+def bench_vector_names(sizes):
+    """get_vector_names and get_well_names on a wide summary table"""
+    doc = fakespotfire.Document()
+    columns = OrderedDict([('DATE', [None]), ('FOPT', [0.0])])
+    for well in range(sizes['wells']):
+        for keyword in WELL_KEYWORDS:
+            columns['{}:OP_{}'.format(keyword, well)] = [0.0]
+    doc.add_table('Summary', columns)
+    summary._CACHE.clear()
+    first = timed(tables.get_vector_names, doc, 'Summary')
+    cached = timed(tables.get_well_names, doc, 'Summary')
+    return [{'name': 'get_vector_names', 'seconds': first,
+             'columns': len(columns)},
+            {'name': 'get_well_names_cached', 'seconds': cached,
+             'columns': len(columns)}]
+
+
+def bench_add_relations(sizes):
+    """add_relations across tables sharing some of their columns"""
+    doc = fakespotfire.Document()
+    shared = ['REAL', 'DATE', 'WELL', 'ZONE']
+    for number in range(sizes['tables']):
+        columns = OrderedDict((name, [0]) for name in shared)
+        for column in range(sizes['table_columns'] - len(shared)):
+            columns['T{}_C{}'.format(number, column)] = [0.0]
+        doc.add_table('Table_{}'.format(number), columns)
+    seconds = timed(tables.add_relations, doc)
+    relation_count = doc.Data.Relations.Count
+    rerun = timed(tables.add_relations, doc)
+    return [{'name': 'add_relations', 'seconds': seconds,
+             'tables': sizes['tables'], 'columns': sizes['table_columns'],
+             'relations': relation_count},
+            {'name': 'add_relations_rerun', 'seconds': rerun,
+             'relations_added': doc.Data.Relations.Count - relation_count}]
+
+
+def bench_delete_rows(sizes):
+    """del_based_on_column_value removing a quarter of the realizations"""
+    doc = fakespotfire.Document()
+    doc.add_table('Ensemble', ensemble_columns(sizes['rows']),
+                  ['Integer', 'Date', 'Real', 'Real'])
+    remove = [str(real) for real in range(0, REALIZATIONS, 4)]
+    seconds = timed(tables.del_based_on_column_value, doc, 'REAL', remove,
+                    'Ensemble')
+    return [{'name': 'del_based_on_column_value', 'seconds': seconds,
+             'rows': sizes['rows'],
+             'rows_left': doc.Data.Tables['Ensemble'].RowCount}]
+
+
+def bench_histograms(sizes):
+    """make_histograms on one page of a document with many pages"""
+    doc = fakespotfire.Document()
+    for number in range(sizes['pages']):
+        doc.Pages.AddNew('Page {}'.format(number))
+    columns = OrderedDict(('V{}'.format(i), [0.0])
+                          for i in range(sizes['histograms']))
+    doc.add_table('Values', columns)
+    page_name = 'Page {}'.format(sizes['pages'] - 1)
+    seconds = timed(visuals.make_histograms, doc, 'Values', list(columns),
+                    page_name, 'V0', 10)
+    page = pages.get_page(doc, page_name)
+    return [{'name': 'make_histograms', 'seconds': seconds,
+             'pages': sizes['pages'], 'visuals': len(page.Visuals)}]
+
+
+def bench_linechart_downsampled(sizes):
+    """make_linechart of a line per realization, downsampled with lttb"""
+    doc = fakespotfire.Document()
+    doc.Pages.AddNew('Lines')
+    doc.add_table('Ensemble', ensemble_columns(sizes['rows']),
+                  ['Integer', 'Date', 'Real', 'Real'])
+    seconds = timed(visuals.make_linechart, doc, 'Ensemble', 'DATE',
+                    ['FOPR'], '', ['REAL'], 'Lines', 'FOPR', 'lttb', 20)
+    return [{'name': 'make_linechart_lttb', 'seconds': seconds,
+             'rows': sizes['rows'],
+             'rows_plotted': doc.Data.Tables['Ensemble (lttb)'].RowCount}]
+
+
+def bench_linechart_resampled(sizes):
+    """make_linechart of a line per realization, resampled to quarters"""
+    doc = fakespotfire.Document()
+    doc.Pages.AddNew('Lines')
+    doc.add_table('Ensemble', ensemble_columns(sizes['rows']),
+                  ['Integer', 'Date', 'Real', 'Real'])
+    seconds = timed(visuals.make_linechart, doc, 'Ensemble', 'DATE',
+                    ['FOPR', 'FOPT'], '', ['REAL'], 'Lines', 'Quarterly',
+                    None, None, 'quarter')
+    return [{'name': 'make_linechart_quarter', 'seconds': seconds,
+             'rows': sizes['rows'],
+             'rows_plotted': doc.Data.Tables['Ensemble (quarter)'].RowCount}]
+
+
+def write_summary_csv(file_path, row_count, well_count):
+    """Writes wide summary csv, DATE, REAL, FOPT and vectors of the wells"""
+    names = ['DATE', 'REAL', 'FOPT']
+    for well in range(well_count):
+        names.extend('{}:OP_{}'.format(keyword, well)
+                     for keyword in WELL_KEYWORDS)
+    value_text = ','.join(['12.5'] * (len(names) - 3))
+    with open(file_path, 'w') as csv_file:
+        csv_file.write(','.join(names) + '\n')
+        for row in range(row_count):
+            csv_file.write('2020-01-{:02d},{},{},{}\n'.format(
+                row % 28 + 1, row % REALIZATIONS, row, value_text))
+    return len(names)
+
+
+def bench_csv(sizes):
+    """make_table_from_csv of a wide summary file, whole and two vectors"""
+    handle, file_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        column_count = write_summary_csv(file_path, sizes['csv_rows'],
+                                         sizes['csv_wells'])
+        doc = fakespotfire.Document()
+        whole = timed(tables.make_table_from_csv, doc, 'Summary', file_path)
+        selected = timed(tables.make_table_from_csv, doc, 'Summary',
+                         file_path, None, None, ['WOPR', 'WBHP'],
+                         {'DATE': 'Date', 'REAL': 'Integer'})
+        kept = doc.Data.Tables['Summary'].Columns.Count
+    finally:
+        os.remove(file_path)
+    return [{'name': 'make_table_from_csv', 'seconds': whole,
+             'rows': sizes['csv_rows'], 'columns': column_count},
+            {'name': 'make_table_from_csv_vectors', 'seconds': selected,
+             'rows': sizes['csv_rows'], 'columns': kept}]
+
+
+def bench_ensemble(sizes):
+    """make_ensemble_table of one small summary file per realization, read
+       by one thread and by a pool, the pool gains little here as CPython
+       parses with its global lock held, IronPython has none"""
+    directory = tempfile.mkdtemp()
+    try:
+        for real in range(sizes['realizations']):
+            real_directory = os.path.join(directory,
+                                          'realization-{}'.format(real),
+                                          'iter-0')
+            os.makedirs(real_directory)
+            write_summary_csv(os.path.join(real_directory, 'summary.csv'),
+                              sizes['realization_rows'], 2)
+        file_pattern = os.path.join(directory, 'realization-*', 'iter-0',
+                                    'summary.csv')
+        results = []
+        for workers in (1, None):
+            doc = fakespotfire.Document()
+            seconds = timed(tables.make_ensemble_table, doc, 'Ensemble',
+                            file_pattern, None, None, None, None, ',',
+                            workers)
+            results.append({'name': 'make_ensemble_table_{}'.format(
+                'serial' if workers == 1 else 'pool'), 'seconds': seconds,
+                'files': sizes['realizations'],
+                'rows': doc.Data.Tables['Ensemble'].RowCount})
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def bench_append(sizes):
+    """make_table of one more realization, replacing the table and
+       appending to it, the first append reads the keys of the table"""
+    names = ['REAL', 'DATE', 'FOPR', 'FOPT']
+    rows = list(ensemble_rows(sizes['rows']))
+    new_rows = [[REALIZATIONS] + row[1:] for row in rows[:REALIZATIONS * 10]]
+    results = []
+    for mode in ('replace', 'append'):
+        doc = fakespotfire.Document()
+        tables.make_table(doc, 'Ensemble', names, rows)
+        seconds = timed(tables.make_table, doc, 'Ensemble', names,
+                        rows + new_rows if mode == 'replace' else new_rows,
+                        None, False, mode)
+        results.append({'name': 'make_table_' + mode, 'seconds': seconds,
+                        'rows': doc.Data.Tables['Ensemble'].RowCount})
+    new_rows = [[REALIZATIONS + 1] + row[1:] for row in new_rows]
+    seconds = timed(tables.make_table, doc, 'Ensemble', names, new_rows,
+                    None, False, 'append')
+    results.append({'name': 'make_table_append_indexed', 'seconds': seconds,
+                    'rows': doc.Data.Tables['Ensemble'].RowCount})
+    return results
+
+
+def bench_copy_table(sizes):
+    """copy_table whole, and of two columns of a tenth of the realizations
+    """
+    doc = fakespotfire.Document()
+    columns = ensemble_columns(sizes['rows'])
+    for number in range(20):
+        columns['V{}'.format(number)] = columns['FOPR']
+    doc.add_table('Ensemble', columns,
+                  ['Integer', 'Date'] + ['Real'] * (len(columns) - 2))
+    whole = timed(tables.copy_table, doc, 'Ensemble', 'Copy')
+    kept = selection.between('REAL', 0, REALIZATIONS // 10 - 1)
+    selected = timed(tables.copy_table, doc, 'Ensemble', 'Selected',
+                     ['REAL', 'DATE', 'FOPT'], None, kept)
+    copy = doc.Data.Tables['Selected']
+    return [{'name': 'copy_table', 'seconds': whole, 'rows': sizes['rows'],
+             'columns': len(columns)},
+            {'name': 'copy_table_selected', 'seconds': selected,
+             'rows': copy.RowCount, 'columns': copy.Columns.Count}]
+
+
+CASES = (bench_make_table, bench_vector_names, bench_add_relations,
+         bench_delete_rows, bench_histograms, bench_linechart_downsampled,
+         bench_linechart_resampled, bench_csv, bench_ensemble, bench_append,
+         bench_copy_table)
+
+
+def peak_memory_mb():
+    """Returns peak resident memory in MB, None where not available"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on mac, kilobytes on linux
+    return peak / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0)
+
+
+def main():
+    """Runs the cases and writes the report"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--quick', action='store_true',
+                        help='run at small sizes')
+    parser.add_argument('--report', default='bench_report.json',
+                        help='path of json report')
+    args = parser.parse_args()
+    scale = 'quick' if args.quick else 'production'
+    sizes = SIZES[scale]
+
+    boxes.set_policy(boxes.AUTO_YES)
+    results = []
+    for case in CASES:
+        for result in case(sizes):
+            print('{:<28} {:>8.2f} s'.format(result['name'],
+                                             result['seconds']))
+            results.append(result)
+    boxes.collected_messages()
+
+    report = {'scale': scale, 'sizes': sizes,
+              'python': platform.python_version(),
+              'implementation': platform.python_implementation(),
+              'platform': platform.platform(),
+              'peak_memory_mb': peak_memory_mb(), 'results': results}
+    with open(args.report, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+    print('Report written to {}'.format(args.report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Author dbs: benchmark of summary column parsing, run with plain CPython:
+
+    python benchmarks/bench_summary.py
+
+Compares the old get_vector_names and get_well_names, regexes built per
+column and duplicates found in lists, with the one pass schema parser.
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+import summary
+
+WELL_COUNTS = (100, 1000, 4000)
+KEYWORDS = ['WOPR', 'WWPR', 'WGPR', 'WOPT', 'WWCT', 'WGOR', 'WBHP',
+            'WTHP', 'WOPRH', 'WWPRH', 'WGPRH', 'WBHPH']
+
+
+def column_names(well_count):
+    """Returns summary column names with well vectors for well_count wells"""
+    names = ['DATE', 'FOPT', 'FOPR', 'FWCT']
+    for well in range(well_count):
+        names.extend('{}:OP_{}'.format(keyword, well) for keyword in KEYWORDS)
+    return names
+
+
+def old_parse(col_names):
+    """Vectors and wells as get_vector_names and get_well_names did it"""
+    vector_names = []
+    for col_name in col_names:
+        if re.match(r'(date|time)', col_name.lower()):
+            continue
+        extract_name = col_name.split(':')[0][1:]
+        if extract_name.endswith('H'):
+            extract_name = extract_name[:-1]
+        if extract_name not in vector_names:
+            vector_names.append(extract_name)
+    well_names = []
+    for col_name in col_names:
+        match = re.match(r'W[^:]+.(.*)', col_name)
+        if match and match.group(1) not in well_names:
+            well_names.append(match.group(1))
+    return vector_names, well_names
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:>8} {:>9} {:>9} {:>9}'
+    print(line.format('columns', 'old s', 'parse s', 'cached s'))
+    for well_count in WELL_COUNTS:
+        names = column_names(well_count)
+        start = time.time()
+        old_parse(names)
+        old_time = time.time() - start
+        start = time.time()
+        summary.SummarySchema(names)
+        parse_time = time.time() - start
+        summary.summary_schema(names)
+        start = time.time()
+        summary.summary_schema(names)
+        cached_time = time.time() - start
+        print(line.format(len(names), '{:.3f}'.format(old_time),
+                          '{:.3f}'.format(parse_time),
+                          '{:.3f}'.format(cached_time)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Author dbs: benchmark of the tab separated text encoding behind
+tables.table_text_writer, run with plain CPython:
+
+    python benchmarks/bench_table_text.py
+
+Compares the old string concatenation with the chunked generator, reporting
+time and peak memory as the number of rows grows. Note that CPython
+resizes strings in place on +=, IronPython copies, so on IronPython the
+concatenation is quadratic, here it only shows in the memory.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from basic import create_line
+from tables import table_text_chunks
+
+ROW_COUNTS = (10000, 50000, 100000, 200000)
+COLUMNS = 10
+
+
+def make_rows(row_count):
+    """Generates header and rows of a table
+    args:
+    row_count (int): number of rows after the header
+    returns: generator of lists
+    """
+    yield ['COL{}'.format(i) for i in range(COLUMNS)]
+    for row in range(row_count):
+        yield [str(row * COLUMNS + i) for i in range(COLUMNS)]
+
+
+def concatenated_text(list_input):
+    """The encoding as it was: whole payload built with +=
+    args:
+    list_input (list of lists): header followed by rows
+    returns: text (str)
+    """
+    header = list_input.pop(0)
+    text = ''
+    for text_list in list_input:
+        text += create_line(text_list)
+    return create_line(header) + text
+
+
+def streamed_text(list_input):
+    """The chunked encoding, each chunk handed on and dropped like
+    when written to a StreamWriter
+    args:
+    list_input (iterable of lists): header followed by rows
+    returns: size (int): number of characters produced
+    """
+    size = 0
+    for chunk in table_text_chunks(list_input):
+        size += len(chunk)
+    return size
+
+
+def measure(function, row_count):
+    """Measures time and peak memory of function, in separate runs
+    so that tracing does not distort the time
+    args:
+    function (callable): function to call with the table rows
+    row_count (int): number of rows in table
+    returns: seconds (float), peak (int): peak memory in bytes
+    """
+    list_input = list(make_rows(row_count))
+    start = time.perf_counter()
+    function(list_input)
+    seconds = time.perf_counter() - start
+
+    list_input = list(make_rows(row_count))
+    tracemalloc.start()
+    function(list_input)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    """Runs benchmark and prints results"""
+    line = '{:>8} {:>14} {:>14} {:>14} {:>14}'
+    print(line.format('rows', 'concat s', 'concat MiB', 'stream s',
+                      'stream MiB'))
+    for row_count in ROW_COUNTS:
+        concat_time, concat_peak = measure(concatenated_text, row_count)
+        stream_time, stream_peak = measure(streamed_text, row_count)
+        print(line.format(row_count,
+                          '{:.3f}'.format(concat_time),
+                          '{:.1f}'.format(concat_peak / 2.0 ** 20),
+                          '{:.3f}'.format(stream_time),
+                          '{:.1f}'.format(stream_peak / 2.0 ** 20)))
+
+
+if __name__ == '__main__':
+    main()
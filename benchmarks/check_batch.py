@@ -0,0 +1,91 @@
+"""Author dbs: checks of batching on the fake spotfire document of
+fakespotfire.py, run with plain CPython:
+
+    python benchmarks/check_batch.py
+
+Raises AssertionError at the first check that fails.
+"""
+from collections import OrderedDict
+
+import fakespotfire
+
+fakespotfire.install()
+
+from batch import active_batch, batch
+import tables
+
+
+def make_doc():
+    """Returns document with table T, column A of 0 to 9"""
+    doc = fakespotfire.Document()
+    doc.add_table('T', OrderedDict([('A', list(range(10)))]), ['Integer'])
+    return doc
+
+
+def values(doc, column_name='A'):
+    """Returns values of a column of table T"""
+    return doc.Data.Tables['T'].Columns[column_name].values
+
+
+def check_row_deletes():
+    """Rows deleted in one batch are selected when the batch applies"""
+    for second, expected in ((['4', '5'], [2, 3, 6, 7, 8, 9]),
+                             (['8', '9'], [2, 3, 4, 5, 6, 7])):
+        doc = make_doc()
+        with batch(doc, confirm=False):
+            tables.del_based_on_column_value(doc, 'A', ['0', '1'], 'T')
+            tables.del_based_on_column_value(doc, 'A', second, 'T')
+            assert len(values(doc)) == 10, 'rows deleted before the end'
+        assert values(doc) == expected, (second, values(doc))
+
+
+def check_order():
+    """Deletes queued after the table is remade apply to the new table"""
+    doc = make_doc()
+    with batch(doc, confirm=False):
+        tables.make_table(doc, 'T', ['A', 'B', 'C'],
+                          [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        tables.delete_columns(doc, 'T', ['B'])
+        tables.del_based_on_column_value(doc, 'A', ['1'], 'T')
+    columns = doc.Data.Tables['T'].Columns
+    assert [column.Name for column in columns] == ['A', 'C'], list(columns)
+    assert values(doc) == [4, 7] and values(doc, 'C') == [6, 9], values(doc)
+    assert not fakespotfire.MessageBox.shown, fakespotfire.MessageBox.shown
+
+
+def check_new_table():
+    """Columns of a table queued in the same batch are deleted quietly"""
+    doc = make_doc()
+    fakespotfire.MessageBox.shown[:] = []
+    with batch(doc, confirm=False):
+        tables.make_table(doc, 'New', ['A', 'B'], [[1, 2]])
+        tables.delete_columns(doc, 'New', ['B'])
+    columns = doc.Data.Tables['New'].Columns
+    assert [column.Name for column in columns] == ['A'], list(columns)
+    assert not fakespotfire.MessageBox.shown, fakespotfire.MessageBox.shown
+
+
+def check_interrupted():
+    """A batch left by any exception no longer queues changes"""
+    doc = make_doc()
+    for error in (ValueError, KeyboardInterrupt):
+        try:
+            with batch(doc, confirm=False):
+                tables.delete_all_rows(doc, 'T')
+                raise error()
+        except error:
+            pass
+        assert active_batch(doc) is None, error
+        assert len(values(doc)) == 10, values(doc)
+
+
+def main():
+    """Runs checks"""
+    for check in (check_row_deletes, check_order, check_new_table,
+                  check_interrupted):
+        check()
+        print('{} ok'.format(check.__name__))
+
+
+if __name__ == '__main__':
+    main()
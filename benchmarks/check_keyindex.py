@@ -0,0 +1,93 @@
+"""Author dbs: checks of appending rows by key on the fake spotfire document
+of fakespotfire.py, with cursors giving .NET DateTime values like spotfire,
+run with plain CPython:
+
+    python benchmarks/check_keyindex.py
+
+Raises AssertionError at the first check that fails.
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+
+import fakespotfire
+
+fakespotfire.install()
+fakespotfire.NET_DATETIMES = True
+
+from batch import batch
+import tables
+
+NAMES = ['REAL', 'DATE', 'FOPT']
+
+
+def make_doc():
+    """Returns document with table T of two rows, Real REAL and Date DATE"""
+    doc = fakespotfire.Document()
+    doc.add_table('T', OrderedDict([('REAL', [0.0, 1.0]),
+                                    ('DATE', [date(2020, 1, 1)] * 2),
+                                    ('FOPT', [1.0, 2.0])]),
+                  ['Real', 'Date', 'Real'])
+    return doc
+
+
+def table_rows(doc):
+    """Returns rows of table T"""
+    table = doc.Data.Tables['T']
+    return list(zip(*[table.Columns[name].values for name in NAMES]))
+
+
+def check_types():
+    """Keys given as date, datetime, text or integer match those read"""
+    for use_sbdf in (False, True):
+        doc = make_doc()
+        rows = [[0, date(2020, 1, 1), 9.0],
+                [1, '2020-01-01', 9.0],
+                ['0', datetime(2020, 1, 1), 9.0],
+                [1.0, '2020-01-01 00:00:00', 9.0],
+                [2, date(2020, 1, 1), 3.0]]
+        tables.make_table(doc, 'T', NAMES, rows, use_sbdf=use_sbdf,
+                          mode='append')
+        assert len(table_rows(doc)) == 3, table_rows(doc)
+        tables.make_table(doc, 'T', NAMES, rows, use_sbdf=use_sbdf,
+                          mode='append')
+        assert len(table_rows(doc)) == 3, table_rows(doc)
+        tables.make_table(doc, 'T', NAMES, [[2, '2020-01-01', 4.0]],
+                          use_sbdf=use_sbdf, mode='upsert')
+        assert len(table_rows(doc)) == 3, table_rows(doc)
+        assert table_rows(doc)[-1][2] == 4.0, table_rows(doc)
+
+
+def check_batch():
+    """Appends queued in one batch see the keys of each other"""
+    doc = make_doc()
+    with batch(doc, confirm=False):
+        tables.make_table(doc, 'T', NAMES, [[5, date(2021, 1, 1), 1.0]],
+                          mode='append')
+        tables.make_table(doc, 'T', NAMES, [[5, '2021-01-01', 1.0],
+                                            [6, '2021-01-01', 1.0]],
+                          mode='append')
+        assert len(table_rows(doc)) == 2, 'rows added before the batch end'
+    assert len(table_rows(doc)) == 4, table_rows(doc)
+    tables.make_table(doc, 'T', NAMES, [[6, date(2021, 1, 1), 1.0]],
+                      mode='append')
+    assert len(table_rows(doc)) == 4, table_rows(doc)
+
+
+def check_short_rows():
+    """Rows not as long as the header are left out of sbdf appends"""
+    doc = make_doc()
+    tables.make_table(doc, 'T', NAMES, [[7, date(2022, 1, 1)],
+                                        [8, date(2022, 1, 1), 1.0]],
+                      use_sbdf=True, mode='append')
+    assert len(table_rows(doc)) == 3, table_rows(doc)
+
+
+def main():
+    """Runs checks"""
+    for check in (check_types, check_batch, check_short_rows):
+        check()
+        print('{} ok'.format(check.__name__))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Author dbs: round trip checks of the sbdf writer, run with plain CPython:
+
+    python benchmarks/check_sbdf.py
+
+Writes a column of every supported type, with missing values, empty
+strings, the DateTime epoch and unicode, reads it back and compares value
+by value. Raises AssertionError at the first value that differs.
+"""
+import io
+import os
+import sys
+from array import array
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'helpers'))
+
+from sbdf import VALUE_TYPES, read_sbdf, write_sbdf
+
+EPOCH = datetime(1, 1, 1)
+NAN = float('nan')
+
+
+class NetTimeSpan(object):
+
+    """System.TimeSpan as cursors give it, only what the writer reads"""
+
+    def __init__(self, milliseconds):
+        self.Ticks = milliseconds * 10000
+        self.TotalMilliseconds = float(milliseconds)
+
+
+class NetDateTime(object):
+
+    """System.DateTime as cursors give it, only what the writer reads"""
+
+    def __init__(self, value):
+        self.Ticks = 0
+        for name in ('Year', 'Month', 'Day', 'Hour', 'Minute', 'Second'):
+            setattr(self, name, getattr(value, name.lower()))
+        self.Millisecond = value.microsecond // 1000
+
+# Values written and the values read back, by type, None is missing
+CASES = [
+    ('Boolean', [True, False, None], [True, False, None]),
+    ('Integer', [0, -1, 2 ** 31 - 1, -2 ** 31, None],
+     [0, -1, 2 ** 31 - 1, -2 ** 31, None]),
+    ('LongInteger', [0, 2 ** 63 - 1, -2 ** 63, None],
+     [0, 2 ** 63 - 1, -2 ** 63, None]),
+    ('SingleReal', [0.5, -2.25, NAN, None], [0.5, -2.25, None, None]),
+    ('Real', [0.0, 1e300, -1.5e-300, NAN, None],
+     [0.0, 1e300, -1.5e-300, None, None]),
+    ('DateTime', [EPOCH, datetime(2020, 2, 29, 23, 59, 58, 123000),
+                  date(2020, 1, 1), '2020-01-01 12:30', None],
+     [EPOCH, datetime(2020, 2, 29, 23, 59, 58, 123000),
+      datetime(2020, 1, 1), datetime(2020, 1, 1, 12, 30), None]),
+    ('Date', [EPOCH.date(), date(9999, 12, 31), datetime(2020, 1, 1, 12),
+              '2020-01-31', None],
+     [EPOCH.date(), date(9999, 12, 31), date(2020, 1, 1),
+      date(2020, 1, 31), None]),
+    # Cursors of Time columns give .NET DateTime, or TimeSpan
+    ('Time', [time(0, 0), time(23, 59, 59, 999000),
+              NetDateTime(datetime(1, 1, 1, 12, 30, 1, 500000)),
+              datetime(2020, 1, 1, 6), NetTimeSpan(1500), None],
+     [time(0, 0), time(23, 59, 59, 999000), time(12, 30, 1, 500000),
+      time(6), time(0, 0, 1, 500000), None]),
+    ('TimeSpan', [timedelta(0), timedelta(days=-1, milliseconds=5),
+                  NetTimeSpan(-90061001), None],
+     [timedelta(0), timedelta(days=-1, milliseconds=5),
+      -timedelta(days=1, hours=1, minutes=1, seconds=1, milliseconds=1),
+      None]),
+    # Blank text is missing, as in the text import of spotfire
+    ('String', [u'plain', u'', u'  ', u'\xc6\xf8\xe5 \u65e5\u672c \u2713',
+                u'tab\tand\nnewline', None],
+     [u'plain', None, None, u'\xc6\xf8\xe5 \u65e5\u672c \u2713',
+      u'tab\tand\nnewline', None]),
+    ('Binary', [b'', b'\x00\xff', None], [b'', b'\x00\xff', None]),
+]
+
+
+def round_trip(column_names, columns, column_types=None, slice_rows=2):
+    """Returns what reading back the sbdf written of columns gives"""
+    stream = io.BytesIO()
+    write_sbdf(stream, column_names, columns, column_types, slice_rows)
+    stream.seek(0)
+    return read_sbdf(stream)
+
+
+def check_types():
+    """Every type reads back to its values, one column at a time, over
+       several table slices"""
+    assert set(case[0] for case in CASES) == set(VALUE_TYPES)
+    for type_name, written, expected in CASES:
+        names, types, columns = round_trip(['X'], [written], [type_name])
+        assert (names, types) == (['X'], [type_name]), (names, types)
+        assert columns[0] == expected, (type_name, columns[0], expected)
+
+
+def check_table():
+    """All types in one table, padded to one length, read back in order"""
+    length = max(len(case[1]) for case in CASES)
+    names = [case[0] for case in CASES]
+    columns = [case[1] + [None] * (length - len(case[1])) for case in CASES]
+    expected = [case[2] + [None] * (length - len(case[2])) for case in CASES]
+    read_names, types, read_columns = round_trip(names, columns, names)
+    assert read_names == names and types == names, (read_names, types)
+    for name, column, values in zip(names, read_columns, expected):
+        assert column == values, (name, column, values)
+
+
+def check_inferred():
+    """Types inferred from lists and arrays"""
+    names, types, columns = round_trip(
+        ['I', 'R', 'D', 'S', 'A'],
+        [[1, None, 3], [1.5, NAN, 2], [date(2020, 1, 1), None, EPOCH.date()],
+         [u'a', u'', u'\xe9'], array('d', [0.25, NAN, -1])])
+    assert types == ['Integer', 'Real', 'Date', 'String', 'Real'], types
+    assert columns == [[1, None, 3], [1.5, None, 2.0],
+                       [date(2020, 1, 1), None, EPOCH.date()],
+                       [u'a', None, u'\xe9'], [0.25, None, -1.0]], columns
+
+
+def check_empty():
+    """A table without rows keeps its columns and types"""
+    assert round_trip(['X', 'Y'], [[], []], ['Real', 'String']) == (
+        ['X', 'Y'], ['Real', 'String'], [[], []])
+
+
+def main():
+    """Runs checks"""
+    for check in (check_types, check_table, check_inferred, check_empty):
+        check()
+        print('{} ok'.format(check.__name__))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,893 @@
+"""Author dbs: pure python stand in for the parts of the spotfire and .NET
+api the helpers use, so that they run, and can be timed, with plain
+CPython. Call install() before importing the helpers:
+
+    import fakespotfire
+    fakespotfire.install()
+    doc = fakespotfire.Document()
+
+Only what the helpers touch is there, and it behaves like spotfire as far
+as the helpers can tell, tables are held as python lists by column.
+"""
+import io
+import os
+import sys
+import types
+from collections import OrderedDict
+from datetime import date, datetime
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_HELPERS = os.path.join(_HERE, '..', 'helpers')
+# Cursors give Date and DateTime values as .NET DateTime, like spotfire,
+# when set, else as python date and datetime
+NET_DATETIMES = False
+
+
+# .NET ----------------------------------------------------------------------
+
+class SeekOrigin(object):
+    Begin = 0
+    Current = 1
+    End = 2
+
+
+class MemoryStream(object):
+
+    """System.IO.MemoryStream over io.BytesIO"""
+
+    def __init__(self, data=b''):
+        self.buffer = io.BytesIO(data)
+
+    def Write(self, data, offset, count):
+        self.buffer.write(bytes(bytearray(data[offset:offset + count])))
+
+    def Seek(self, offset, origin):
+        return self.buffer.seek(offset, origin)
+
+    def Read(self, count):
+        return self.buffer.read(count)
+
+    def ToArray(self):
+        return self.buffer.getvalue()
+
+    @property
+    def Length(self):
+        return len(self.buffer.getvalue())
+
+
+class StreamWriter(object):
+
+    """System.IO.StreamWriter writing utf-8"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def Write(self, text):
+        self.stream.buffer.write(text.encode('utf-8'))
+
+    def Flush(self):
+        pass
+
+
+class _NetArray(bytearray):
+
+    @property
+    def Length(self):
+        return len(self)
+
+
+class _ArrayFactory(object):
+
+    """System.Array, Array[Byte](data) makes a byte array"""
+
+    def __getitem__(self, item_type):
+        return _NetArray
+
+
+class CultureInfo(object):
+    InvariantCulture = 'invariant'
+
+
+class _Enum(object):
+
+    def __init__(self, name):
+        self.Name = name
+
+    def __repr__(self):
+        return self.Name
+
+
+class MessageBoxButtons(object):
+    OK = _Enum('OK')
+    YesNo = _Enum('YesNo')
+
+
+class DialogResult(object):
+    Yes = _Enum('Yes')
+    No = _Enum('No')
+
+
+class MessageBox(object):
+
+    """Dialogs answer yes at once, shown messages are kept in shown"""
+
+    shown = []
+
+    @classmethod
+    def Show(cls, message, heading, buttons=None):
+        cls.shown.append((heading, message))
+        return DialogResult.Yes
+
+
+# Data ----------------------------------------------------------------------
+
+class DataType(object):
+    pass
+
+
+for _name in ('Integer', 'LongInteger', 'Real', 'SingleReal', 'String',
+              'Date', 'DateTime', 'Time', 'Boolean'):
+    setattr(DataType, _name, _Enum(_name))
+
+
+def _parse_date(text):
+    return date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+
+
+def _parse_datetime(text):
+    return datetime(int(text[:4]), int(text[5:7]), int(text[8:10]),
+                    int(text[11:13]), int(text[14:16]), int(text[17:19]))
+
+
+PARSERS = {'Integer': int, 'LongInteger': int, 'Real': float,
+           'SingleReal': float, 'String': lambda text: text,
+           'Date': _parse_date, 'DateTime': _parse_datetime}
+
+
+def format_value(value):
+    """Returns value as spotfire shows it, empty text for missing values"""
+    if value is None:
+        return u''
+    if isinstance(value, datetime):
+        return u'{:%Y-%m-%d %H:%M:%S}'.format(value)
+    if isinstance(value, date):
+        return u'{:%Y-%m-%d}'.format(value)
+    return u'{}'.format(value)
+
+
+class NetDateTime(object):
+
+    """System.DateTime as cursors give it, only what the helpers read"""
+
+    __slots__ = ('Ticks', 'Year', 'Month', 'Day', 'Hour', 'Minute', 'Second',
+                 'Millisecond')
+
+    def __init__(self, value):
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        self.Ticks = ((value - datetime(1, 1, 1)).total_seconds() *
+                      10 ** 7)
+        self.Year = value.year
+        self.Month = value.month
+        self.Day = value.day
+        self.Hour = value.hour
+        self.Minute = value.minute
+        self.Second = value.second
+        self.Millisecond = value.microsecond // 1000
+
+    def __eq__(self, other):
+        return isinstance(other, NetDateTime) and self.Ticks == other.Ticks
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.Ticks)
+
+
+def _cursor_value(value):
+    """Returns value as cursors give it"""
+    if NET_DATETIMES and isinstance(value, date):
+        return NetDateTime(value)
+    return value
+
+
+class _Properties(object):
+
+    def __init__(self, type_name):
+        self.DataType = getattr(DataType, type_name)
+
+
+class DataColumn(object):
+
+    """Column of a table, values in a list, None for missing"""
+
+    def __init__(self, table, name, type_name, values):
+        self._table = table
+        self._name = name
+        self.Properties = _Properties(type_name)
+        self.values = values
+
+    @property
+    def Name(self):
+        return self._name
+
+    @Name.setter
+    def Name(self, name):
+        self._table.Columns._rename(self._name, name)
+        self._name = name
+
+
+class DataColumnCollection(object):
+
+    def __init__(self):
+        self._columns = OrderedDict()
+
+    def _add(self, column):
+        self._columns[column.Name] = column
+
+    def _rename(self, old_name, new_name):
+        items = [(new_name if name == old_name else name, column)
+                 for name, column in self._columns.items()]
+        self._columns = OrderedDict(items)
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __iter__(self):
+        return iter(list(self._columns.values()))
+
+    def __len__(self):
+        return len(self._columns)
+
+    @property
+    def Count(self):
+        return len(self._columns)
+
+    def Contains(self, name):
+        return name in self._columns
+
+    def Remove(self, column):
+        """Removes column, given as column or name"""
+        name = getattr(column, 'Name', column)
+        if name not in self._columns:
+            raise ValueError('No column named {}'.format(name))
+        del self._columns[name]
+
+
+class DataTable(object):
+
+    """Table with columns held as python lists"""
+
+    def __init__(self, name, column_names=(), type_names=(), columns=()):
+        self.Name = name
+        self.Columns = DataColumnCollection()
+        self._set_data(column_names, type_names, columns)
+
+    def _set_data(self, column_names, type_names, columns):
+        self.Columns = DataColumnCollection()
+        for name, type_name, values in zip(column_names, type_names, columns):
+            self.Columns._add(DataColumn(self, name, type_name,
+                                         list(values)))
+
+    @property
+    def RowCount(self):
+        for column in self.Columns:
+            return len(column.values)
+        return 0
+
+    def ReplaceData(self, source):
+        self._set_data(*source.read())
+
+    def AddRows(self, source, settings):
+        """Adds rows of source, matched to the columns by name, columns the
+           source does not have get missing values"""
+        names, type_names, columns = source.read()
+        added = dict(zip(names, columns))
+        count = len(columns[0]) if columns else 0
+        for column in self.Columns:
+            values = added.get(column.Name)
+            column.values.extend(values if values is not None
+                                 else [None] * count)
+
+    def GetRows(self, *args):
+        """Yields rows, moving the cursors given along, the first argument
+           can be an IndexSet limiting the rows"""
+        if args and isinstance(args[0], IndexSet):
+            indices = iter(args[0])
+            cursors = args[1:]
+        else:
+            indices = range(self.RowCount)
+            cursors = args
+        row = _Row()
+        for index in indices:
+            row.Index = index
+            for cursor in cursors:
+                cursor.index = index
+            yield row
+
+    def RemoveRows(self, selection):
+        keep = [index for index in range(self.RowCount)
+                if not selection.indices.Contains(index)]
+        for column in self.Columns:
+            values = column.values
+            column.values = [values[index] for index in keep]
+
+
+class _Row(object):
+    __slots__ = ('Index',)
+
+
+class _DataValue(object):
+
+    __slots__ = ('IsValid', 'ValidValue')
+
+    def __init__(self, value):
+        self.IsValid = value is not None
+        self.ValidValue = value
+
+
+class DataValueCursor(object):
+
+    """Cursor on a column, moved by GetRows"""
+
+    def __init__(self, column, formatted):
+        self.values = column.values
+        self.formatted = formatted
+        self.index = 0
+
+    @classmethod
+    def Create(cls, column):
+        return cls(column, False)
+
+    @classmethod
+    def CreateFormatted(cls, column):
+        return cls(column, True)
+
+    @property
+    def CurrentDataValue(self):
+        return _DataValue(_cursor_value(self.values[self.index]))
+
+    @property
+    def CurrentValue(self):
+        value = self.values[self.index]
+        return format_value(value) if self.formatted else _cursor_value(value)
+
+
+class IndexSet(object):
+
+    """Set of row indices, flags in a bytearray"""
+
+    def __init__(self, size, value):
+        self.flags = bytearray([1 if value else 0]) * size
+
+    @property
+    def Capacity(self):
+        return len(self.flags)
+
+    @property
+    def Count(self):
+        return self.flags.count(1)
+
+    def AddIndex(self, index):
+        self.flags[index] = 1
+
+    def RemoveIndex(self, index):
+        self.flags[index] = 0
+
+    def Contains(self, index):
+        return bool(self.flags[index])
+
+    def And(self, other):
+        self.flags = bytearray(a & b for a, b in zip(self.flags, other.flags))
+
+    def Or(self, other):
+        self.flags = bytearray(a | b for a, b in zip(self.flags, other.flags))
+
+    def Not(self):
+        self.flags = self.flags.translate(bytearray([1, 0]) +
+                                          bytearray(254))
+
+    def __iter__(self):
+        flags = self.flags
+        index = flags.find(1)
+        while index >= 0:
+            yield index
+            index = flags.find(1, index + 1)
+
+
+class AddRowsSettings(object):
+
+    def __init__(self, table, source):
+        self.table = table
+        self.source = source
+
+
+class RowSelection(object):
+
+    def __init__(self, indices):
+        self.indices = indices
+
+
+class DataTableCollection(object):
+
+    def __init__(self):
+        self._tables = OrderedDict()
+
+    def Add(self, name, source):
+        if name in self._tables:
+            raise ValueError('Table {} exists'.format(name))
+        table = DataTable(name, *source.read())
+        self._tables[name] = table
+        return table
+
+    def Contains(self, name):
+        return name in self._tables
+
+    def Remove(self, table):
+        del self._tables[table.Name]
+
+    def __getitem__(self, name):
+        return self._tables[name]
+
+    def __iter__(self):
+        return iter(list(self._tables.values()))
+
+    def __len__(self):
+        return len(self._tables)
+
+    @property
+    def Count(self):
+        return len(self._tables)
+
+    @property
+    def DefaultTableReference(self):
+        for table in self._tables.values():
+            return table
+        return None
+
+
+class DataRelation(object):
+
+    def __init__(self, left, right, expression):
+        self.LeftTable = left
+        self.RightTable = right
+        self.Expression = expression
+
+
+class DataRelationCollection(object):
+
+    def __init__(self):
+        self._relations = []
+
+    def Add(self, left, right, expression):
+        relation = DataRelation(left, right, expression)
+        self._relations.append(relation)
+        return relation
+
+    def Remove(self, relation):
+        self._relations.remove(relation)
+
+    def __iter__(self):
+        return iter(list(self._relations))
+
+    def __len__(self):
+        return len(self._relations)
+
+    @property
+    def Count(self):
+        return len(self._relations)
+
+
+class Marking(object):
+
+    def __init__(self, name):
+        self.Name = name
+        self.selections = {}
+
+    def SetSelection(self, selection, table):
+        self.selections[table.Name] = selection
+
+
+class MarkingCollection(object):
+
+    def __init__(self):
+        self.DefaultMarkingReference = Marking('Marking')
+        self._markings = {'Marking': self.DefaultMarkingReference}
+
+    def __getitem__(self, name):
+        return self._markings[name]
+
+    def Add(self, name):
+        marking = self._markings[name] = Marking(name)
+        return marking
+
+
+class DataProperty(object):
+
+    DefaultAttributes = 'default'
+
+    @staticmethod
+    def CreateCustomPrototype(name, data_type, attributes):
+        return name
+
+
+class DataPropertyClass(object):
+    Document = 'document'
+
+
+class _PropertyRegistry(object):
+
+    def __init__(self, properties):
+        self._properties = properties
+
+    def AddProperty(self, property_class, prototype):
+        self._properties._values[prototype] = None
+
+
+class DocumentProperties(object):
+
+    """Document properties, setting one not added raises KeyError"""
+
+    def __init__(self):
+        self._values = {}
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __setitem__(self, name, value):
+        if name not in self._values:
+            raise KeyError(name)
+        self._values[name] = value
+
+
+class Data(object):
+
+    def __init__(self, properties):
+        self.Tables = DataTableCollection()
+        self.Relations = DataRelationCollection()
+        self.Markings = MarkingCollection()
+        self.Properties = _PropertyRegistry(properties)
+
+
+# Import --------------------------------------------------------------------
+
+class TextDataReaderSettings(object):
+
+    def __init__(self):
+        self.Separator = ','
+        self.Culture = None
+        self.header_rows = []
+        self.types = {}
+
+    def AddColumnNameRow(self, row):
+        self.header_rows.append(row)
+
+    def SetDataType(self, column, data_type):
+        self.types[column] = data_type.Name
+
+
+class TextFileDataSource(object):
+
+    """Text from a stream or file, read when the table is added"""
+
+    def __init__(self, source, settings):
+        self.source = source
+        self.settings = settings
+
+    def read(self):
+        if isinstance(self.source, MemoryStream):
+            text = self.source.ToArray().decode('utf-8')
+        else:
+            with io.open(self.source, encoding='utf-8') as text_file:
+                text = text_file.read()
+        separator = self.settings.Separator
+        lines = text.splitlines()
+        header_rows = self.settings.header_rows or [0]
+        names = lines[header_rows[0]].split(separator)
+        rows = [line.split(separator) for line in lines[header_rows[0] + 1:]
+                if line.strip()]
+        columns = []
+        type_names = []
+        for i, name in enumerate(names):
+            type_name = self.settings.types.get(i, 'String')
+            parse = PARSERS.get(type_name, PARSERS['String'])
+            columns.append([parse(row[i]) if i < len(row) and row[i] else None
+                            for row in rows])
+            type_names.append(type_name)
+        return names, type_names, columns
+
+
+class SbdfFileDataSource(object):
+
+    """Sbdf from a stream, read with the reader of the helpers"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self):
+        if _HELPERS not in sys.path:
+            sys.path.insert(0, _HELPERS)
+        from sbdf import read_sbdf
+        return read_sbdf(io.BytesIO(self.stream.ToArray()))
+
+
+class DataTableDataSource(object):
+
+    def __init__(self, table):
+        self.table = table
+
+    def read(self):
+        columns = list(self.table.Columns)
+        return ([column.Name for column in columns],
+                [column.Properties.DataType.Name for column in columns],
+                [list(column.values) for column in columns])
+
+
+# Application ---------------------------------------------------------------
+
+class _TypeId(object):
+
+    def __init__(self, name):
+        self.Name = name
+
+    def __str__(self):
+        return 'TypeIdentifier:' + self.Name
+
+
+class _Axis(object):
+
+    def __init__(self):
+        self.Expression = ''
+
+
+class _Legend(object):
+    Visible = False
+
+
+class _VisualData(object):
+    DataTableReference = None
+
+
+class Visual(object):
+
+    """Visual and its content in one object, As returns itself"""
+
+    type_name = 'Spotfire.Visual'
+
+    def __init__(self):
+        self.Title = ''
+        self.ShowTitle = False
+        self.TypeId = _TypeId(self.type_name)
+        self.Data = _VisualData()
+        self.XAxis = _Axis()
+        self.YAxis = _Axis()
+        self.ColorAxis = _Axis()
+        self.LineByAxis = _Axis()
+        self.Legend = _Legend()
+        self.HtmlContent = ''
+
+    @property
+    def Visual(self):
+        return self
+
+    @property
+    def As(self):
+        return _Generic(lambda content_type: (lambda: self))
+
+
+def _visual_type(name):
+    return type(name, (Visual,), {'type_name': 'Spotfire.' + name})
+
+
+VisualContent = _visual_type('VisualContent')
+Visualization = _visual_type('Visualization')
+BarChart = _visual_type('BarChart')
+BoxPlot = _visual_type('BoxPlot')
+ScatterPlot = _visual_type('ScatterPlot')
+LineChart = _visual_type('LineChart')
+HtmlTextArea = _visual_type('HtmlTextArea')
+ColorAxis = _Axis
+
+
+class CheckBoxFilter(object):
+    pass
+
+
+class _Generic(object):
+
+    """Generic method, called as method[Type](args)"""
+
+    def __init__(self, make):
+        self.make = make
+
+    def __getitem__(self, item_type):
+        return self.make(item_type)
+
+
+class VisualCollection(object):
+
+    def __init__(self):
+        self._visuals = []
+
+    @property
+    def AddNew(self):
+        return _Generic(self._add_new)
+
+    def _add_new(self, visual_type):
+        def add():
+            visual = visual_type()
+            self._visuals.append(visual)
+            return visual
+        return add
+
+    def Remove(self, visual):
+        self._visuals.remove(visual)
+
+    def __iter__(self):
+        return iter(list(self._visuals))
+
+    def __len__(self):
+        return len(self._visuals)
+
+    @property
+    def Count(self):
+        return len(self._visuals)
+
+
+class LayoutDefinition(object):
+
+    """Layout as nested sections, kept as lists"""
+
+    def __init__(self):
+        self.sections = [[]]
+
+    def BeginStackedSection(self):
+        self._begin('stacked')
+
+    def BeginSideBySideSection(self):
+        self._begin('side by side')
+
+    def _begin(self, kind):
+        section = [kind]
+        self.sections[-1].append(section)
+        self.sections.append(section)
+
+    def Add(self, visual, proportion=1.0):
+        self.sections[-1].append(visual)
+
+    def EndSection(self):
+        self.sections.pop()
+
+
+class Page(object):
+
+    def __init__(self, title):
+        self.Title = title
+        self.Visuals = VisualCollection()
+        self.Panels = []
+        self.layout = None
+
+    def ApplyLayout(self, layout):
+        self.layout = layout.sections[0]
+
+
+class PageCollection(object):
+
+    def __init__(self, doc):
+        self._doc = doc
+        self._pages = []
+
+    def AddNew(self, title):
+        page = Page(title)
+        self._pages.append(page)
+        if self._doc.ActivePageReference is None:
+            self._doc.ActivePageReference = page
+        return page
+
+    def Remove(self, page):
+        self._pages.remove(page)
+        if self._doc.ActivePageReference is page:
+            self._doc.ActivePageReference = (self._pages[0] if self._pages
+                                             else None)
+
+    def __iter__(self):
+        return iter(list(self._pages))
+
+    def __len__(self):
+        return len(self._pages)
+
+    @property
+    def Count(self):
+        return len(self._pages)
+
+
+class Transactions(object):
+
+    def ExecuteInTransaction(self, function):
+        function()
+
+
+class Document(object):
+
+    """Spotfire document with tables, relations, pages and properties"""
+
+    def __init__(self):
+        self.Properties = DocumentProperties()
+        self.Data = Data(self.Properties)
+        self.ActivePageReference = None
+        self.Pages = PageCollection(self)
+        self.Transactions = Transactions()
+
+    @property
+    def ActiveDataTableReference(self):
+        return self.Data.Tables.DefaultTableReference
+
+    def add_table(self, name, columns, type_names=None):
+        """Adds table directly, for setting up benchmarks
+        args:
+        name (str): name of table
+        columns (OrderedDict): lists of values by column name
+        type_names (list of str or None): spotfire types, Real if None
+        returns table (DataTable)
+        """
+        names = list(columns)
+        if type_names is None:
+            type_names = ['Real'] * len(names)
+        table = DataTable(name, names, type_names,
+                          [columns[name] for name in names])
+        self.Data.Tables._tables[name] = table
+        return table
+
+
+# Modules -------------------------------------------------------------------
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    """Registers the stand in modules Spotfire, System and clr, and puts
+       the helpers on the path"""
+    if _HELPERS not in sys.path:
+        sys.path.insert(0, _HELPERS)
+    _module('clr', AddReference=lambda name: None)
+    forms = _module('System.Windows.Forms', MessageBox=MessageBox,
+                    MessageBoxButtons=MessageBoxButtons,
+                    DialogResult=DialogResult)
+    windows = _module('System.Windows', Forms=forms)
+    io_module = _module('System.IO', MemoryStream=MemoryStream,
+                        StreamWriter=StreamWriter, SeekOrigin=SeekOrigin)
+    globalization = _module('System.Globalization', CultureInfo=CultureInfo)
+    drawing = _module('System.Drawing', Color=object)
+    _module('System', Array=_ArrayFactory(), Byte=int, IO=io_module,
+            Globalization=globalization, Windows=windows, Drawing=drawing)
+
+    data_import = _module('Spotfire.Dxp.Data.Import',
+                          TextFileDataSource=TextFileDataSource,
+                          TextDataReaderSettings=TextDataReaderSettings,
+                          SbdfFileDataSource=SbdfFileDataSource,
+                          DataTableDataSource=DataTableDataSource)
+    data = _module('Spotfire.Dxp.Data', DataType=DataType,
+                   DataValueCursor=DataValueCursor, IndexSet=IndexSet,
+                   RowSelection=RowSelection, DataProperty=DataProperty,
+                   AddRowsSettings=AddRowsSettings,
+                   DataPropertyClass=DataPropertyClass,
+                   DataRelation=DataRelation, Import=data_import)
+    visuals = _module('Spotfire.Dxp.Application.Visuals',
+                      VisualContent=VisualContent,
+                      Visualization=Visualization, BarChart=BarChart,
+                      BoxPlot=BoxPlot, ScatterPlot=ScatterPlot,
+                      LineChart=LineChart, HtmlTextArea=HtmlTextArea,
+                      ColorAxis=ColorAxis)
+    filters = _module('Spotfire.Dxp.Application.Filters',
+                      CheckBoxFilter=CheckBoxFilter)
+    layout = _module('Spotfire.Dxp.Application.Layout',
+                     LayoutDefinition=LayoutDefinition)
+    application = _module('Spotfire.Dxp.Application', Visuals=visuals,
+                          Filters=filters, Layout=layout)
+    dxp = _module('Spotfire.Dxp', Data=data, Application=application)
+    _module('Spotfire', Dxp=dxp)
@@ -0,0 +1,150 @@
+"""Author dbs: streaming group by aggregation, running statistics per group
+so that memory depends on the number of groups, not the number of rows"""
+import math
+from collections import OrderedDict
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+STATISTICS = ('mean', 'sum', 'min', 'max', 'count', 'std')
+
+# Names of the statistics in spotfire expressions, used for column names
+LABELS = {'mean': 'Avg', 'sum': 'Sum', 'min': 'Min', 'max': 'Max',
+          'count': 'Count', 'std': 'StdDev'}
+
+
+class Accumulator(object):
+
+    """Running count, sum, min, max, mean and variance of values, the
+       variance with Welford's method so that it stays accurate
+    """
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        """Adds value, None is skipped
+        args:
+        value (number or None): value to add
+        """
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """Adds the values of another accumulator, as if added here
+        args:
+        other (Accumulator): accumulator to merge in
+        """
+        if not other.count:
+            return
+        if not self.count:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def result(self, statistic):
+        """Returns statistic of the values added
+        args:
+        statistic (str): one of STATISTICS
+        returns value (number or None): None if there are too few values
+        raises: KeyError: if statistic is not among STATISTICS
+        """
+        if statistic == 'count':
+            return self.count
+        if not self.count:
+            return None
+        if statistic == 'std':
+            if self.count < 2:
+                return None
+            return math.sqrt(self.m2 / (self.count - 1))
+        return {'mean': self.mean, 'sum': self.total, 'min': self.minimum,
+                'max': self.maximum}[statistic]
+
+
+def check_statistics(statistics):
+    """Checks that statistics are known
+    args:
+    statistics (list of str): names of statistics
+    raises: KeyError: if a statistic is not among STATISTICS
+    """
+    for statistic in statistics:
+        if statistic not in STATISTICS:
+            raise KeyError('{} is not a statistic, choose among {}'.format(
+                statistic, ', '.join(STATISTICS)))
+
+
+def group_by(rows, key_count):
+    """Groups rows by their first values, accumulating the rest
+    args:
+    rows (iterable of lists): keys followed by the values to aggregate,
+                              can be a generator
+    key_count (int): number of key values first in each row
+    returns groups (OrderedDict): list of Accumulator by tuple of keys, in
+                                  the order the groups are first seen
+    """
+    groups = OrderedDict()
+    row_count = 0
+    for row in rows:
+        row_count += 1
+        key = tuple(row[:key_count])
+        accumulators = groups.get(key)
+        if accumulators is None:
+            accumulators = [Accumulator() for _ in row[key_count:]]
+            groups[key] = accumulators
+        for accumulator, value in zip(accumulators, row[key_count:]):
+            accumulator.add(value)
+    LOGGER.debug('Grouped %i rows in %i groups', row_count, len(groups))
+    return groups
+
+
+def result_names(value_names, statistics):
+    """Returns names of the result columns, the value names are kept when
+       there is only one statistic, else named like Avg(FOPT)
+    args:
+    value_names (list of str): names of aggregated columns
+    statistics (list of str): names of statistics
+    returns names (list of str)
+    """
+    if len(statistics) == 1:
+        return list(value_names)
+    return ['{}({})'.format(LABELS[statistic], value_name)
+            for value_name in value_names for statistic in statistics]
+
+
+def result_rows(groups, statistics):
+    """Yields one row per group, keys followed by the statistics
+    args:
+    groups (dict): list of Accumulator by tuple of keys
+    statistics (list of str): names of statistics
+    returns: generator of lists
+    """
+    for key, accumulators in groups.items():
+        row = list(key)
+        for accumulator in accumulators:
+            for statistic in statistics:
+                row.append(accumulator.result(statistic))
+        yield row
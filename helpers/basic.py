@@ -1,5 +1,6 @@
 """Author dbs: helper functions for use in spotfire scripts"""
 import logging
+import os
 import sys
 import re
 
@@ -14,10 +15,27 @@ def basic_path(path_list):
     return path
 
 
+# Loggers set up by init_logging, by name
+_LOGGERS = {}
+
+# Longest text of a payload logged with Short
+MAX_LOG_LENGTH = 300
+
+
+def _has_file_handler(logger, file_name):
+    """Returns True if logger already writes to file_name"""
+    path = os.path.abspath(file_name)
+    for handler in logger.handlers:
+        if getattr(handler, 'baseFilename', None) == path:
+            return True
+    return False
+
+
 def init_logging(name, loglevel=False, file_name=None, full=False):
 
     """
-     Init of logger instance
+     Init of logger instance, cheap to call again, the logger is cached
+     and handlers are added only once
      args:
         name: string, name that will appear when logger is activated
 
@@ -32,10 +50,19 @@ def init_logging(name, loglevel=False, file_name=None, full=False):
               logging level types
 
     """
+    logger = _LOGGERS.get(name)
+    if logger is None:
+        logger = logging.getLogger(name)
+        logger.addHandler(logging.NullHandler())
+        _LOGGERS[name] = logger
+
+    if not loglevel:
+
+        return logger
 
     if full:
 
-        format = ('%(asctime)s: %(name)s - %(funcname)s %(levelname)s ' +
+        format = ('%(asctime)s: %(name)s - %(funcName)s %(levelname)s ' +
                   '- %(message)s')
 
     else:
@@ -43,39 +70,84 @@ def init_logging(name, loglevel=False, file_name=None, full=False):
         format = '%(asctime)s: %(message)s'
 
     dateformat = '%m/%d/%Y %I:%M:%S'
-    if not loglevel:
+    # assuming loglevel is bound to the string value obtained from the
+    # command line argument. Convert to upper case to allow the user to
+    #use both lower and upper case
+    numeric_level = getattr(logging, loglevel.upper(), None)
 
-        logger = logging.getLogger(name)
-        logger.addHandler(logging.NullHandler())
+    if not isinstance(numeric_level, int):
 
-    else:
+        raise ValueError('Invalid log level: %s' % loglevel)
 
-        # assuming loglevel is bound to the string value obtained from the
-        # command line argument. Convert to upper case to allow the user to
-        #use both lower and upper case
-        numeric_level = getattr(logging, loglevel.upper(), None)
+    # Does nothing if the root logger is already configured
+    logging.basicConfig(level=numeric_level, format=format, datefmt=dateformat)
+    logging.getLogger().setLevel(numeric_level)
 
-        if not isinstance(numeric_level, int):
+    #Adds file handle to logger if file_name is specified
+    if file_name is not None and not _has_file_handler(logger, file_name):
 
-            raise ValueError('Invalid log level: %s' % loglevel)
+        fhandle = logging.FileHandler(file_name)
+        formatter = logging.Formatter(format, dateformat)
+        fhandle.setFormatter(formatter)
+        logger.addHandler(fhandle)
 
-        logging.basicConfig(level=numeric_level, format=format, datefmt=dateformat)
-        logger = logging.getLogger(__name__)
+    return logger
 
-        #Adds file handle to logger if file_name is specified
-        if file_name is not None:
 
-            try:
-                fhandle = logging.FileHandler(file_name)
-                formatter = logging.Formatter(format)
-                fhandle.setFormatter(formatter)
-                logger.addHandler(fhandle)
+def debug_enabled(logger):
+    """Returns True if logger emits debug messages, to guard expensive
+       debug output in loops
+    """
+    return logger.isEnabledFor(logging.DEBUG)
 
-            except IOError as ioerr:
 
-                raise ioerr
+class Short(object):
 
-    return logger
+    """Payload of a log message, turned into text only if the message is
+       emitted, and then truncated to limit characters
+    """
+
+    __slots__ = ('payload', 'limit')
+
+    def __init__(self, payload, limit=MAX_LOG_LENGTH):
+        """
+        args:
+        payload (anything): the object to log, like a list of rows
+        limit (int): max number of characters logged
+        """
+        self.payload = payload
+        self.limit = limit
+
+    def __str__(self):
+        payload = self.payload
+        if isinstance(payload, (list, tuple)):
+            # Only the items shown are converted, not the whole payload
+            parts = []
+            length = 0
+            for item in payload:
+                if length > self.limit:
+                    break
+                part = '{!r}'.format(item)
+                parts.append(part)
+                length += len(part) + 2
+            text = '[{}]'.format(', '.join(parts))
+            if len(parts) == len(payload) and len(text) <= self.limit:
+                return text
+        else:
+            text = '{!r}'.format(payload)
+            if len(text) <= self.limit:
+                return text
+        unit = 'characters' if isinstance(payload, (str, type(u''))) else 'items'
+        try:
+            size = ' of {} {}'.format(len(payload), unit)
+        except TypeError:
+            size = ''
+        return '{}... (truncated{})'.format(text[:self.limit], size)
+
+    __repr__ = __str__
+
+
+LOGGER = init_logging(__name__)
 
 
 def item_dict():
@@ -121,9 +193,8 @@ def controlled_list(input_list):
         dummy_list = []
         dummy_list.append(input_list)
         output_list = dummy_list
-        print('Converting')
-    print('Before return')
-    print(output_list)
+        LOGGER.debug('Converted %s to list', type(input_list).__name__)
+    LOGGER.debug('Returning %s', Short(output_list))
     return output_list
 
 
@@ -162,7 +233,6 @@ def get_list_entry(inlist, i):
       i (int): entry to get from list
     returns out (list entry or ' ')
     """
-    logger = init_logging(__name__ + '_get_list_entry')
     out= ' '
     try:
 
@@ -170,7 +240,7 @@ def get_list_entry(inlist, i):
 
     except IndexError:
 
-        logger.debug('Nothing to extract at %i', i)
+        LOGGER.debug('Nothing to extract at %i', i)
 
     return out
 
@@ -183,16 +253,17 @@ def set_document_property(doc, prop_name, value_name):
       prop_name (str): name of property
       value_name (str): value
     """
-    from Spotfire.Dxp.Data import DataProperty
-    from Spotfire.Dxp.Data import DataType
-    from Spotfire.Dxp.Data import DataPropertyClass
+    from loader import load_types
+    # boxes imports basic, imported here to avoid a circular import
+    from boxes import ok_message
+    DataProperty, DataType, DataPropertyClass = load_types(
+        'Spotfire.Dxp.Data', ['DataProperty', 'DataType', 'DataPropertyClass'])
 
-    logger = init_logging(__name__ + '.set_document_property')
-    logger.debug('Trying to set {} to {}'.format(prop_name, value_name))
+    LOGGER.debug('Trying to set %s to %s', prop_name, Short(value_name))
     try:
         doc.Properties[prop_name] = value_name
     except KeyError:
-        logger.info('%s does not exist will create as a string', prop_name)
+        LOGGER.info('%s does not exist will create as a string', prop_name)
         attr = DataProperty.DefaultAttributes
         prop = DataProperty.CreateCustomPrototype(prop_name, DataType.String, attr)
         doc.Data.Properties.AddProperty(DataPropertyClass.Document, prop)
@@ -208,14 +279,8 @@ def part_expression(ex_name, stat_type):
         ex_name (str): curve name
         stat_type (str): name of statistical type
     """
-    if stat_type =='':
-        start = '['
-        end = ']'
-    else:
-        start = '(['
-        end = '])'
-    expression = stat_type + start + ex_name + end
-    return expression
+    from expressions import axis_expression
+    return axis_expression([ex_name], [stat_type])
 
 
 def expression_maker(ex_names, stat_type):
@@ -224,29 +289,17 @@ def expression_maker(ex_names, stat_type):
         ex_names (list): curve names
         stat_type (str): name of statistical type
     """
-    if len(ex_names) == 1:
-        expression = part_expression(ex_names[0], stat_type)
-    else:
-        current_part = ex_names.pop(-1)
-        expression = (expression_maker(ex_names, stat_type) + ','
-                      + part_expresion(current_part, stat_type))
-
-    return expression
+    from expressions import axis_expression
+    return axis_expression(ex_names, [stat_type])
 
 
 def create_expression(ex_names, stat_types):
-    """ makes expression to be used on chart axis
+    """ makes expression to be used on chart axis, every curve with every
+        statistical type
         args:
         ex_names (list): curve names
-        stat_types (list): name of statistical type
+        stat_types (list): names of statistical types, '' for the curves
+                           as they are
     """
-    expression = ''
-    if not isinstance(ex_names, list):
-        ex_names = list(ex_names)
-
-    if not isinstance(stat_types, list):
-        stat_types = list(stat_types)
-
-    expression = expression_maker(ex_names, stat_types.pop(0))
-    for stat_type in stat_types:
-        expression = expression + ',' + expression_maker(ex_names, stat_types)
+    from expressions import axis_expression
+    return axis_expression(ex_names, stat_types)
@@ -0,0 +1,184 @@
+"""Author dbs: batching of document changes, so that the changes made by the
+helpers are confirmed once and applied in one transaction"""
+from contextlib import contextmanager
+from basic import init_logging
+from boxes import ok_message, yes_no_message
+
+LOGGER = init_logging(__name__)
+
+# Stages in the order they are applied, deletes before adds and
+# relations after the tables
+STAGES = ('delete_visuals', 'delete_pages', 'delete_rows', 'delete_columns',
+          'delete_tables', 'rename_columns', 'add_tables', 'add_pages',
+          'add_visuals', 'add_relations')
+STAGE_ORDER = dict((stage, i) for i, stage in enumerate(STAGES))
+
+MAX_SUMMARY_LINES = 30
+
+# Active batches, by id of document
+_ACTIVE = {}
+
+
+class Batch(object):
+
+    """Changes queued for a document"""
+
+    def __init__(self, doc):
+        """
+        args:
+        doc (Spotfire document instance): document changed
+        """
+        self.doc = doc
+        self.mutations = []
+        self.failures = []
+        # Latest stage queued for each target
+        self.target_orders = {}
+
+    def add(self, stage, description, function, args, targets=()):
+        """Queues a change, in its stage or, if a change queued before on
+           one of its targets has a later stage, in that stage
+        args:
+        stage (str): one of STAGES
+        description (str): what the change does, for the confirmation
+        function (callable): makes the change
+        args (tuple): arguments to function
+        targets (list of tuples): kind and name of the objects changed,
+                                  like ('tables', 'Summary')
+        raises: KeyError: if stage is not among STAGES
+        """
+        order = STAGE_ORDER[stage]
+        for target in targets:
+            order = max(order, self.target_orders.get(target, order))
+        for target in targets:
+            self.target_orders[target] = order
+        self.mutations.append((order, len(self.mutations), description,
+                               function, args))
+
+    def ordered(self):
+        """Returns the changes in the order they are applied, by stage and
+           then in the order queued"""
+        return sorted(self.mutations, key=lambda mutation: mutation[:2])
+
+    def fail(self, description):
+        """Records a queued change that could not be made, reported once
+           when all changes are applied
+        args:
+        description (str): what went wrong
+        """
+        LOGGER.warning(description)
+        self.failures.append(description)
+
+    def summary(self, descriptions=None):
+        """Returns text listing the queued changes
+        args:
+        descriptions (list of str or None): lines to list, the descriptions
+                                            of the queued changes if None
+        """
+        if descriptions is None:
+            descriptions = [mutation[2] for mutation in self.ordered()]
+        lines = descriptions[:MAX_SUMMARY_LINES]
+        if len(descriptions) > MAX_SUMMARY_LINES:
+            lines.append('... and {} more'.format(len(descriptions) -
+                                                  MAX_SUMMARY_LINES))
+        return '\n'.join(lines)
+
+    def apply(self):
+        """Makes all queued changes in one transaction, then shows the
+           changes that failed, if any"""
+        mutations = self.ordered()
+
+        def execute():
+            """Runs the changes, inside the transaction"""
+            for _, _, description, function, args in mutations:
+                LOGGER.debug('Applying %s', description)
+                function(*args)
+
+        self.doc.Transactions.ExecuteInTransaction(execute)
+        del self.mutations[:]
+        if self.failures:
+            message = 'Could not make {} changes:\n{}'.format(
+                len(self.failures), self.summary(self.failures))
+            ok_message(message, 'Warning!')
+            del self.failures[:]
+
+
+def active_batch(doc):
+    """Returns batch active for document, or None
+    args:
+    doc (Spotfire document instance): document to check
+    """
+    entry = _ACTIVE.get(id(doc))
+    if entry is not None and entry[0] is doc:
+        return entry[1]
+    return None
+
+
+def queue_mutation(doc, stage, description, function, *args, **options):
+    """Queues change if a batch is active for the document
+    args:
+    doc (Spotfire document instance): document changed
+    stage (str): one of STAGES
+    description (str): what the change does
+    function (callable): makes the change, called with args
+    targets (list of tuples): keyword only, kind and name of the objects
+                              changed, like ('tables', 'Summary'), see
+                              Batch.add
+    returns queued (bool): False if no batch is active, then the caller
+                           makes the change itself
+    """
+    current = active_batch(doc)
+    if current is None:
+        return False
+    current.add(stage, description, function, args,
+                options.get('targets', ()))
+    return True
+
+
+@contextmanager
+def batch(doc, confirm=True):
+    """Queues the changes the helpers make to the document, and applies
+       them in one transaction at the end, use as
+       with batch(doc): ...
+       Changes are applied by stage, deletes before adds and relations
+       last, but never before a change queued earlier on the same table
+       or page, so make_table followed by delete_columns of that table
+       deletes the columns of the new table. Rows to delete are selected
+       when the batch applies, after the changes before them
+    args:
+    doc (Spotfire document instance): document to change
+    confirm (bool): asks once before applying if True, the helpers do not
+                    ask for each change while batching
+    yields current (Batch): the queued changes
+    """
+    current = active_batch(doc)
+    if current is not None:
+        # Nested, the outer batch applies
+        yield current
+        return
+
+    current = Batch(doc)
+    _ACTIVE[id(doc)] = (doc, current)
+    try:
+        yield current
+    except Exception:
+        LOGGER.warning('Discarding %i queued changes', len(current.mutations))
+        raise
+    finally:
+        del _ACTIVE[id(doc)]
+
+    if not current.mutations:
+        return
+    confirmation = True
+    if confirm:
+        heading = 'Apply {} changes'.format(len(current.mutations))
+        message = ('The following changes will be made:\n{}\n' +
+                   'Do you want to proceed?').format(current.summary())
+        confirmation = yes_no_message(message, heading)
+
+    if confirmation:
+        current.apply()
+    else:
+        heading = 'No changes'
+        message = 'You decided not to apply {} changes'.format(
+            len(current.mutations))
+        ok_message(message, heading)
@@ -1,8 +1,124 @@
+from contextlib import contextmanager
 from basic import init_logging, list_string, item_dict
+from instrument import instrument_functions, dialog_started, dialog_ended
+from loader import load_type
 
 
 LOGGER = init_logging(__name__)
 
+# Interaction policies, how messages and questions are handled
+INTERACTIVE = 'interactive'
+AUTO_YES = 'yes'
+AUTO_NO = 'no'
+COLLECT = 'collect'
+POLICIES = (INTERACTIVE, AUTO_YES, AUTO_NO, COLLECT)
+
+# Current policy, answer given to questions when collecting, and the
+# messages collected when not interactive
+_STATE = {'policy': INTERACTIVE, 'answer': True, 'messages': []}
+
+
+def _forms():
+    """Returns System.Windows.Forms, the assembly is referenced once"""
+    return load_type('System.Windows', 'Forms', 'System.Windows.Forms')
+
+
+def set_policy(policy, answer=True):
+
+    """ Sets how messages and questions are handled
+        args:
+
+            policy (str): one of POLICIES, interactive shows every box,
+                          yes and no answer all questions without asking,
+                          collect answers with answer, all but
+                          interactive collect the messages instead of
+                          showing them
+            answer (bool): answer to questions when collecting
+
+        returns: previous (tuple): previous policy and answer
+
+        raises: ValueError: if policy is not among POLICIES
+    """
+    if policy not in POLICIES:
+        raise ValueError('{} is not a policy, choose among {}'.format(
+            policy, list_string(', '.join(POLICIES))))
+    previous = (_STATE['policy'], _STATE['answer'])
+    _STATE['policy'] = policy
+    _STATE['answer'] = answer
+    return previous
+
+
+def get_policy():
+    """Returns the current interaction policy"""
+    return _STATE['policy']
+
+
+def _collect(kind, message, heading, answer=None):
+    """Stores message instead of showing it"""
+    LOGGER.info('%s: %s', heading, message)
+    _STATE['messages'].append((kind, heading, message, answer))
+
+
+def collected_messages(clear=True):
+
+    """ Returns messages collected while not interactive
+        args:
+
+            clear (bool): empties the collection if True
+
+        returns: messages (list of tuples): kind ('message' or
+                 'question'), heading, message and answer given
+    """
+    messages = list(_STATE['messages'])
+    if clear:
+        del _STATE['messages'][:]
+    return messages
+
+
+def summary_text(messages):
+    """Makes one text of collected messages
+    args:
+    messages (list of tuples): as returned by collected_messages
+    returns: text (str)
+    """
+    lines = []
+    for kind, heading, message, answer in messages:
+        line = '{}: {}'.format(heading, message)
+        if kind == 'question':
+            line += ' -> {}'.format('yes' if answer else 'no')
+        lines.append(line)
+    return '\n\n'.join(lines)
+
+
+@contextmanager
+def batch_mode(policy=COLLECT, answer=True, show_summary=True):
+
+    """ Runs helpers without blocking boxes, use as
+        with batch_mode() as messages: ...
+
+        args:
+
+            policy (str): one of POLICIES
+            answer (bool): answer to questions when collecting
+            show_summary (bool): shows the collected messages in one box
+                                 at the end if True
+
+        yields messages (list): filled with the collected messages at exit
+    """
+    messages = []
+    previous_messages = _STATE['messages']
+    _STATE['messages'] = []
+    previous = set_policy(policy, answer)
+    try:
+        yield messages
+    finally:
+        set_policy(*previous)
+        messages.extend(_STATE['messages'])
+        _STATE['messages'] = previous_messages
+        if show_summary and messages:
+            ok_message(summary_text(messages),
+                       'Summary of {} messages'.format(len(messages)))
+
 
 def ok_message(message, heading='WARNING'):
 
@@ -14,10 +130,14 @@ def ok_message(message, heading='WARNING'):
             heading: str, what is displayed as heading 'name' of box
 
     """
-    import clr
-    clr.AddReference('System.Windows.Forms')
-    from System.Windows import Forms
+    if _STATE['policy'] != INTERACTIVE:
+        _collect('message', message, heading)
+        return
+
+    Forms = _forms()
+    start = dialog_started()
     Forms.MessageBox.Show(message, heading, Forms.MessageBoxButtons.OK)
+    dialog_ended(start)
 
 
 def yes_no_message(message, heading):
@@ -34,11 +154,18 @@ def yes_no_message(message, heading):
                   answer: boolean
 
     """
-    import clr
-    clr.AddReference('System.Windows.Forms')
-    from System.Windows import Forms
+    policy = _STATE['policy']
+    if policy != INTERACTIVE:
+        answer = {AUTO_YES: True, AUTO_NO: False}.get(policy,
+                                                      _STATE['answer'])
+        _collect('question', message, heading, answer)
+        return answer
+
+    Forms = _forms()
     answer = False
+    start = dialog_started()
     reply = Forms.MessageBox.Show(message, heading, Forms.MessageBoxButtons.YesNo)
+    dialog_ended(start)
     if reply == Forms.DialogResult.No:
 
         LOGGER.debug('User pressed no')
@@ -53,7 +180,6 @@ def yes_no_message(message, heading):
 def find_item(item_type):
     """returns string to confirm items"""
     items = item_dict()
-    LOGGER.debug(items)
     LOGGER.debug('Extracting with |%s|', item_type)
     item_types = None
     try:
@@ -81,8 +207,7 @@ def deletion_message(del_list, item_type, extra_text=''):
                                                      extra_text)
 
     confirmation = yes_no_message(message, heading)
-    LOGGER.debug('Received answer')
-    LOGGER.debug(confirmation)
+    LOGGER.debug('Received answer %s', confirmation)
     return confirmation
 
 
@@ -113,7 +238,6 @@ def announce_no_data(name, valid_names, data_type):
 
 
     valid_types = sorted(item_dict())
-    LOGGER.debug(valid_types)
     if data_type not in valid_types:
 
         raise AttributeError('No such data type in spotfire project')
@@ -126,3 +250,6 @@ def announce_no_data(name, valid_names, data_type):
 
         ok_message(message, heading)
         LOGGER.debug('Written message')
+
+
+instrument_functions(globals(), __name__)
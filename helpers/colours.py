@@ -1,5 +1,7 @@
 from basic import init_logging
 from boxes import ok_message, yes_no_message, announce_no_data
+from instrument import instrument_functions
+from loader import load_type
 
 LOGGER = init_logging(__name__)
 
@@ -9,7 +11,7 @@ def get_coloraxis(viz_cont):
        returns col_axis:  Spotfire.Dxp.Application.Visuals.ColorAxis
     """
     col_axis = None
-    if hassatr(viz_cont, 'ColorAxis'):
+    if hasattr(viz_cont, 'ColorAxis'):
         col_axis = viz_cont.ColorAxis
     else:
         message = 'Visual has no color axis'
@@ -41,12 +43,13 @@ def set_colour_rule(viz_cont, expression):
     args:
     doc (Spotfire document instance): document to read from
     """
-    from Spotfire.Dxp.Application.Visuals import ColorAxis, VisualContent
-    from System.Drawing import Color
-    v = v.As[VisualContent]()
+    VisualContent = load_type('Spotfire.Dxp.Application.Visuals',
+                              'VisualContent')
+    v = viz_cont.As[VisualContent]()
     if hasattr(v,'ColorAxis'):
-        v.ColorAxis.Expression=expr
+        v.ColorAxis.Expression=expression
         c= v.ColorAxis.Coloring
         c.AddCategoricalColorRule()
 
 
+instrument_functions(globals(), __name__)
@@ -0,0 +1,171 @@
+"""Author dbs: compact, typed column data read from spotfire tables, many
+columns in one pass over the rows"""
+from array import array
+from basic import init_logging
+from instrument import record_size
+from loader import load_type
+
+LOGGER = init_logging(__name__)
+
+# array.array typecode of the spotfire types held in arrays, the other
+# types are held in lists
+ARRAY_TYPECODES = {'Integer': 'i', 'Real': 'd', 'SingleReal': 'f',
+                   'Boolean': 'b', 'LongInteger': 'q'}
+
+
+def _typecode(type_name):
+    """Returns array typecode for a spotfire type, None if held in list"""
+    typecode = ARRAY_TYPECODES.get(type_name)
+    if typecode is not None:
+        try:
+            array(typecode)
+        except ValueError:
+            # No 64 bit integers in the arrays of older pythons
+            typecode = None
+    return typecode
+
+
+class ColumnData(object):
+
+    """Values of one column, with a mask flagging the missing values.
+       Numeric columns are held in array.array, missing values there are 0,
+       other columns in lists, missing values there are None.
+    """
+
+    def __init__(self, name, type_name):
+        """
+        args:
+        name (str): name of column
+        type_name (str): spotfire type name of column
+        """
+        self.name = name
+        self.type_name = type_name
+        typecode = _typecode(type_name)
+        self.values = array(typecode) if typecode is not None else []
+        self.missing = bytearray()
+        self.indices = None
+
+    def __len__(self):
+        return len(self.missing)
+
+    def to_list(self):
+        """Returns values as list, None for missing values"""
+        return [None if missing else value
+                for value, missing in zip(self.values, self.missing)]
+
+    def to_numpy(self):
+        """Returns values as numpy masked array
+        raises: ImportError: if numpy is not installed
+        """
+        import numpy
+        mask = numpy.frombuffer(bytes(self.missing), dtype=numpy.uint8)
+        if isinstance(self.values, array):
+            data = numpy.array(self.values)
+        else:
+            data = numpy.array(self.values, dtype=object)
+        return numpy.ma.masked_array(data, mask=mask.astype(bool))
+
+
+def type_name(column):
+    """Returns spotfire type name of column"""
+    return column.Properties.DataType.Name
+
+
+def _value_reader(cursor, formatted):
+    """Returns function reading the current value of a cursor, None for
+       missing values, formatted cursors give text
+    """
+    if formatted:
+        return lambda: cursor.CurrentValue
+
+    def read():
+        data_value = cursor.CurrentDataValue
+        if data_value.IsValid:
+            return data_value.ValidValue
+        return None
+    return read
+
+
+def iter_rows(table, keys, rows=None):
+    """Yields row index and values of some columns, in one pass
+    args:
+    table (Spotfire.Dxp.Data.DataTable): table to read
+    keys (list): column names, typed values are read, or tuples of column
+                 name and formatted flag, formatted text read if True,
+                 missing typed values are None
+    rows (Spotfire.Dxp.Data.IndexSet or None): rows to read, all if None
+    returns: generator of tuples, row index and list of values
+    """
+    DataValueCursor = load_type('Spotfire.Dxp.Data', 'DataValueCursor')
+
+    cursors = []
+    readers = []
+    for key in keys:
+        column_name, formatted = key if isinstance(key, tuple) else (key,
+                                                                    False)
+        column = table.Columns[column_name]
+        if formatted:
+            cursor = DataValueCursor.CreateFormatted(column)
+        else:
+            cursor = DataValueCursor.Create(column)
+        cursors.append(cursor)
+        readers.append(_value_reader(cursor, formatted))
+
+    if rows is None:
+        row_cursor = table.GetRows(*cursors)
+    else:
+        row_cursor = table.GetRows(rows, *cursors)
+    count = 0
+    for row in row_cursor:
+        count += 1
+        yield row.Index, [read() for read in readers]
+    record_size(count, len(keys))
+
+
+def read_columns(table, column_names, rows=None):
+    """Reads columns of a table with typed cursors, in one pass
+    args:
+    table (Spotfire.Dxp.Data.DataTable): table to read
+    column_names (list of str): names of columns to read
+    rows (Spotfire.Dxp.Data.IndexSet or None): rows to read, all if None,
+                                               if given the row index of
+                                               each value is kept in indices
+    returns: columns (list of ColumnData), in order of column_names
+    """
+    DataValueCursor = load_type('Spotfire.Dxp.Data', 'DataValueCursor')
+
+    columns = []
+    cursors = []
+    for column_name in column_names:
+        column = table.Columns[column_name]
+        columns.append(ColumnData(column_name, type_name(column)))
+        cursors.append(DataValueCursor.Create(column))
+
+    # Bound methods, looked up once, not once per value
+    readers = [(cursor, column.values.append, column.missing.append,
+                0 if isinstance(column.values, array) else None)
+               for cursor, column in zip(cursors, columns)]
+    indices = None
+    if rows is None:
+        row_cursor = table.GetRows(*cursors)
+    else:
+        row_cursor = table.GetRows(rows, *cursors)
+        indices = array('i')
+
+    for row in row_cursor:
+        if indices is not None:
+            indices.append(row.Index)
+        for cursor, append, append_missing, empty in readers:
+            data_value = cursor.CurrentDataValue
+            if data_value.IsValid:
+                append(data_value.ValidValue)
+                append_missing(0)
+            else:
+                append(empty)
+                append_missing(1)
+
+    for column in columns:
+        column.indices = indices
+    record_size(len(columns[0]) if columns else 0, len(columns))
+    LOGGER.debug('Read %i columns of %s', len(columns), table.Name)
+    return columns
@@ -0,0 +1,107 @@
+"""Author dbs: streaming reading of comma separated files, only the columns
+selected, by name, pattern or summary vector, so that wide files cost
+what the selected columns cost"""
+import csv
+import re
+import sys
+from basic import init_logging
+from summary import parse_vector_name
+
+LOGGER = init_logging(__name__)
+
+# Kept with any selection when the file has them
+KEY_COLUMNS = ('DATE', 'REAL', 'ITER', 'ENSEMBLE')
+
+
+def open_csv(file_path):
+    """Returns file opened for the csv module
+    args:
+    file_path (str): path of file
+    returns file (file object)
+    """
+    if sys.version_info[0] < 3:
+        return open(file_path, 'rb')
+    return open(file_path, 'r', newline='')
+
+
+def read_header(file_path, delimiter=','):
+    """Returns names of the columns of a file, from its first line
+    args:
+    file_path (str): path of file
+    delimiter (str): separator of values
+    returns header (list of str)
+    raises: ValueError: if the file is empty
+    """
+    with open_csv(file_path) as stream:
+        for header in csv.reader(stream, delimiter=delimiter):
+            return header
+    raise ValueError('No header line in {}'.format(file_path))
+
+
+def selected_indices(header, column_names=None, pattern=None, vectors=None,
+                     keep=KEY_COLUMNS):
+    """Returns positions of the columns selected, in file order, all if
+       nothing is selected
+    args:
+    header (list of str): names of the columns of the file
+    column_names (list of str or None): names of columns to keep
+    pattern (str or None): regex columns to keep match from the start
+    vectors (list of str or None): summary keywords, like WOPR, or vectors,
+                                   like OPR, the columns of which to keep,
+                                   history columns included
+    keep (list of str): names of columns kept with any selection
+    returns indices (list of int)
+    raises: KeyError: if a column in column_names is not in header
+    """
+    if column_names is None and pattern is None and vectors is None:
+        return list(range(len(header)))
+    wanted = set(keep)
+    if column_names is not None:
+        missing = [name for name in column_names if name not in header]
+        if missing:
+            raise KeyError('Columns {} are not in file'.format(
+                ', '.join(missing)))
+        wanted.update(column_names)
+    matcher = re.compile(pattern).match if pattern is not None else None
+    vectors = frozenset(vectors or ())
+    indices = []
+    for index, name in enumerate(header):
+        if name in wanted or (matcher is not None and matcher(name)):
+            indices.append(index)
+        elif vectors:
+            record = parse_vector_name(name)
+            if record is not None and (record.keyword in vectors or
+                                       record.vector in vectors):
+                indices.append(index)
+    LOGGER.debug('Selected %i of %i columns', len(indices), len(header))
+    return indices
+
+
+def projected_rows(file_path, indices, delimiter=','):
+    """Yields the values of the columns selected, one line at a time after
+       the header, lines not as long as the header are left out
+    args:
+    file_path (str): path of file
+    indices (list of int): positions of the columns to keep
+    delimiter (str): separator of values
+    returns: generator of lists of str
+    """
+    with open_csv(file_path) as stream:
+        reader = csv.reader(stream, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        width = len(header)
+        count = 0
+        skipped = 0
+        for row in reader:
+            count += 1
+            if len(row) != width:
+                skipped += 1
+                continue
+            yield [row[index] for index in indices]
+    if skipped:
+        LOGGER.warning('%i of %i lines of %s do not have as many values '
+                       'as the header, they were left out', skipped, count,
+                       file_path)
+    LOGGER.debug('Read %i lines of %s', count, file_path)
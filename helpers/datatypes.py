@@ -0,0 +1,247 @@
+"""Author dbs: column type inference and canonical, culture invariant,
+text values for tables made in spotfire"""
+import re
+from datetime import date, datetime
+from basic import init_logging
+
+try:
+    STRING_TYPES = (basestring,)
+    INTEGER_TYPES = (int, long)
+except NameError:
+    STRING_TYPES = (str,)
+    INTEGER_TYPES = (int,)
+
+LOGGER = init_logging(__name__)
+
+TYPE_NAMES = ('Integer', 'LongInteger', 'Real', 'Date', 'DateTime', 'String')
+
+INTEGER_LIMIT = 2 ** 31
+LONG_LIMIT = 2 ** 63
+
+# Types within one family can be widened to the type with the highest rank
+NUMERIC_RANKS = {'Integer': 0, 'LongInteger': 1, 'Real': 2}
+TEMPORAL_RANKS = {'Date': 0, 'DateTime': 1}
+
+INTEGER_PATTERN = re.compile(r'^[+-]?\d+$')
+REAL_PATTERN = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+DATETIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}' +
+                              r'(:\d{2}(\.\d+)?)?$')
+
+
+def merge_types(first, second):
+    """Returns the narrowest type that can hold values of both types
+    args:
+    first (str or None): type name, None if no type yet
+    second (str or None): type name, None if no type yet
+    returns merged (str or None): type name
+    """
+    if first is None or first == second:
+        return second
+    if second is None:
+        return first
+    for ranks in (NUMERIC_RANKS, TEMPORAL_RANKS):
+        if first in ranks and second in ranks:
+            if ranks[first] > ranks[second]:
+                return first
+            return second
+    return 'String'
+
+
+def integer_type(value):
+    """Returns the spotfire type that holds an integer
+    args:
+    value (int): the integer
+    returns type_name (str)
+    """
+    if -INTEGER_LIMIT <= value < INTEGER_LIMIT:
+        return 'Integer'
+    if -LONG_LIMIT <= value < LONG_LIMIT:
+        return 'LongInteger'
+    return 'Real'
+
+
+def text_type(text):
+    """Returns the type a text parses as with the invariant culture
+    args:
+    text (str): text to check
+    returns type_name (str or None): None if text is empty
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if INTEGER_PATTERN.match(text):
+        return integer_type(int(text))
+    if REAL_PATTERN.match(text):
+        return 'Real'
+    if DATE_PATTERN.match(text):
+        return 'Date'
+    if DATETIME_PATTERN.match(text):
+        return 'DateTime'
+    return 'String'
+
+
+def date_text(value):
+    """Returns a date as yyyy-MM-dd, also for years before 1900
+    args:
+    value (datetime.date): the date
+    returns text (str)
+    """
+    return '{:04d}-{:02d}-{:02d}'.format(value.year, value.month, value.day)
+
+
+def python_value(value):
+    """Converts .NET DateTime values, as read by cursors, to python datetime,
+       other values are returned as they are
+    args:
+    value (anything): value to convert
+    returns value
+    """
+    if hasattr(value, 'Ticks') and hasattr(value, 'Year'):
+        return datetime(value.Year, value.Month, value.Day, value.Hour,
+                        value.Minute, value.Second, value.Millisecond * 1000)
+    return value
+
+
+def value_type(value):
+    """Returns the type of a value, texts are typed by what they parse as
+    args:
+    value (anything): value to check
+    returns type_name (str or None): None for missing values
+    """
+    if value is None:
+        return None
+    if isinstance(value, STRING_TYPES):
+        return text_type(value)
+    if isinstance(value, bool):
+        return 'String'
+    if isinstance(value, INTEGER_TYPES):
+        return integer_type(value)
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            return None
+        return 'Real'
+    if isinstance(value, datetime):
+        return 'DateTime'
+    if isinstance(value, date):
+        return 'Date'
+    converted = python_value(value)
+    if converted is not value:
+        return value_type(converted)
+    return text_type(str(value))
+
+
+def infer_type(values):
+    """Returns the narrowest type that holds all values
+    args:
+    values (iterable): the values
+    returns type_name (str): String if there are no values
+    """
+    type_name = None
+    for value in values:
+        type_name = merge_types(type_name, value_type(value))
+        if type_name == 'String':
+            break
+    return type_name or 'String'
+
+
+def value_text(value):
+    """Returns the canonical text of a value and its type
+    args:
+    value (anything): value to write
+    returns text (str), type_name (str or None): None for missing values
+    """
+    if value is None:
+        return '', None
+    if isinstance(value, STRING_TYPES):
+        type_name = text_type(value)
+        if type_name is None:
+            return '', None
+        return value, type_name
+    if isinstance(value, bool):
+        return str(value), 'String'
+    if isinstance(value, INTEGER_TYPES):
+        return str(value), integer_type(value)
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            return '', None
+        return repr(value), 'Real'
+    if isinstance(value, datetime):
+        text = '{} {:02d}:{:02d}:{:02d}'.format(date_text(value), value.hour,
+                                                value.minute, value.second)
+        return text, 'DateTime'
+    if isinstance(value, date):
+        return date_text(value), 'Date'
+    converted = python_value(value)
+    if converted is not value:
+        return value_text(converted)
+    text = str(value)
+    return text, text_type(text)
+
+
+class ColumnTypes(object):
+
+    """Keeps track of the types of the columns in a table, types not given
+       are inferred from the values while the rows are encoded
+    """
+
+    def __init__(self, column_names, column_types=None):
+        """
+        args:
+        column_names (list): names of the columns
+        column_types (dict, list or None): type names by column name or
+                                           position, None to infer all
+        raises: ValueError: if a type name is not in TYPE_NAMES
+        """
+        self.column_names = list(column_names)
+        width = len(self.column_names)
+        if column_types is None:
+            column_types = {}
+        elif not isinstance(column_types, dict):
+            column_types = dict(zip(self.column_names, column_types))
+
+        self.types = [column_types.get(name) for name in self.column_names]
+        for type_name in self.types:
+            if type_name is not None and type_name not in TYPE_NAMES:
+                raise ValueError(('{} is not a valid column type, choose ' +
+                                  'among {}').format(type_name,
+                                                     ', '.join(TYPE_NAMES)))
+
+        self.infer = [type_name is None for type_name in self.types]
+        self.width = width
+
+    def encode(self, rows):
+        """Converts rows to canonical text, inferring types in the same pass
+        args:
+        rows (iterable of lists): the rows, can be a generator
+        returns: generator of lists of strings
+        """
+        width = self.width
+        types = self.types
+        infer = self.infer
+        for row in rows:
+            if not isinstance(row, (list, tuple)):
+                row = [row]
+            texts = []
+            if len(row) != width:
+                # Left for the text writer to skip
+                for value in row:
+                    texts.append(value_text(value)[0])
+                yield texts
+                continue
+
+            for i, value in enumerate(row):
+                if isinstance(value, STRING_TYPES) and types[i] == 'String':
+                    texts.append(value)
+                    continue
+                text, type_name = value_text(value)
+                texts.append(text)
+                if infer[i] and type_name is not None:
+                    types[i] = merge_types(types[i], type_name)
+            yield texts
+
+    def type_names(self):
+        """Returns the column types, columns without values are String
+        returns type_names (list of str)
+        """
+        return [type_name or 'String' for type_name in self.types]
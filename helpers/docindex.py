@@ -0,0 +1,213 @@
+"""Author dbs: cached name lookups of tables, pages, visuals and columns in a
+spotfire document"""
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+KINDS = ('tables', 'pages', 'visuals', 'columns')
+
+# Index of the document last used, by id of document, indexes of other
+# documents are dropped so that closed documents are not kept alive
+_INDEXES = {}
+
+
+def get_index(doc):
+    """Returns the index of a document, makes it on first call
+    args:
+    doc (Spotfire document instance): document to index
+    returns index (DocumentIndex)
+    """
+    entry = _INDEXES.get(id(doc))
+    if entry is None or entry[0] is not doc:
+        _INDEXES.clear()
+        entry = (doc, DocumentIndex(doc))
+        _INDEXES[id(doc)] = entry
+    return entry[1]
+
+
+def invalidate_index(doc, kind=None, parent=None):
+    """Drops cached lookups of a document, to be used after changing the
+       document without the helpers
+    args:
+    doc (Spotfire document instance): document indexed
+    kind (str or None): one of KINDS, None drops everything
+    parent (str or None): page title for visuals, table name for columns
+    """
+    entry = _INDEXES.get(id(doc))
+    if entry is not None and entry[0] is doc:
+        entry[1].invalidate(kind, parent)
+
+
+class DocumentIndex(object):
+
+    """Name to object maps of a spotfire document, built on first lookup.
+       The helpers keep the maps up to date with add and remove, a map is
+       built again when invalidated, when the document has another number
+       of objects of its kind than the map, like after deleting outside
+       the helpers, and on a miss for a name the document has, like after
+       adding or renaming outside the helpers. Tables and columns are
+       checked with Contains, pages and visuals by building again.
+    """
+
+    def __init__(self, doc):
+        """
+        args:
+        doc (Spotfire document instance): document to index
+        """
+        self.doc = doc
+        self._maps = {}
+        self._names = {}
+        self._counts = {}
+
+    def _items(self, kind, parent):
+        """Returns the items of kind in the document, and their name attribute
+        """
+        if kind == 'tables':
+            return self.doc.Data.Tables, 'Name'
+        if kind == 'pages':
+            return self.doc.Pages, 'Title'
+        if kind == 'visuals':
+            page = self.page(parent)
+            return (page.Visuals if page is not None else ()), 'Title'
+        if kind == 'columns':
+            table = self.table(parent)
+            return (table.Columns if table is not None else ()), 'Name'
+        raise KeyError('{} is not among {}'.format(kind, ', '.join(KINDS)))
+
+    def _build(self, kind, parent):
+        """Builds name map of kind, the first item of a name wins"""
+        items, attribute = self._items(kind, parent)
+        mapping = {}
+        names = []
+        for item in items:
+            name = getattr(item, attribute)
+            names.append(name)
+            mapping.setdefault(name, item)
+        LOGGER.debug('Indexed %i %s', len(names), kind)
+        key = (kind, parent)
+        self._maps[key] = mapping
+        self._names[key] = names
+        self._counts[key] = len(names)
+        return mapping
+
+    def _mapping(self, kind, parent):
+        """Returns name map of kind, built if missing or if the document has
+           another number of objects of kind, and True if just built"""
+        key = (kind, parent)
+        mapping = self._maps.get(key)
+        if (mapping is None or
+                self._counts[key] != len(self._items(kind, parent)[0])):
+            return self._build(kind, parent), True
+        return mapping, False
+
+    def _may_have(self, kind, name, parent):
+        """Returns False if the document has no object of kind with name,
+           True if it has or cannot tell without reading all"""
+        if kind == 'tables':
+            return self.doc.Data.Tables.Contains(name)
+        if kind == 'columns':
+            table = self.table(parent)
+            return table is not None and table.Columns.Contains(name)
+        return True
+
+    def find(self, kind, name, parent=None):
+        """Looks up object by name
+        args:
+        kind (str): one of KINDS
+        name (str): name of object, title for pages and visuals
+        parent (str or None): page title for visuals, table name for columns
+        returns: spotfire object or None if not found
+        """
+        mapping, built = self._mapping(kind, parent)
+        item = mapping.get(name)
+        if item is None:
+            if not built and self._may_have(kind, name, parent):
+                # Added or renamed outside the helpers
+                item = self._build(kind, parent).get(name)
+            return item
+        attribute = 'Title' if kind in ('pages', 'visuals') else 'Name'
+        if getattr(item, attribute) != name:
+            # Renamed outside the helpers
+            item = self._build(kind, parent).get(name)
+        return item
+
+    def names(self, kind, parent=None):
+        """Returns names of objects of kind, in document order
+        args:
+        kind (str): one of KINDS
+        parent (str or None): page title for visuals, table name for columns
+        returns names (list of str): a copy, safe to change
+        """
+        key = (kind, parent)
+        self._mapping(kind, parent)
+        if key not in self._names:
+            self._build(kind, parent)
+        return list(self._names[key])
+
+    def table(self, name):
+        """Returns table with name or None"""
+        return self.find('tables', name)
+
+    def page(self, title):
+        """Returns page with title or None"""
+        return self.find('pages', title)
+
+    def visual(self, page_title, title):
+        """Returns visual with title on page or None"""
+        return self.find('visuals', title, page_title)
+
+    def column(self, table_name, name):
+        """Returns column with name in table or None"""
+        return self.find('columns', name, table_name)
+
+    def add(self, kind, name, item, parent=None):
+        """Registers a new object, only if the map is already built
+        args:
+        kind (str): one of KINDS
+        name (str): name of object
+        item (spotfire object): object added to the document
+        parent (str or None): page title for visuals, table name for columns
+        """
+        key = (kind, parent)
+        if key in self._maps:
+            self._maps[key].setdefault(name, item)
+            self._counts[key] += 1
+        if key in self._names:
+            self._names[key].append(name)
+
+    def remove(self, kind, name, parent=None):
+        """Unregisters object removed from the document
+        args:
+        kind (str): one of KINDS
+        name (str): name of object
+        parent (str or None): page title for visuals, table name for columns
+        """
+        key = (kind, parent)
+        mapping = self._maps.get(key)
+        if mapping is not None:
+            if len(mapping) < self._counts[key]:
+                # Names are repeated, another object may have the name
+                self.invalidate(kind, parent)
+            else:
+                mapping.pop(name, None)
+                self._counts[key] -= 1
+        # Names are rebuilt on next use, removing from the list is linear
+        self._names.pop(key, None)
+        if kind == 'tables':
+            self.invalidate('columns', name)
+        elif kind == 'pages':
+            self.invalidate('visuals', name)
+
+    def invalidate(self, kind=None, parent=None):
+        """Drops maps, they are rebuilt on the next lookup
+        args:
+        kind (str or None): one of KINDS, None drops everything
+        parent (str or None): page title for visuals, table name for
+                              columns, None drops all of kind
+        """
+        for key in list(self._maps):
+            if kind is None or (key[0] == kind and
+                                (parent is None or key[1] == parent)):
+                del self._maps[key]
+                self._names.pop(key, None)
+                del self._counts[key]
@@ -0,0 +1,181 @@
+"""Author dbs: downsampling of lines for plotting, Largest Triangle Three
+Buckets or min and max per bucket, so that a chart of many dense lines
+keeps its shape with a fraction of the points"""
+from collections import OrderedDict
+from datetime import date, datetime
+from datatypes import python_value
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+METHODS = ('lttb', 'minmax')
+POINTS = 1000
+
+
+def x_position(value):
+    """Returns x value as number, dates and times as days
+    args:
+    value (number, date or datetime): x value
+    returns number (float)
+    """
+    if isinstance(value, datetime):
+        return (value.toordinal() + (value.hour * 3600 + value.minute * 60 +
+                                     value.second) / 86400.0)
+    if isinstance(value, date):
+        return float(value.toordinal())
+    return float(value)
+
+
+def lttb_indices(xs, ys, points):
+    """Returns indices of the points kept by Largest Triangle Three
+       Buckets, the first, the last, and in each bucket between the point
+       making the largest triangle with the point kept before and the
+       mean of the next bucket
+    args:
+    xs (list of numbers): x values, ascending
+    ys (list of numbers): y values
+    points (int): number of points to keep, at least 3
+    returns indices (list of int): ascending
+    """
+    count = len(xs)
+    if points >= count or points < 3:
+        return list(range(count))
+    width = (count - 2) / float(points - 2)
+    kept = [0]
+    previous = 0
+    for bucket in range(points - 2):
+        start = int(bucket * width) + 1
+        end = int((bucket + 1) * width) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * width) + 1, count)
+        span = float(next_end - next_start)
+        mean_x = sum(xs[next_start:next_end]) / span
+        mean_y = sum(ys[next_start:next_end]) / span
+        previous_x = xs[previous]
+        previous_y = ys[previous]
+        largest = -1.0
+        chosen = start
+        for index in range(start, end):
+            # Twice the area, the half does not change which is largest
+            area = abs((previous_x - mean_x) * (ys[index] - previous_y) -
+                       (previous_x - xs[index]) * (mean_y - previous_y))
+            if area > largest:
+                largest = area
+                chosen = index
+        kept.append(chosen)
+        previous = chosen
+    kept.append(count - 1)
+    return kept
+
+
+def minmax_indices(xs, ys, points):
+    """Returns indices of the first, last, smallest and largest point in
+       each of points / 4 buckets of even width in x, like the pixel
+       columns of a chart
+    args:
+    xs (list of numbers): x values, ascending
+    ys (list of numbers): y values
+    points (int): about the largest number of points to keep
+    returns indices (list of int): ascending
+    """
+    count = len(xs)
+    buckets = max(points // 4, 1)
+    if points >= count:
+        return list(range(count))
+    low = xs[0]
+    width = (xs[-1] - low) / buckets or 1.0
+    kept = []
+    current = None
+    for index in range(count):
+        bucket = min(int((xs[index] - low) / width), buckets - 1)
+        if bucket != current:
+            if current is not None:
+                kept.extend(sorted(set([first, smallest, largest, index - 1])))
+            current = bucket
+            first = smallest = largest = index
+        elif ys[index] < ys[smallest]:
+            smallest = index
+        elif ys[index] > ys[largest]:
+            largest = index
+    kept.extend(sorted(set([first, smallest, largest, count - 1])))
+    return kept
+
+
+INDICES = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+
+def check_method(method):
+    """Checks that method is known
+    args:
+    method (str): name of downsampling method
+    raises: KeyError: if method is not among METHODS
+    """
+    if method not in INDICES:
+        raise KeyError('{} is not a downsampling method, choose among '
+                       '{}'.format(method, ', '.join(METHODS)))
+
+
+def group_lines(rows, key_count):
+    """Groups rows by their first values into lines, in one pass, rows with
+       missing x are left out
+    args:
+    rows (iterable of lists): keys, x value and y values, can be a
+                              generator
+    key_count (int): number of key values first in each row
+    returns groups (OrderedDict): list of rows, x and y values, by tuple
+                                  of keys, in the order first seen
+    """
+    groups = OrderedDict()
+    row_count = 0
+    for row in rows:
+        row_count += 1
+        if row[key_count] is None:
+            continue
+        key = tuple(row[:key_count])
+        lines = groups.get(key)
+        if lines is None:
+            lines = groups[key] = []
+        lines.append(row[key_count:])
+    LOGGER.debug('Grouped %i rows in %i lines', row_count, len(groups))
+    return groups
+
+
+def _kept(xs, line, points, method):
+    """Returns indices of the points kept in line, the union of those kept
+       for each y column"""
+    kept = set()
+    for column in range(1, len(line[0])):
+        indices = [index for index, values in enumerate(line)
+                   if values[column] is not None]
+        kept_here = INDICES[method]([xs[index] for index in indices],
+                                    [line[index][column] for index in indices],
+                                    points)
+        kept.update(indices[index] for index in kept_here)
+    return sorted(kept)
+
+
+def downsampled_rows(groups, points=POINTS, method='lttb'):
+    """Yields rows of the points kept in each line, keys, x and y values,
+       by line and ascending x
+    args:
+    groups (dict): list of rows, x and y values, by tuple of keys, from
+                   group_lines
+    points (int): number of points to keep per line and y column
+    method (str): among METHODS
+    returns: generator of lists
+    """
+    check_method(method)
+    row_count = 0
+    kept_count = 0
+    for key, line in groups.items():
+        positions = [x_position(python_value(values[0])) for values in line]
+        order = sorted(range(len(line)), key=positions.__getitem__)
+        xs = [positions[index] for index in order]
+        line = [line[index] for index in order]
+        row_count += len(line)
+        kept = _kept(xs, line, points, method)
+        kept_count += len(kept)
+        key = list(key)
+        for index in kept:
+            yield key + list(line[index])
+    LOGGER.debug('Kept %i of %i points', kept_count, row_count)
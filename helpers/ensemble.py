@@ -0,0 +1,165 @@
+"""Author dbs: loading of ensembles, one csv file per realization found by
+glob and read by a pool of threads, concatenated with REAL and ITER columns
+over the union of their columns. IronPython threads have no global lock,
+so the files are parsed in parallel"""
+import glob
+import re
+import threading
+from collections import OrderedDict
+from basic import init_logging
+import csvfiles
+
+LOGGER = init_logging(__name__)
+
+WORKERS = 8
+# Columns added, the columns of files with the same names are left out
+KEY_NAMES = ('REAL', 'ITER')
+REALIZATION_PATTERN = re.compile(r'realization-(\d+)')
+ITERATION_PATTERN = re.compile(r'(iter-\d+|pred)')
+
+
+class Realization(object):
+
+    """Columns and rows of the file of one realization"""
+
+    __slots__ = ('real', 'iteration', 'file_path', 'names', 'rows')
+
+    def __init__(self, real, iteration, file_path):
+        """
+        args:
+        real (int): number of realization
+        iteration (str or None): name of iteration, like iter-0
+        file_path (str): path of file
+        """
+        self.real = real
+        self.iteration = iteration
+        self.file_path = file_path
+        self.names = None
+        self.rows = None
+
+
+def find_realizations(file_pattern):
+    """Returns realizations of the files matching a glob, sorted by
+       iteration and realization, files outside realization-N left out
+    args:
+    file_pattern (str): glob, like ens/realization-*/iter-0/share/results/
+                        tables/unsmry--monthly.csv
+    returns realizations (list of Realization)
+    """
+    realizations = []
+    for file_path in glob.glob(file_pattern):
+        real_match = REALIZATION_PATTERN.search(file_path)
+        if real_match is None:
+            LOGGER.warning('No realization in %s, left out', file_path)
+            continue
+        iteration_match = ITERATION_PATTERN.search(file_path,
+                                                   real_match.end())
+        iteration = (iteration_match.group(1) if iteration_match is not None
+                     else None)
+        realizations.append(Realization(int(real_match.group(1)), iteration,
+                                        file_path))
+    realizations.sort(key=lambda realization: (realization.iteration or '',
+                                               realization.real))
+    LOGGER.debug('Found %i realizations for %s', len(realizations),
+                 file_pattern)
+    return realizations
+
+
+def parallel_map(function, items, workers=WORKERS):
+    """Calls function on each item in a pool of threads
+    args:
+    function (callable): function of one item
+    items (list): items to call function on
+    workers (int): number of threads
+    returns results (list): in order of items
+    raises: the first exception raised by a call, after all calls end
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+    positions = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                position = next(positions, None)
+            if position is None or errors:
+                return
+            try:
+                results[position] = function(items[position])
+            except Exception as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=work)
+               for _ in range(max(1, min(workers, len(items))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def read_realization(realization, column_names=None, pattern=None,
+                     vectors=None, delimiter=','):
+    """Reads the columns selected of the file of a realization, names in
+       column_names not in the file are left out
+    args:
+    realization (Realization): realization to read, names and rows set
+    column_names, pattern, vectors: see csvfiles.selected_indices
+    delimiter (str): separator of values
+    returns realization (Realization)
+    """
+    header = csvfiles.read_header(realization.file_path, delimiter)
+    if column_names is not None:
+        present = set(header)
+        column_names = [name for name in column_names if name in present]
+    indices = csvfiles.selected_indices(header, column_names, pattern,
+                                        vectors)
+    realization.names = [header[index] for index in indices]
+    realization.rows = list(csvfiles.projected_rows(realization.file_path,
+                                                    indices, delimiter))
+    return realization
+
+
+def union_names(realizations):
+    """Returns names of the columns of any realization, in order first seen,
+       except KEY_NAMES
+    args:
+    realizations (list of Realization): realizations read
+    returns names (list of str)
+    """
+    names = OrderedDict()
+    for realization in realizations:
+        for name in realization.names:
+            names[name] = None
+    return [name for name in names if name not in KEY_NAMES]
+
+
+def ensemble_rows(realizations, names):
+    """Yields rows of all realizations, REAL, ITER and the columns of names,
+       empty for columns a realization does not have. The rows of each
+       realization are released once yielded
+    args:
+    realizations (list of Realization): realizations read
+    names (list of str): names of columns, from union_names
+    returns: generator of lists
+    """
+    for realization in realizations:
+        positions = dict((name, index)
+                         for index, name in enumerate(realization.names))
+        order = [positions.get(name) for name in names]
+        keys = [realization.real, realization.iteration]
+        if None in order:
+            for row in realization.rows:
+                yield keys + [row[index] if index is not None else ''
+                              for index in order]
+        elif realization.names == names:
+            for row in realization.rows:
+                yield keys + row
+        else:
+            for row in realization.rows:
+                yield keys + [row[index] for index in order]
+        realization.rows = None
@@ -0,0 +1,203 @@
+"""Author dbs: building of spotfire axis expressions from a small tree of
+column references, function calls, categories and lists, rendered in one
+pass and remembered by input"""
+from collections import OrderedDict, namedtuple
+from basic import init_logging
+from datatypes import STRING_TYPES
+
+LOGGER = init_logging(__name__)
+
+# Expressions by node, and by names and functions of axis_expression
+MAX_CACHED = 256
+_CACHE = OrderedDict()
+_AXIS_CACHE = OrderedDict()
+
+
+class _Node(tuple):
+
+    """Expression node, equal only to nodes of the same type, so that
+       <[A]> and [A] are remembered apart"""
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self).__name__, tuple.__hash__(self)))
+
+
+class Column(_Node, namedtuple('Column', ['name'])):
+
+    """Column reference, like [FOPT]"""
+
+    __slots__ = ()
+
+
+class Call(_Node, namedtuple('Call', ['function', 'arguments'])):
+
+    """Function call, like Avg([FOPT]), arguments are expressions or
+       literals, str literals are quoted"""
+
+    __slots__ = ()
+
+
+class Categorical(_Node, namedtuple('Categorical', ['items'])):
+
+    """Categorical expression of nested items, like <[REAL] NEST [ITER]>"""
+
+    __slots__ = ()
+
+
+class ExpressionList(_Node, namedtuple('ExpressionList', ['items'])):
+
+    """Comma separated expressions, like Avg([FOPT]),Avg([FGPT])"""
+
+    __slots__ = ()
+
+
+def column_ref(name):
+    """Returns column reference, ] in name escaped
+    args:
+    name (str): name of column
+    returns expression (str): like [FOPT]
+    """
+    return '[{}]'.format(name.replace(']', ']]'))
+
+
+def _literal(value):
+    """Returns literal argument of a call"""
+    if isinstance(value, STRING_TYPES):
+        return '"{}"'.format(value.replace('"', '""'))
+    return '{}'.format(value)
+
+
+def _render(node, parts):
+    """Appends the text of node to parts"""
+    if isinstance(node, Column):
+        parts.append(column_ref(node.name))
+    elif isinstance(node, Call):
+        parts.append(node.function)
+        parts.append('(')
+        for position, argument in enumerate(node.arguments):
+            if position:
+                parts.append(',')
+            if isinstance(argument, _Node):
+                _render(argument, parts)
+            else:
+                parts.append(_literal(argument))
+        parts.append(')')
+    elif isinstance(node, Categorical):
+        parts.append('<')
+        for position, item in enumerate(node.items):
+            if position:
+                parts.append(' NEST ')
+            _render(item, parts)
+        parts.append('>')
+    elif isinstance(node, ExpressionList):
+        for position, item in enumerate(node.items):
+            if position:
+                parts.append(',')
+            _render(item, parts)
+    else:
+        raise TypeError('Cannot render {!r} as expression'.format(node))
+
+
+def _remember(cache, key, make):
+    """Returns expression of key from cache, made and kept if not there,
+       the least recently used is dropped beyond MAX_CACHED"""
+    expression = cache.pop(key, None)
+    if expression is None:
+        expression = make()
+        if len(cache) >= MAX_CACHED:
+            cache.popitem(last=False)
+    cache[key] = expression
+    return expression
+
+
+def _text(node):
+    """Returns expression text of node, rendered in one pass"""
+    parts = []
+    _render(node, parts)
+    expression = ''.join(parts)
+    LOGGER.debug('Rendered expression of %i characters', len(expression))
+    return expression
+
+
+def render(node):
+    """Returns expression text of node, remembered for the last MAX_CACHED
+       nodes rendered
+    args:
+    node (Column, Call, Categorical or ExpressionList): expression
+    returns expression (str)
+    """
+    return _remember(_CACHE, node, lambda: _text(node))
+
+
+def _as_names(names):
+    """Returns names as tuple, a single name as tuple of one"""
+    if isinstance(names, STRING_TYPES):
+        return (names,)
+    return tuple(names)
+
+
+def aggregate(function, name):
+    """Returns aggregation of column, plain column if function is empty
+    args:
+    function (str): name of aggregation, like Avg, or ''
+    name (str): name of column
+    returns node (Call or Column)
+    """
+    if not function:
+        return Column(name)
+    return Call(function, (Column(name),))
+
+
+def bin_by_datetime(name, levels='Year.Month', pruning=2):
+    """Returns BinByDateTime of column, like BinByDateTime([DATE],
+       "Year.Month",2)
+    args:
+    name (str): name of date or time column
+    levels (str): hierarchy levels, separated by .
+    pruning (int): level to show by default
+    returns node (Call)
+    """
+    return Call('BinByDateTime', (Column(name), levels, pruning))
+
+
+def bin_by_even_intervals(name, bins):
+    """Returns BinByEvenIntervals of column
+    args:
+    name (str): name of column
+    bins (int): number of intervals
+    returns node (Call)
+    """
+    return Call('BinByEvenIntervals', (Column(name), int(bins)))
+
+
+def categorical(*items):
+    """Returns categorical expression of items nested, column names or
+       expressions
+    returns node (Categorical)
+    """
+    return Categorical(tuple(item if isinstance(item, _Node)
+                             else Column(item) for item in items))
+
+
+def axis_expression(names, functions=('',)):
+    """Returns expression with every column aggregated by every function,
+       by function then column, like Avg([FOPT]),Avg([FGPT]),Max([FOPT])
+    args:
+    names (str or list of str): names of columns
+    functions (str or list of str): names of aggregations, '' for the
+                                    columns as they are
+    returns expression (str)
+    """
+    names = _as_names(names)
+    functions = _as_names(functions) or ('',)
+    return _remember(_AXIS_CACHE, (names, functions), lambda: _text(
+        ExpressionList(tuple(aggregate(function, name)
+                             for function in functions for name in names))))
@@ -0,0 +1,197 @@
+"""Author dbs: opt in timing and call counts of the helper functions, with
+rows and columns processed and time blocked in dialogs. Off by default,
+then an instrumented call costs one extra function call"""
+import inspect
+import time
+from functools import wraps
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+_STATE = {'enabled': False}
+
+# Stats by qualified function name, and the stats of the calls running
+_STATS = {}
+_ACTIVE = []
+
+HEADER = ['Function', 'Calls', 'Seconds', 'Milliseconds per call',
+          'Blocked seconds', 'Rows', 'Columns']
+
+
+class Stats(object):
+
+    """Statistics of one function, times include the functions it calls"""
+
+    __slots__ = ('name', 'calls', 'seconds', 'blocked', 'rows', 'columns')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.blocked = 0.0
+        self.rows = 0
+        self.columns = 0
+
+    def row(self):
+        """Returns statistics as row of HEADER"""
+        per_call = 1000.0 * self.seconds / self.calls if self.calls else 0.0
+        return [self.name, self.calls, self.seconds, per_call, self.blocked,
+                self.rows, self.columns]
+
+
+def enable(clear=True):
+    """Starts instrumentation
+    args:
+    clear (bool): forgets statistics collected before if True
+    """
+    if clear:
+        reset()
+    _STATE['enabled'] = True
+    LOGGER.debug('Instrumentation enabled')
+
+
+def disable():
+    """Stops instrumentation, statistics are kept"""
+    _STATE['enabled'] = False
+    LOGGER.debug('Instrumentation disabled')
+
+
+def is_enabled():
+    """Returns True if instrumentation is on"""
+    return _STATE['enabled']
+
+
+def reset():
+    """Forgets collected statistics"""
+    _STATS.clear()
+
+
+def _call(name, function, args, kwargs):
+    """Calls function, recording time and count"""
+    stats = _STATS.get(name)
+    if stats is None:
+        stats = _STATS[name] = Stats(name)
+    stats.calls += 1
+    _ACTIVE.append(stats)
+    start = _timer()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        stats.seconds += _timer() - start
+        _ACTIVE.pop()
+
+
+def instrumented(function, name=None):
+    """Returns function wrapped for instrumentation, for use as decorator
+    args:
+    function (callable): function to wrap
+    name (str or None): name in the statistics, module.function if None
+    returns wrapper (callable)
+    """
+    if name is None:
+        name = '{}.{}'.format(function.__module__, function.__name__)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _STATE['enabled']:
+            return function(*args, **kwargs)
+        return _call(name, function, args, kwargs)
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_functions(namespace, module_name, skip=()):
+    """Wraps the functions defined in a module, call at the end of the
+       module as instrument_functions(globals(), __name__). Generators and
+       functions already wrapped are left as they are
+    args:
+    namespace (dict): globals of the module
+    module_name (str): name of the module
+    skip (list of str): names of functions called once per row or value,
+                        left unwrapped to keep the loops fast
+    """
+    for name, value in list(namespace.items()):
+        if (name not in skip and inspect.isfunction(value) and
+                value.__module__ == module_name and
+                not inspect.isgeneratorfunction(value) and
+                not getattr(value, 'instrumented', False)):
+            namespace[name] = instrumented(value)
+
+
+def record_size(rows, columns=0):
+    """Adds rows and columns processed to the innermost instrumented call
+    args:
+    rows (int): number of rows
+    columns (int): number of columns
+    """
+    if _STATE['enabled'] and _ACTIVE:
+        stats = _ACTIVE[-1]
+        stats.rows += rows
+        stats.columns += columns
+
+
+def dialog_started():
+    """Returns start time of a dialog, None if instrumentation is off"""
+    if _STATE['enabled']:
+        return _timer()
+    return None
+
+
+def dialog_ended(start):
+    """Adds time since start to the blocked time of the running calls
+    args:
+    start (float or None): from dialog_started
+    """
+    if start is None:
+        return
+    seconds = _timer() - start
+    for stats in _ACTIVE:
+        stats.blocked += seconds
+
+
+def report_rows(sort_by='Seconds'):
+    """Returns statistics as rows of HEADER, largest first
+    args:
+    sort_by (str): name of column in HEADER to sort by
+    returns rows (list of lists)
+    """
+    position = HEADER.index(sort_by)
+    rows = [stats.row() for stats in _STATS.values()]
+    rows.sort(key=lambda row: row[position], reverse=position > 0)
+    return rows
+
+
+def write_csv(file_path, sort_by='Seconds'):
+    """Writes statistics to comma separated file
+    args:
+    file_path (str): path of file to write
+    sort_by (str): name of column in HEADER to sort by
+    """
+    import csv
+    with open(file_path, 'w') as stream:
+        writer = csv.writer(stream, lineterminator='\n')
+        writer.writerow(HEADER)
+        writer.writerows(report_rows(sort_by))
+    LOGGER.debug('Wrote statistics of %i functions to %s', len(_STATS),
+                 file_path)
+
+
+def make_report_table(doc, table_name='Instrumentation', sort_by='Seconds'):
+    """Makes spotfire table with the statistics, not itself instrumented
+    args:
+    doc (Spotfire document instance): document to make table in
+    table_name (str): name of table
+    sort_by (str): name of column in HEADER to sort by
+    """
+    from tables import make_table
+    rows = report_rows(sort_by)
+    enabled = _STATE['enabled']
+    _STATE['enabled'] = False
+    try:
+        make_table(doc, table_name, HEADER, rows,
+                   ['String', 'Integer', 'Real', 'Real', 'Real', 'Integer',
+                    'Integer'])
+    finally:
+        _STATE['enabled'] = enabled
@@ -0,0 +1,191 @@
+"""Author dbs: cached index of the key values of table rows, like REAL and
+DATE, so that appending rows to a table finds the new ones without reading
+the table again"""
+from datetime import date, datetime
+from basic import init_logging
+from columns import iter_rows
+from columns import type_name as column_type_name
+from datatypes import (STRING_TYPES, DATE_PATTERN, DATETIME_PATTERN,
+                       date_text, python_value, value_text)
+
+LOGGER = init_logging(__name__)
+
+# One index per table and key columns of the document last used, by id of
+# document, indexes of other documents are dropped so that closed
+# documents are not kept alive
+_INDEXES = {}
+
+NUMERIC_TYPES = ('Integer', 'LongInteger', 'Real', 'SingleReal')
+TEMPORAL_TYPES = ('Date', 'DateTime')
+
+
+def _parse_temporal(text):
+    """Returns date or datetime of a text like 2020-01-31 or
+       2020-01-31 12:00:00, the text as it is if it is neither"""
+    text = text.strip()
+    if DATE_PATTERN.match(text):
+        return date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+    if DATETIME_PATTERN.match(text):
+        seconds = float(text[17:]) if len(text) > 16 else 0.0
+        return datetime(int(text[:4]), int(text[5:7]), int(text[8:10]),
+                        int(text[11:13]), int(text[14:16]), int(seconds),
+                        int(round((seconds % 1) * 1e6)))
+    return text
+
+
+def key_text(value, type_name=None):
+    """Returns canonical text of a key value in the type of its column, so
+       that values read from the table and values given compare equal,
+       like .NET DateTime, date and 2020-01-01 in a Date column, or 2, 2.0
+       and '2' in a numeric column
+    args:
+    value (anything): key value
+    type_name (str or None): spotfire type name of the key column, the
+                             value is taken as it is if None
+    returns text (str): empty for missing values
+    """
+    value = python_value(value)
+    if value is None:
+        return ''
+    if type_name in TEMPORAL_TYPES:
+        if isinstance(value, STRING_TYPES):
+            value = _parse_temporal(value)
+        if isinstance(value, datetime):
+            if type_name == 'Date':
+                return date_text(value)
+        elif isinstance(value, date):
+            if type_name == 'DateTime':
+                value = datetime(value.year, value.month, value.day)
+    elif type_name in NUMERIC_TYPES and isinstance(value, STRING_TYPES):
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value_text(value)[0]
+
+
+class KeyIndex(object):
+
+    """Row index by key of the rows of a table. Keys of rows queued for
+       adding, in a batch, are registered at once, so that later appends
+       see them. The index is valid as long as the table has the rows it
+       had when last built, plus those added through it, else it is built
+       again
+    """
+
+    def __init__(self, key_names):
+        """
+        args:
+        key_names (tuple of str): names of key columns
+        """
+        self.key_names = key_names
+        self.type_names = (None,) * len(key_names)
+        self.rows = {}
+        self.row_count = -1
+        self.queued = 0
+
+    def is_current(self, table):
+        """Returns True if table has as many rows as indexed, not counting
+           rows queued"""
+        return table.RowCount == self.row_count
+
+    def row_key(self, row, positions):
+        """Returns key of a row, in the types of the key columns
+        args:
+        row (list): values of row
+        positions (list of int): positions of the key columns in row
+        returns key (tuple of str)
+        """
+        return tuple(key_text(row[position], type_name)
+                     for position, type_name in zip(positions,
+                                                    self.type_names))
+
+    def build(self, table):
+        """Reads the keys of the rows of table, in one pass
+        args:
+        table (Spotfire.Dxp.Data.DataTable): table to index
+        """
+        self.type_names = tuple(column_type_name(table.Columns[name])
+                                for name in self.key_names)
+        positions = list(range(len(self.key_names)))
+        rows = {}
+        for index, values in iter_rows(table, self.key_names):
+            rows[self.row_key(values, positions)] = index
+        self.rows = rows
+        self.row_count = table.RowCount
+        self.queued = 0
+        LOGGER.debug('Indexed %i keys of %i rows of %s', len(rows),
+                     self.row_count, table.Name)
+
+    def queue(self, keys):
+        """Registers keys of rows to be added at the end of the table
+        args:
+        keys (list of tuples): keys of rows to add, in order
+        """
+        rows = self.rows
+        for key in keys:
+            rows[key] = self.row_count + self.queued
+            self.queued += 1
+
+    def added(self, table, count):
+        """Counts rows queued as added to the table, the index is built
+           again if the table does not have the rows expected
+        args:
+        table (Spotfire.Dxp.Data.DataTable): table the rows were added to
+        count (int): number of rows added
+        """
+        self.row_count += count
+        self.queued -= count
+        if table.RowCount != self.row_count or self.queued < 0:
+            LOGGER.debug('Rows of %s changed, indexing again', table.Name)
+            self.build(table)
+
+
+def key_index(doc, table, key_names):
+    """Returns key index of table, built on first call and when the table
+       has changed in number of rows
+    args:
+    doc (Spotfire document instance): document of table
+    table (Spotfire.Dxp.Data.DataTable): table to index
+    key_names (list of str): names of key columns, like REAL and DATE
+    returns index (KeyIndex)
+    """
+    key = (id(doc), table.Name, tuple(key_names))
+    entry = _INDEXES.get(key)
+    if entry is None or entry[0] is not doc:
+        for other in list(_INDEXES):
+            if _INDEXES[other][0] is not doc:
+                del _INDEXES[other]
+        entry = (doc, KeyIndex(tuple(key_names)))
+        _INDEXES[key] = entry
+    index = entry[1]
+    if not index.is_current(table):
+        index.build(table)
+    return index
+
+
+def rows_added(doc, table, key_names, count):
+    """Counts rows queued in the key index of table as added, if there is
+       an index
+    args:
+    doc (Spotfire document instance): document of table
+    table (Spotfire.Dxp.Data.DataTable): table the rows were added to
+    key_names (list of str): names of key columns
+    count (int): number of rows added
+    """
+    entry = _INDEXES.get((id(doc), table.Name, tuple(key_names)))
+    if entry is not None and entry[0] is doc:
+        entry[1].added(table, count)
+
+
+def drop_key_indexes(doc, table_name=None):
+    """Forgets key indexes of a document
+    args:
+    doc (Spotfire document instance): document indexed
+    table_name (str or None): name of table, all tables if None
+    """
+    for key in list(_INDEXES):
+        if key[0] == id(doc) and table_name in (None, key[1]):
+            del _INDEXES[key]
@@ -0,0 +1,98 @@
+"""Author dbs: lazy loading, .NET assemblies referenced and spotfire types
+resolved once, and helper modules imported on first use"""
+import sys
+from importlib import import_module
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+# Assemblies referenced, and types by namespace and name
+_REFERENCES = set()
+_TYPES = {}
+
+
+def add_reference(assembly):
+    """Adds reference to .NET assembly, once
+    args:
+    assembly (str): name of assembly, like System.Windows.Forms
+    """
+    if assembly not in _REFERENCES:
+        import clr
+        clr.AddReference(assembly)
+        _REFERENCES.add(assembly)
+        LOGGER.debug('Referenced %s', assembly)
+
+
+def load_type(namespace, name, assembly=None):
+    """Returns type, or other member, of a .NET namespace, resolved once
+    args:
+    namespace (str): namespace, like Spotfire.Dxp.Data
+    name (str): name in namespace, like DataValueCursor
+    assembly (str or None): assembly to reference first, if needed
+    returns: the type
+    raises: ImportError: if namespace or name is not found
+    """
+    key = (namespace, name)
+    loaded = _TYPES.get(key)
+    if loaded is None:
+        if assembly is not None:
+            add_reference(assembly)
+        module = import_module(namespace)
+        try:
+            loaded = getattr(module, name)
+        except AttributeError:
+            raise ImportError('No {} in {}'.format(name, namespace))
+        _TYPES[key] = loaded
+    return loaded
+
+
+def load_types(namespace, names, assembly=None):
+    """Returns types of a namespace, resolved once
+    args:
+    namespace (str): namespace, like Spotfire.Dxp.Data.Import
+    names (list of str): names in namespace
+    assembly (str or None): assembly to reference first, if needed
+    returns: list of the types, in order of names
+    """
+    return [load_type(namespace, name, assembly) for name in names]
+
+
+class LazyModule(object):
+
+    """Module imported on first attribute access, so that importing a
+       helper module does not import every module it may need
+    """
+
+    def __init__(self, name):
+        """
+        args:
+        name (str): name of module
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'lazy'
+        return '<{} module {}>'.format(state, self.__dict__['_name'])
+
+
+def lazy_import(name):
+    """Returns module, or a stand in importing it on first use
+    args:
+    name (str): name of module
+    returns module (module or LazyModule)
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -1,6 +1,10 @@
 import re
-from basic import init_logging, list_string
+from basic import init_logging, list_string, Short
 from boxes import deletion_message, yes_no_message, announce_no_data
+from boxes import no_deletion
+from docindex import get_index
+from batch import queue_mutation
+from instrument import instrument_functions
 
 LOGGER = init_logging(__name__)
 
@@ -23,41 +27,52 @@ def get_page_names(doc):
 
     """
 
-    names = []
-    LOGGER.debug('Looping through pages')
-    for page in doc_pages(doc):
-        page_name = page.Title
-        names.append(page_name)
-
-        LOGGER.debug('Returning table name %s', page_name)
-    LOGGER.debug(names)
+    names = get_index(doc).names('pages')
+    LOGGER.debug('Pages %s', Short(names))
 
     return names
 
 
+def _remove_pages(doc, page_names):
+    """Removes pages from document, without asking
+    args:
+    doc (Spotfire document instance): document to read from
+    page_names (list of strings): names of pages to delete
+    """
+    pages = doc_pages(doc)
+    index = get_index(doc)
+    page_names = set(page_names)
+    for page in list(pages):
+        page_name = page.Title
+        if page_name in page_names:
+            pages.Remove(page)
+            index.remove('pages', page_name)
+            LOGGER.debug('%s deleted', page_name)
+
+
 def delete_pages(doc, page_names):
     """Deletes pages in document from a list
     args:
     doc (Spotfire document instance): document to read from
     page_names (list of strings): names of pages to delete
     """
-    LOGGER.debug('About to delete pages')
-    LOGGER.debug(page_names)
+    LOGGER.debug('About to delete pages %s', Short(page_names))
     if page_names:
         if type(page_names) == str:
             page_list = []
             page_list.append(page_names)
             page_names = page_list
-        LOGGER.debug('Passed conversion')
-        LOGGER.debug(page_names)
+        description = 'Delete pages {}'.format(list_string(page_names))
+        if queue_mutation(doc, 'delete_pages', description, _remove_pages,
+                          doc, page_names,
+                          targets=[('pages', name) for name in page_names]):
+            LOGGER.debug('Queued: %s', description)
+            return
+
         confirmation = deletion_message(page_names, 'page')
 
         if confirmation:
-            pages = doc_pages(doc)
-            for page in doc_pages(doc):
-                if page.Title in page_names:
-                    pages.Remove(page)
-                    LOGGER.debug('%s deleted'.format(page.Title))
+            _remove_pages(doc, page_names)
 
         else:
            no_deletion(page_names, 'page')
@@ -110,26 +125,41 @@ def delete_pages_search(doc, pattern, regex=False):
     delete_pages(doc, del_page_names)
 
 
+def _add_page(doc, page_name):
+    """Adds page to document, without asking
+    args:
+    doc (Spotfire document instance): document to read from
+    page_name (str): name of page to add
+    """
+    page = doc_pages(doc).AddNew(page_name)
+    get_index(doc).add('pages', page.Title, page)
+
+
 def add_page(doc, page_name, ask=False):
-    """Add page in document
+    """Add page in document, in a batch a page replacing another is added
+       with the batch, after the old page is deleted
     args:
     doc (Spotfire document instance): document to read from
     page_name (str): name of page to add
+    ask (bool): asks before replacing a page with the same name if True
     """
-    pages = doc_pages(doc)
-    page_names = get_page_names(doc)
     confirmation= True
-    if page_name in page_names and ask:
+    if ask and get_index(doc).page(page_name) is not None:
         heading = 'Overwrite page'
         message = ('You are trying to create a page, but the page name "{}"' +
                    ' exists, do you want to overwrite it? Answering no will' +
                    ' keep the page, yes will overwrite it').format(page_name)
         confirmation = yes_no_message(message, heading)
         if confirmation:
-          delete_page(doc, page_name)
+            delete_page(doc, page_name)
+            description = 'Add page {}'.format(page_name)
+            if queue_mutation(doc, 'add_pages', description, _add_page, doc,
+                              page_name, targets=[('pages', page_name)]):
+                LOGGER.debug('Queued: %s', description)
+                return
 
     if confirmation:
-        pages.AddNew(page_name)
+        _add_page(doc, page_name)
 
 
 def get_page(doc, page_name='Active', ask_create=False):
@@ -142,22 +172,14 @@ def get_page(doc, page_name='Active', ask_create=False):
               not exist
 
     """
-    pages = doc_pages(doc)
     page = None
     if page_name == 'Active':
 
         page = doc.ActivePageReference
 
     else:
-        for check_page in pages:
-            name = check_page.Title
-            LOGGER.debug('Page name: %s', name)
-            if name == page_name:
-                page = check_page
-                break
-    LOGGER.debug('Here is page so far:')
-    LOGGER.debug(page)
-    confirmation = True
+        page = get_index(doc).page(page_name)
+    LOGGER.debug('Here is page so far: %s', page)
 
     if page is None:
         LOGGER.debug(('After looking through pages, page with name:' +
@@ -171,10 +193,12 @@ def get_page(doc, page_name='Active', ask_create=False):
         else:
             confirmation = True
 
-    LOGGER.debug('Confirmation is:')
-    LOGGER.debug(confirmation)
-    if confirmation:
-        add_page(doc, page_name, False)
-        page = get_page(doc, page_name)
+        LOGGER.debug('Confirmation is: %s', confirmation)
+        if confirmation:
+            add_page(doc, page_name, False)
+            page = get_index(doc).page(page_name)
 
     return page
+
+
+instrument_functions(globals(), __name__)
@@ -1,3 +1,10 @@
+from basic import join_list
+from boxes import ok_message
+from pages import get_page
+from instrument import instrument_functions
+from loader import load_type
+
+
 def get_panel(doc, page_name, panel_type):
    """Fetches a panel on a page
    args:
@@ -83,6 +90,8 @@ def get_filter_selection(doc, page_name, group_name, filter_name):
 
     returns: item_list (list): list of items from filter
     """
+    CheckBoxFilter = load_type('Spotfire.Dxp.Application.Filters',
+                               'CheckBoxFilter')
     select_filter = get_group_filter(doc, page_name, group_name, filter_name)
     item_list = []
     checkbox_filter = select_filter.As [CheckBoxFilter]()
@@ -93,3 +102,5 @@ def get_filter_selection(doc, page_name, group_name, filter_name):
 
     return item_list
 
+
+instrument_functions(globals(), __name__)
@@ -0,0 +1,202 @@
+"""Author dbs: streaming percentiles, exact for few values and a mergeable
+KLL sketch with bounded memory for many"""
+import math
+import random
+from collections import OrderedDict
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+SKETCH_SIZE = 200
+EXACT_LIMIT = 1000
+
+# Sketches flip coins when compacting, seeded so that runs are repeatable
+_RANDOM = random.Random(7)
+
+
+def exact_percentile(sorted_values, percentile):
+    """Returns percentile with linear interpolation between closest ranks
+    args:
+    sorted_values (list): the values, sorted
+    percentile (number): between 0 and 100
+    returns value (number or None): None if there are no values
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * percentile / 100.0
+    below = int(math.floor(position))
+    above = min(below + 1, len(sorted_values) - 1)
+    fraction = position - below
+    return (sorted_values[below] * (1 - fraction) +
+            sorted_values[above] * fraction)
+
+
+class QuantileSketch(object):
+
+    """Percentiles of a stream of values. Values are kept exactly up to
+       exact_limit, then in a KLL sketch (Karnin, Lang, Liberty 2016) of
+       compactors holding values of weight 2**level, where memory is
+       bounded by about 3 times size whatever the number of values.
+    """
+
+    def __init__(self, size=SKETCH_SIZE, exact_limit=EXACT_LIMIT):
+        """
+        args:
+        size (int): accuracy of the sketch, rank error is about 1.7 / size
+        exact_limit (int): number of values kept exactly before sketching
+        """
+        self.size = size
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.exact = []
+        self.compactors = None
+        self.held = 0
+        self.max_held = 0
+
+    def _capacity(self, level):
+        """Returns capacity of compactor at level, smaller further down"""
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.size * (2.0 / 3.0) ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_held = sum(self._capacity(level)
+                            for level in range(len(self.compactors)))
+
+    def _start_sketch(self):
+        """Moves the exact values into the sketch"""
+        self.compactors = []
+        self._grow()
+        values = self.exact
+        self.exact = None
+        self.held = 0
+        for value in values:
+            self._sketch(value)
+
+    def _sketch(self, value):
+        self.compactors[0].append(value)
+        self.held += 1
+        if self.held >= self.max_held:
+            self._compress()
+
+    def _compress(self):
+        """Compacts the lowest full compactor, half its values move up"""
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                compactor.sort()
+                kept = [compactor.pop()] if len(compactor) % 2 else []
+                offset = _RANDOM.randint(0, 1)
+                self.compactors[level + 1].extend(compactor[offset::2])
+                self.compactors[level] = kept
+                self.held = sum(len(values) for values in self.compactors)
+                break
+
+    def add(self, value):
+        """Adds value, None and NaN are skipped
+        args:
+        value (number or None): value to add
+        """
+        if value is None or value != value:
+            return
+        self.count += 1
+        if self.compactors is None:
+            self.exact.append(value)
+            if len(self.exact) > self.exact_limit:
+                self._start_sketch()
+        else:
+            self._sketch(value)
+
+    def merge(self, other):
+        """Adds the values of another sketch
+        args:
+        other (QuantileSketch): sketch to merge in
+        """
+        if other.compactors is None:
+            for value in other.exact:
+                self.add(value)
+            return
+        if self.compactors is None:
+            self._start_sketch()
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, values in enumerate(other.compactors):
+            self.compactors[level].extend(values)
+        self.count += other.count
+        self.held = sum(len(values) for values in self.compactors)
+        while self.held >= self.max_held:
+            self._compress()
+
+    def percentiles(self, percentiles):
+        """Returns percentiles of the values added
+        args:
+        percentiles (list of numbers): between 0 and 100
+        returns values (list): None for each if there are no values
+        """
+        if self.compactors is None:
+            ordered = sorted(self.exact)
+            return [exact_percentile(ordered, percentile)
+                    for percentile in percentiles]
+
+        weighted = sorted((value, 2 ** level)
+                          for level, values in enumerate(self.compactors)
+                          for value in values)
+        total = float(sum(weight for _, weight in weighted))
+        results = []
+        for percentile in percentiles:
+            target = total * percentile / 100.0
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+        return results
+
+
+def percentile_names(percentiles):
+    """Returns column names like P10 of percentiles"""
+    return ['P{:g}'.format(percentile) for percentile in percentiles]
+
+
+def group_sketches(rows, key_count, size=SKETCH_SIZE,
+                   exact_limit=EXACT_LIMIT):
+    """Adds values of rows to a sketch per key and value position
+    args:
+    rows (iterable of lists): keys followed by values, can be a generator
+    key_count (int): number of key values first in each row
+    size (int): accuracy of the sketches
+    exact_limit (int): number of values kept exactly before sketching
+    returns groups (OrderedDict): list of QuantileSketch, one per value,
+                                  by tuple of keys
+    """
+    groups = OrderedDict()
+    for row in rows:
+        key = tuple(row[:key_count])
+        sketches = groups.get(key)
+        if sketches is None:
+            sketches = [QuantileSketch(size, exact_limit)
+                        for _ in row[key_count:]]
+            groups[key] = sketches
+        for sketch, value in zip(sketches, row[key_count:]):
+            sketch.add(value)
+    LOGGER.debug('Sketched %i groups', len(groups))
+    return groups
+
+
+def percentile_rows(groups, value_names, percentiles):
+    """Yields one row per key and value name, keys, value name and the
+       percentiles
+    args:
+    groups (dict): list of QuantileSketch by tuple of keys
+    value_names (list of str): names of the values sketched
+    percentiles (list of numbers): between 0 and 100
+    returns: generator of lists
+    """
+    for key, sketches in groups.items():
+        for value_name, sketch in zip(value_names, sketches):
+            yield list(key) + [value_name] + sketch.percentiles(percentiles)
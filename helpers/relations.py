@@ -0,0 +1,127 @@
+"""Author dbs: planning of relations between tables from the column names
+they share, compared with the relations the document already has"""
+import re
+from collections import OrderedDict
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+# [table].[column] = [table].[column], the table part can be left out
+_NAME = r'\[((?:[^\]]|\]\])*)\]'
+RELATION_PATTERN = re.compile(r'\s*(?:{0}\.)?{0}\s*=\s*(?:{0}\.)?{0}\s*$'.format(
+    _NAME))
+
+
+def relation_expression(first_table_name, first_col_name, second_table_name,
+                        second_col_name):
+    """Returns expression relating a column of one table to one of another
+    args:
+    first_table_name (str): name of table
+    first_col_name (str): name of column in first table
+    second_table_name (str): name of table
+    second_col_name (str): name of column in second table
+    returns expression (str): like [Summary].[DATE] = [Wells].[DATE]
+    """
+    return '[{}].[{}] = [{}].[{}]'.format(first_table_name, first_col_name,
+                                          second_table_name, second_col_name)
+
+
+def relation_key(first_table_name, first_col_name, second_table_name,
+                 second_col_name):
+    """Returns key of a relation, the same whichever table is first"""
+    return frozenset([(first_table_name, first_col_name),
+                      (second_table_name, second_col_name)])
+
+
+def existing_key(relation):
+    """Returns key of a relation of the document, None if its expression
+       is not a single column equality
+    args:
+    relation (Spotfire.Dxp.Data.DataRelation): relation to read
+    """
+    match = RELATION_PATTERN.match(relation.Expression)
+    if match is None:
+        return None
+    first_table, first_col, second_table, second_col = [
+        None if part is None else part.replace(']]', ']')
+        for part in match.groups()]
+    if first_table is None:
+        first_table = relation.LeftTable.Name
+    if second_table is None:
+        second_table = relation.RightTable.Name
+    return relation_key(first_table, first_col, second_table, second_col)
+
+
+def column_index(doc):
+    """Returns the tables of each column name, in one pass over the tables
+    args:
+    doc (Spotfire document instance): document to read from
+    returns index (OrderedDict): list of table names by column name, in
+                                 document order
+    """
+    index = OrderedDict()
+    for table in doc.Data.Tables:
+        table_name = table.Name
+        for column in table.Columns:
+            index.setdefault(column.Name, []).append(table_name)
+    return index
+
+
+def plan_relations(index, table_names, spanning=False):
+    """Proposes relations between tables over the columns they share
+    args:
+    index (dict): list of table names by column name, from column_index
+    table_names (list of str): names of the tables, the first is the base
+    spanning (bool): if False, the base table is related to the others
+                     over the columns it shares with them, if True, for
+                     every column shared, the first table with it is
+                     related to the others with it, so that all tables
+                     sharing a column are connected
+    returns relations (list of tuples): first table name, second table
+                                        name, column name, no duplicates
+    """
+    if not table_names:
+        return []
+    base = table_names[0]
+    planned = []
+    seen = set()
+    for column_name, holders in index.items():
+        if len(holders) < 2:
+            continue
+        if spanning:
+            first = holders[0]
+        elif base in holders:
+            first = base
+        else:
+            continue
+        for second in holders:
+            key = relation_key(first, column_name, second, column_name)
+            if second == first or key in seen:
+                continue
+            seen.add(key)
+            planned.append((first, second, column_name))
+    LOGGER.debug('Planned %i relations over %i columns', len(planned),
+                 len(index))
+    return planned
+
+
+def missing_relations(doc, planned):
+    """Returns the planned relations the document does not have
+    args:
+    doc (Spotfire document instance): document to compare with
+    planned (list of tuples): first table name, second table name, column
+                              name, from plan_relations
+    returns relations (list of tuples): in the order planned
+    """
+    existing = set()
+    for relation in doc.Data.Relations:
+        key = existing_key(relation)
+        if key is not None:
+            existing.add(key)
+    missing = [(first, second, column_name)
+               for first, second, column_name in planned
+               if relation_key(first, column_name, second, column_name)
+               not in existing]
+    LOGGER.debug('%i of %i planned relations exist', len(planned) -
+                 len(missing), len(planned))
+    return missing
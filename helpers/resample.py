@@ -0,0 +1,185 @@
+"""Author dbs: streaming resampling of time series to months, quarters or
+years, totals by their last value and rates by their mean, so that charts
+plot one row per period instead of one per day"""
+from collections import OrderedDict
+from datetime import date, timedelta
+from aggregate import Accumulator
+from basic import init_logging
+from datatypes import python_value
+from summary import parse_vector_name
+
+LOGGER = init_logging(__name__)
+
+FREQUENCIES = ('month', 'quarter', 'year')
+# Step values hold until the next, like totals, rates are averaged
+RULES = ('step', 'rate')
+# Date a period is labelled with, its first or its last day
+LABELS = ('start', 'end')
+
+
+def period_start(value, frequency):
+    """Returns first day of the period of a date
+    args:
+    value (date, datetime or .NET DateTime): date to resample
+    frequency (str): among FREQUENCIES
+    returns start (date)
+    """
+    value = python_value(value)
+    if frequency == 'month':
+        return date(value.year, value.month, 1)
+    if frequency == 'quarter':
+        return date(value.year, value.month - (value.month - 1) % 3, 1)
+    return date(value.year, 1, 1)
+
+
+def period_end(value, frequency):
+    """Returns last day of the period of a date
+    args:
+    value (date, datetime or .NET DateTime): date to resample
+    frequency (str): among FREQUENCIES
+    returns end (date)
+    """
+    start = period_start(value, frequency)
+    months = {'month': 1, 'quarter': 3}.get(frequency, 12)
+    month = start.month - 1 + months
+    following = date(start.year + month // 12, month % 12 + 1, 1)
+    return following - timedelta(days=1)
+
+
+PERIOD_LABELS = {'start': period_start, 'end': period_end}
+
+
+def check_frequency(frequency):
+    """Checks that frequency is known
+    args:
+    frequency (str): name of frequency
+    raises: KeyError: if frequency is not among FREQUENCIES
+    """
+    if frequency not in FREQUENCIES:
+        raise KeyError('{} is not a frequency, choose among {}'.format(
+            frequency, ', '.join(FREQUENCIES)))
+
+
+def check_label(label):
+    """Checks that label is known
+    args:
+    label (str): side of the periods to label them with
+    raises: KeyError: if label is not among LABELS
+    """
+    if label not in LABELS:
+        raise KeyError('{} is not a label, choose among {}'.format(
+            label, ', '.join(LABELS)))
+
+
+def default_rule(column_name):
+    """Returns step for summary totals, like FOPT, else rate
+    args:
+    column_name (str): name of column
+    returns rule (str): among RULES
+    """
+    record = parse_vector_name(column_name)
+    if record is not None and record.cumulative:
+        return 'step'
+    return 'rate'
+
+
+def column_rules(value_names, rules=None):
+    """Returns rule of each column
+    args:
+    value_names (list of str): names of columns to resample
+    rules (str, dict or None): rule of all columns, or rules by column
+                               name, default_rule for columns left out
+    returns rules (list of str): in order of value_names
+    raises: KeyError: if a rule is not among RULES
+    """
+    if rules is None:
+        rules = {}
+    elif not isinstance(rules, dict):
+        rules = dict((name, rules) for name in value_names)
+    chosen = [rules.get(name) or default_rule(name) for name in value_names]
+    for rule in chosen:
+        if rule not in RULES:
+            raise KeyError('{} is not a rule, choose among {}'.format(
+                rule, ', '.join(RULES)))
+    return chosen
+
+
+class Last(object):
+
+    """Value at the latest date seen, later rows win ties"""
+
+    __slots__ = ('when', 'value')
+
+    def __init__(self):
+        self.when = None
+        self.value = None
+
+    def add(self, when, value):
+        """Adds value at date, None is skipped"""
+        if value is None:
+            return
+        if self.when is None or when >= self.when:
+            self.when = when
+            self.value = value
+
+
+def group_periods(rows, key_count, frequency, rules, label='end'):
+    """Groups rows by their keys and the period of their date, in one pass
+    args:
+    rows (iterable of lists): keys, date and the values to resample, can
+                              be a generator
+    key_count (int): number of key values first in each row
+    frequency (str): among FREQUENCIES
+    rules (list of str): rule of each value, among RULES
+    label (str): among LABELS, periods are labelled with their last day
+                 if end, so that step values, like totals, are plotted at
+                 the date they were reached, or their first day if start
+    returns groups (OrderedDict): list of Last or Accumulator by tuple of
+                                  keys and period label, in the order
+                                  first seen, rows without date left out
+    """
+    groups = OrderedDict()
+    steps = [rule == 'step' for rule in rules]
+    period_label = PERIOD_LABELS[label]
+    labels = {}
+    row_count = 0
+    for row in rows:
+        row_count += 1
+        when = row[key_count]
+        if when is None:
+            continue
+        when = python_value(when)
+        period = labels.get(when)
+        if period is None:
+            period = labels[when] = period_label(when, frequency)
+        key = tuple(row[:key_count]) + (period,)
+        resamplers = groups.get(key)
+        if resamplers is None:
+            resamplers = [Last() if step else Accumulator()
+                          for step in steps]
+            groups[key] = resamplers
+        for step, resampler, value in zip(steps, resamplers,
+                                          row[key_count + 1:]):
+            if step:
+                resampler.add(when, value)
+            else:
+                resampler.add(value)
+    LOGGER.debug('Resampled %i rows to %i %s rows', row_count, len(groups),
+                 frequency)
+    return groups
+
+
+def resampled_rows(groups):
+    """Yields one row per group, keys, period label and the values
+    args:
+    groups (dict): from group_periods
+    returns: generator of lists
+    """
+    for key, resamplers in groups.items():
+        row = list(key)
+        for resampler in resamplers:
+            if isinstance(resampler, Last):
+                row.append(resampler.value)
+            else:
+                row.append(resampler.result('mean'))
+        yield row
@@ -0,0 +1,109 @@
+"""Author dbs: construction and combination of row sets (IndexSet) without
+reading the rows of the table"""
+from basic import init_logging
+from loader import load_type
+
+LOGGER = init_logging(__name__)
+
+
+def no_rows(table):
+    """Returns empty row set sized for a table
+    args:
+       table (spotfire table instance): table the rows are in
+    returns rowset (Spotfire.Dxp.Data.IndexSet)
+    """
+    IndexSet = load_type('Spotfire.Dxp.Data', 'IndexSet')
+    return IndexSet(table.RowCount, False)
+
+
+def all_rows(table):
+    """Returns row set with every row of a table
+    args:
+       table (spotfire table instance): table the rows are in
+    returns rowset (Spotfire.Dxp.Data.IndexSet)
+    """
+    IndexSet = load_type('Spotfire.Dxp.Data', 'IndexSet')
+    return IndexSet(table.RowCount, True)
+
+
+def row_range(table, start, stop):
+    """Returns row set with rows start up to, not including, stop
+    args:
+       table (spotfire table instance): table the rows are in
+       start (int): first row
+       stop (int): row after the last, limited to the number of rows
+    returns rowset (Spotfire.Dxp.Data.IndexSet)
+    """
+    rowset = no_rows(table)
+    for index in range(max(start, 0), min(stop, table.RowCount)):
+        rowset.AddIndex(index)
+    return rowset
+
+
+def from_indices(table, indices):
+    """Returns row set from python row indices
+    args:
+       table (spotfire table instance): table the rows are in
+       indices (iterable of int): indices, like list or array.array
+    returns rowset (Spotfire.Dxp.Data.IndexSet)
+    raises: IndexError: if an index is outside the table
+    """
+    rowset = no_rows(table)
+    count = table.RowCount
+    add = rowset.AddIndex
+    for index in indices:
+        if not 0 <= index < count:
+            raise IndexError('Row {} not in table {} with {} rows'.format(
+                index, table.Name, count))
+        add(index)
+    return rowset
+
+
+def copy_rows(table, rowset):
+    """Returns copy of row set
+    args:
+       table (spotfire table instance): table the rows are in
+       rowset (Spotfire.Dxp.Data.IndexSet): rows to copy
+    returns rowset (Spotfire.Dxp.Data.IndexSet)
+    """
+    copied = no_rows(table)
+    copied.Or(rowset)
+    return copied
+
+
+def complement(table, rowset):
+    """Returns the rows not in row set
+    args:
+       table (spotfire table instance): table the rows are in
+       rowset (Spotfire.Dxp.Data.IndexSet): rows to leave out
+    returns rowset (Spotfire.Dxp.Data.IndexSet): a new set
+    """
+    result = copy_rows(table, rowset)
+    result.Not()
+    return result
+
+
+def union(table, *rowsets):
+    """Returns the rows in any of the row sets
+    args:
+       table (spotfire table instance): table the rows are in
+       rowsets (Spotfire.Dxp.Data.IndexSet): sets to combine
+    returns rowset (Spotfire.Dxp.Data.IndexSet): a new set
+    """
+    result = no_rows(table)
+    for rowset in rowsets:
+        result.Or(rowset)
+    return result
+
+
+def intersection(table, *rowsets):
+    """Returns the rows in all of the row sets
+    args:
+       table (spotfire table instance): table the rows are in
+       rowsets (Spotfire.Dxp.Data.IndexSet): sets to combine
+    returns rowset (Spotfire.Dxp.Data.IndexSet): a new set
+    """
+    result = all_rows(table)
+    for rowset in rowsets:
+        result.And(rowset)
+    return result
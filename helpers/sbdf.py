@@ -0,0 +1,570 @@
+"""Author dbs: pure python reading and writing of Spotfire Binary Data Format
+(sbdf, version 1.0), so that tables can be imported column by column
+without spotfire having to parse text"""
+import struct
+import sys
+from array import array
+from datetime import date, datetime, time, timedelta
+
+from basic import init_logging
+from datatypes import STRING_TYPES, infer_type, python_value
+from loader import load_types
+
+LOGGER = init_logging(__name__)
+
+SLICE_ROWS = 50000
+
+MAGIC = (0xdf, 0x5b)
+VERSION = (1, 0)
+
+# Section ids
+FILE_HEADER = 0x1
+TABLE_METADATA = 0x2
+TABLE_SLICE = 0x3
+COLUMN_SLICE = 0x4
+TABLE_END = 0x5
+
+# Value array encodings
+PLAIN_ENCODING = 0x1
+RUN_LENGTH_ENCODING = 0x2
+BIT_ARRAY_ENCODING = 0x3
+
+# Value type ids by spotfire type name
+VALUE_TYPES = {'Boolean': 0x1, 'Integer': 0x2, 'LongInteger': 0x3,
+               'SingleReal': 0x4, 'Real': 0x5, 'DateTime': 0x6,
+               'Date': 0x7, 'Time': 0x8, 'TimeSpan': 0x9, 'String': 0xa,
+               'Binary': 0xc}
+TYPE_NAMES = dict((type_id, name) for name, type_id in VALUE_TYPES.items())
+
+# struct format of the fixed size value types
+FIXED_FORMATS = {'Boolean': 'B', 'Integer': 'i', 'LongInteger': 'q',
+                 'SingleReal': 'f', 'Real': 'd', 'DateTime': 'q',
+                 'Date': 'q', 'Time': 'q', 'TimeSpan': 'q'}
+
+# Type of array.array columns by typecode
+ARRAY_TYPES = {'b': 'Integer', 'B': 'Integer', 'h': 'Integer',
+               'H': 'Integer', 'i': 'Integer', 'I': 'LongInteger',
+               'l': 'LongInteger', 'L': 'LongInteger', 'q': 'LongInteger',
+               'f': 'SingleReal', 'd': 'Real'}
+
+# Values written in place of missing ones, these are flagged as invalid
+DEFAULT_VALUES = {'Boolean': False, 'Integer': 0, 'LongInteger': 0,
+                  'SingleReal': 0.0, 'Real': 0.0, 'DateTime': 0, 'Date': 0,
+                  'Time': 0, 'TimeSpan': 0, 'String': u'', 'Binary': b''}
+
+INVALID_PROPERTY = 'IsInvalid'
+
+MS_PER_DAY = 86400000
+BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def _date_ms(value):
+    """Returns milliseconds since 0001-01-01 for a date or datetime
+    args:
+    value (datetime.date or datetime.datetime): value to convert
+    returns ms (int)
+    """
+    ms = (value.toordinal() - 1) * MS_PER_DAY
+    if isinstance(value, datetime):
+        ms += ((value.hour * 3600 + value.minute * 60 + value.second) * 1000 +
+               value.microsecond // 1000)
+    return ms
+
+
+def _ms_datetime(ms):
+    """Returns datetime from milliseconds since 0001-01-01
+    args:
+    ms (int): milliseconds
+    returns value (datetime.datetime)
+    """
+    days, ms = divmod(ms, MS_PER_DAY)
+    return datetime.fromordinal(days + 1) + timedelta(milliseconds=ms)
+
+
+def _parse_datetime(text):
+    """Parses yyyy-MM-dd with optional HH:mm[:ss[.fff]], T or space between
+    args:
+    text (str): text to parse
+    returns value (datetime.datetime)
+    raises: ValueError: if text is not on the format
+    """
+    text = text.strip().replace('T', ' ')
+    for text_format in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S',
+                        '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text, text_format)
+        except ValueError:
+            pass
+    raise ValueError('Cannot read {} as date or time'.format(text))
+
+
+def _to_date(value):
+    """Converts value to date"""
+    value = python_value(value)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_datetime(value).date()
+
+
+def _to_datetime(value):
+    """Converts value to datetime"""
+    value = python_value(value)
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return _parse_datetime(value)
+
+
+def _to_time_ms(value):
+    """Converts time of day to milliseconds since midnight, from time, the
+       time of a datetime or .NET DateTime, .NET TimeSpan or a number of
+       milliseconds"""
+    value = python_value(value)
+    if isinstance(value, datetime):
+        value = value.time()
+    if isinstance(value, time):
+        return ((value.hour * 3600 + value.minute * 60 + value.second) * 1000
+                + value.microsecond // 1000)
+    if hasattr(value, 'TotalMilliseconds'):
+        return int(round(value.TotalMilliseconds))
+    return int(value)
+
+
+def _to_timespan_ms(value):
+    """Converts timedelta, .NET TimeSpan, or number of milliseconds, to
+       milliseconds"""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds() * 1000)
+    if hasattr(value, 'TotalMilliseconds'):
+        return int(round(value.TotalMilliseconds))
+    return int(value)
+
+
+def _to_string(value):
+    """Converts value to unicode string"""
+    if isinstance(value, STRING_TYPES):
+        return value
+    return u'{}'.format(value)
+
+
+# Converters from python values to what is written for each type
+CONVERTERS = {'Boolean': bool, 'Integer': int, 'LongInteger': int,
+              'SingleReal': float, 'Real': float,
+              'DateTime': lambda value: _date_ms(_to_datetime(value)),
+              'Date': lambda value: _date_ms(_to_date(value)),
+              'Time': _to_time_ms, 'TimeSpan': _to_timespan_ms,
+              'String': _to_string, 'Binary': bytes}
+
+# Converters from what is read back to python values
+READERS = {'Boolean': bool, 'DateTime': _ms_datetime,
+           'Date': lambda ms: _ms_datetime(ms).date(),
+           'Time': lambda ms: (datetime.min +
+                               timedelta(milliseconds=ms)).time(),
+           'TimeSpan': lambda ms: timedelta(milliseconds=ms)}
+
+
+def is_missing(value):
+    """Checks if value is missing, None, NaN or blank text
+    args:
+    value (anything): value to check
+    returns: bool
+    """
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return value != value
+    if isinstance(value, STRING_TYPES):
+        return not value.strip()
+    return False
+
+
+def _pack_7bit(number):
+    """Returns number as 7 bit encoded integer, as in .NET BinaryWriter"""
+    packed = bytearray()
+    while number >= 0x80:
+        packed.append((number & 0x7f) | 0x80)
+        number >>= 7
+    packed.append(number)
+    return bytes(packed)
+
+
+def _int8(number):
+    return struct.pack('<B', number)
+
+
+def _int32(number):
+    return struct.pack('<i', number)
+
+
+def _string(text):
+    """Returns string as int32 length and utf-8 bytes"""
+    encoded = text.encode('utf-8')
+    return _int32(len(encoded)) + encoded
+
+
+def _section(section_id):
+    return struct.pack('<BBB', MAGIC[0], MAGIC[1], section_id)
+
+
+def _packed_object(type_name, values):
+    """Returns values as sbdf object, count followed by the data
+    args:
+    type_name (str): spotfire type name of values
+    values (list or array.array): the values, already converted
+    returns: bytes
+    """
+    count = len(values)
+    if type_name in ('String', 'Binary'):
+        parts = []
+        for value in values:
+            if type_name == 'String':
+                value = value.encode('utf-8')
+            parts.append(_pack_7bit(len(value)))
+            parts.append(value)
+        data = b''.join(parts)
+        return _int32(count) + _int32(len(data)) + data
+
+    type_code = FIXED_FORMATS[type_name]
+    if isinstance(values, array) and values.typecode == type_code:
+        if BIG_ENDIAN:
+            values = array(type_code, values)
+            values.byteswap()
+        try:
+            data = values.tobytes()
+        except AttributeError:
+            data = values.tostring()
+    else:
+        data = struct.pack('<{}{}'.format(count, type_code), *values)
+    return _int32(count) + data
+
+
+def _value_array(type_name, values):
+    """Returns values as plainly encoded value array"""
+    return (_int8(PLAIN_ENCODING) + _int8(VALUE_TYPES[type_name]) +
+            _packed_object(type_name, values))
+
+
+def _bit_array(flags):
+    """Returns list of booleans as bit array encoded value array"""
+    packed = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            packed[i >> 3] |= 0x80 >> (i & 7)
+    return (_int8(BIT_ARRAY_ENCODING) + _int8(VALUE_TYPES['Boolean']) +
+            _int32(len(flags)) + bytes(packed))
+
+
+def _optional_object(type_name, value):
+    """Returns optional single value object, flag byte then the object"""
+    if value is None:
+        return _int8(0)
+    return _int8(1) + _packed_object(type_name, [value])
+
+
+def _table_metadata(column_names, type_names):
+    """Returns table metadata section with name and type of all columns"""
+    parts = [_section(TABLE_METADATA), _int32(0), _int32(len(column_names)),
+             _int32(2),
+             _string('Name'), _int8(VALUE_TYPES['String']), _int8(0),
+             _string('DataType'), _int8(VALUE_TYPES['Binary']), _int8(0)]
+    for column_name, type_name in zip(column_names, type_names):
+        parts.append(_optional_object('String', _to_string(column_name)))
+        parts.append(_optional_object('Binary',
+                                      _int8(VALUE_TYPES[type_name])))
+    return b''.join(parts)
+
+
+def _column_slice(type_name, values):
+    """Returns column slice section with values and invalid flags
+    args:
+    type_name (str): spotfire type name of column
+    values (sequence): values of the slice, missing values allowed
+    returns: bytes
+    """
+    if isinstance(values, array) and not (values.typecode in 'fd' and
+                                          any(v != v for v in values)):
+        return (_section(COLUMN_SLICE) + _value_array(type_name, values) +
+                _int32(0))
+
+    convert = CONVERTERS[type_name]
+    default = DEFAULT_VALUES[type_name]
+    converted = []
+    flags = []
+    invalid = False
+    for value in values:
+        if is_missing(value):
+            converted.append(default)
+            flags.append(True)
+            invalid = True
+        else:
+            converted.append(convert(value))
+            flags.append(False)
+
+    parts = [_section(COLUMN_SLICE), _value_array(type_name, converted)]
+    if invalid:
+        parts.extend([_int32(1), _string(INVALID_PROPERTY),
+                      _bit_array(flags)])
+    else:
+        parts.append(_int32(0))
+    return b''.join(parts)
+
+
+def write_sbdf(output, column_names, columns, column_types=None,
+               slice_rows=SLICE_ROWS):
+    """Writes columns as sbdf, one table slice at a time
+
+    args:
+    output (file like or str): object with write method, or file path
+    column_names (list of str): names of the columns
+    columns (list of sequences): values of each column, lists or
+                                 array.array, None, NaN or blank for missing
+    column_types (dict, list or None): type of columns by name or position,
+                                       among VALUE_TYPES, types not given
+                                       are inferred from the values
+    slice_rows (int): number of rows in each table slice
+
+    raises: ValueError: if columns differ in length or a type is not known
+    """
+    if isinstance(output, STRING_TYPES):
+        with open(output, 'wb') as sbdf_file:
+            write_sbdf(sbdf_file, column_names, columns, column_types,
+                       slice_rows)
+        return
+
+    column_names = list(column_names)
+    if len(column_names) != len(columns):
+        raise ValueError('{} column names for {} columns'.format(
+            len(column_names), len(columns)))
+    row_counts = set(len(column) for column in columns)
+    if len(row_counts) > 1:
+        raise ValueError('Columns are of different length')
+    row_count = row_counts.pop() if row_counts else 0
+
+    if column_types is None:
+        column_types = {}
+    elif not isinstance(column_types, dict):
+        column_types = dict(zip(column_names, column_types))
+    type_names = []
+    for column_name, column in zip(column_names, columns):
+        type_name = column_types.get(column_name)
+        if type_name is None and isinstance(column, array):
+            type_name = ARRAY_TYPES.get(column.typecode)
+        if type_name is None:
+            type_name = infer_type(column)
+        if type_name not in VALUE_TYPES:
+            raise ValueError(('{} is not a valid sbdf type, choose ' +
+                              'among {}').format(type_name,
+                                                 ', '.join(sorted(VALUE_TYPES))))
+        type_names.append(type_name)
+    LOGGER.debug('Writing %i rows with types %s', row_count, type_names)
+
+    output.write(_section(FILE_HEADER) + struct.pack('<BB', *VERSION))
+    output.write(_table_metadata(column_names, type_names))
+    for start in range(0, row_count, slice_rows):
+        parts = [_section(TABLE_SLICE), _int32(len(columns))]
+        for type_name, column in zip(type_names, columns):
+            parts.append(_column_slice(type_name,
+                                       column[start:start + slice_rows]))
+        output.write(b''.join(parts))
+    output.write(_section(TABLE_END))
+
+
+class _Reader(object):
+
+    """Reads the sbdf building blocks from a file like object"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def read(self, size):
+        data = self.source.read(size)
+        if len(data) != size:
+            raise ValueError('Unexpected end of sbdf data')
+        return data
+
+    def int8(self):
+        return struct.unpack('<B', self.read(1))[0]
+
+    def int32(self):
+        return struct.unpack('<i', self.read(4))[0]
+
+    def string(self):
+        return self.read(self.int32()).decode('utf-8')
+
+    def section(self, expected=None):
+        magic_1, magic_2, section_id = struct.unpack('<BBB', self.read(3))
+        if (magic_1, magic_2) != MAGIC:
+            raise ValueError('Not sbdf data, wrong magic number')
+        if expected is not None and section_id != expected:
+            raise ValueError('Expected sbdf section {}, got {}'.format(
+                expected, section_id))
+        return section_id
+
+    def value_type(self):
+        type_id = self.int8()
+        try:
+            return TYPE_NAMES[type_id]
+        except KeyError:
+            raise ValueError('Unsupported sbdf value type {}'.format(type_id))
+
+    def packed_object(self, type_name):
+        count = self.int32()
+        if type_name in ('String', 'Binary'):
+            data = bytearray(self.read(self.int32()))
+            values = []
+            position = 0
+            for _ in range(count):
+                length = 0
+                shift = 0
+                while True:
+                    byte = data[position]
+                    position += 1
+                    length |= (byte & 0x7f) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                value = bytes(data[position:position + length])
+                position += length
+                if type_name == 'String':
+                    value = value.decode('utf-8')
+                values.append(value)
+            return values
+
+        type_code = FIXED_FORMATS[type_name]
+        data = self.read(count * struct.calcsize('<' + type_code))
+        return list(struct.unpack('<{}{}'.format(count, type_code), data))
+
+    def optional_object(self, type_name):
+        if self.int8():
+            return self.packed_object(type_name)[0]
+        return None
+
+    def value_array(self):
+        encoding = self.int8()
+        type_name = self.value_type()
+        if encoding == PLAIN_ENCODING:
+            return self.packed_object(type_name)
+        if encoding == BIT_ARRAY_ENCODING:
+            count = self.int32()
+            packed = bytearray(self.read((count + 7) // 8))
+            return [bool(packed[i >> 3] & (0x80 >> (i & 7)))
+                    for i in range(count)]
+        raise ValueError('Unsupported sbdf value array encoding {}'.format(
+            encoding))
+
+
+def _read_metadata(reader, count):
+    """Reads metadata entries, returns them as dictionary"""
+    metadata = {}
+    for _ in range(count):
+        name = reader.string()
+        type_name = reader.value_type()
+        metadata[name] = reader.optional_object(type_name)
+        reader.optional_object(type_name)
+    return metadata
+
+
+def read_sbdf(source):
+    """Reads table written as sbdf
+
+    args:
+    source (file like or str): object with read method, or file path
+
+    returns: column_names (list of str), type_names (list of str),
+             columns (list of lists), missing values as None
+
+    raises: ValueError: if source is not sbdf or uses unsupported parts
+    """
+    if isinstance(source, STRING_TYPES):
+        with open(source, 'rb') as sbdf_file:
+            return read_sbdf(sbdf_file)
+
+    reader = _Reader(source)
+    reader.section(FILE_HEADER)
+    version = (reader.int8(), reader.int8())
+    if version != VERSION:
+        raise ValueError('Unsupported sbdf version {}.{}'.format(*version))
+
+    reader.section(TABLE_METADATA)
+    _read_metadata(reader, reader.int32())
+    column_count = reader.int32()
+    fields = []
+    for _ in range(reader.int32()):
+        name = reader.string()
+        type_name = reader.value_type()
+        reader.optional_object(type_name)
+        fields.append((name, type_name))
+
+    column_names = []
+    type_names = []
+    for _ in range(column_count):
+        metadata = dict((name, reader.optional_object(type_name))
+                        for name, type_name in fields)
+        column_names.append(metadata['Name'])
+        type_names.append(TYPE_NAMES[bytearray(metadata['DataType'])[0]])
+
+    columns = [[] for _ in range(column_count)]
+    while reader.section() == TABLE_SLICE:
+        if reader.int32() != column_count:
+            raise ValueError('Table slice does not match table metadata')
+        for type_name, column in zip(type_names, columns):
+            reader.section(COLUMN_SLICE)
+            values = reader.value_array()
+            read_value = READERS.get(type_name)
+            if read_value is not None:
+                values = [read_value(value) for value in values]
+            for _ in range(reader.int32()):
+                property_name = reader.string()
+                flags = reader.value_array()
+                if property_name == INVALID_PROPERTY:
+                    values = [None if flag else value
+                              for value, flag in zip(values, flags)]
+            column.extend(values)
+
+    return column_names, type_names, columns
+
+
+def rows_to_columns(rows, width):
+    """Turns rows into columns
+    args:
+    rows (iterable of lists): the rows
+    width (int): number of columns
+    returns columns (list of lists)
+
+    raises: ValueError: if a row is not width long
+    """
+    columns = [[] for _ in range(width)]
+    appends = [column.append for column in columns]
+    for i, row in enumerate(rows):
+        if not isinstance(row, (list, tuple)):
+            row = [row]
+        if len(row) != width:
+            raise ValueError('Row {} has {} values, expected {}'.format(
+                i, len(row), width))
+        for append, value in zip(appends, row):
+            append(value)
+    return columns
+
+
+class NetStreamOutput(object):
+
+    """File like object writing to a System.IO.Stream"""
+
+    def __init__(self, stream):
+        """
+        args:
+        stream (System.IO.Stream): stream to write to
+        """
+        self.stream = stream
+
+    def write(self, data):
+        """Writes bytes to stream
+        args:
+        data (bytes): data to write
+        """
+        Array, Byte = load_types('System', ['Array', 'Byte'])
+        buffer = Array[Byte](bytearray(data))
+        self.stream.Write(buffer, 0, buffer.Length)
@@ -0,0 +1,254 @@
+"""Author dbs: row selection from predicates on column values, the
+predicates are compiled once and evaluated in one pass over the rows"""
+import re
+from datetime import date, datetime
+from basic import init_logging
+from datatypes import python_value
+from rowsets import no_rows
+from columns import iter_rows
+
+LOGGER = init_logging(__name__)
+
+
+class Predicate(object):
+
+    """Condition on the values of a column, test is a function of the
+       value. Combine with & (and), | (or) and ~ (not), combinations read
+       all the columns of their predicates
+    """
+
+    def __init__(self, column_name, test, formatted=False, description=''):
+        """
+        args:
+        column_name (str or None): name of column, None for combinations
+        test (callable or None): function of one value, None for missing
+                                 values, None for combinations
+        formatted (bool): tests the formatted text of the values if True
+        description (str): what is tested, for logging
+        """
+        self.key = (column_name, formatted)
+        self.test = test
+        self.description = description
+
+    def columns(self):
+        """Returns the columns read, list of (column name, formatted)"""
+        return [self.key]
+
+    def compile(self, positions):
+        """Returns function of a list of row values giving True for a match
+        args:
+        positions (dict): position in the row values by column key
+        """
+        position = positions[self.key]
+        test = self.test
+        return lambda values: test(values[position])
+
+    def __and__(self, other):
+        return all_of(self, other)
+
+    def __or__(self, other):
+        return any_of(self, other)
+
+    def __invert__(self):
+        return negate(self)
+
+    def __repr__(self):
+        return '[{}] {}'.format(self.key[0], self.description)
+
+
+class _Combined(Predicate):
+
+    """Predicates combined with and, or or not"""
+
+    def __init__(self, operator, predicates):
+        """
+        args:
+        operator (str): 'and', 'or' or 'not'
+        predicates (list of Predicate): the predicates combined
+        """
+        Predicate.__init__(self, None, None, description=operator)
+        self.operator = operator
+        self.predicates = predicates
+
+    def columns(self):
+        keys = []
+        for predicate in self.predicates:
+            for key in predicate.columns():
+                if key not in keys:
+                    keys.append(key)
+        return keys
+
+    def compile(self, positions):
+        tests = [predicate.compile(positions) for predicate in self.predicates]
+        if self.operator == 'not':
+            test = tests[0]
+            return lambda values: not test(values)
+        if self.operator == 'and':
+            def all_test(values):
+                for test in tests:
+                    if not test(values):
+                        return False
+                return True
+            return all_test
+
+        def any_test(values):
+            for test in tests:
+                if test(values):
+                    return True
+            return False
+        return any_test
+
+    def __repr__(self):
+        if self.operator == 'not':
+            return 'not ({!r})'.format(self.predicates[0])
+        joiner = ' {} '.format(self.operator)
+        return '({})'.format(joiner.join(repr(predicate)
+                                          for predicate in self.predicates))
+
+
+def is_in(column_name, values, formatted=False):
+    """Matches rows where column value is among values
+    args:
+    column_name (str): name of column
+    values (iterable): values to match
+    formatted (bool): compares the values with the formatted text of the
+                      column, as shown in spotfire, if True
+    returns predicate (Predicate)
+    """
+    members = frozenset(values)
+    return Predicate(column_name, members.__contains__, formatted,
+                     'in {} values'.format(len(members)))
+
+
+def _comparable(value):
+    """Returns value in a type comparable with the limits of between, .NET
+       DateTime and date as datetime"""
+    value = python_value(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def between(column_name, low=None, high=None, inclusive=True):
+    """Matches rows where column value is within a range, dates compare
+       with the .NET DateTime values of Date and DateTime columns
+    args:
+    column_name (str): name of column
+    low (number, date or None): lower limit, None for no limit
+    high (number, date or None): upper limit, None for no limit
+    inclusive (bool): includes the limits if True
+    returns predicate (Predicate)
+    """
+    description = 'between {} and {}'.format(low, high)
+    low = _comparable(low)
+    high = _comparable(high)
+
+    def test(value):
+        if value is None:
+            return False
+        value = _comparable(value)
+        if low is not None and (value < low or
+                                (not inclusive and value == low)):
+            return False
+        if high is not None and (value > high or
+                                 (not inclusive and value == high)):
+            return False
+        return True
+    return Predicate(column_name, test, description=description)
+
+
+def matches(column_name, pattern, formatted=True):
+    """Matches rows where column text matches regular expression, from the
+       start of the text as re.match
+    args:
+    column_name (str): name of column
+    pattern (str): regular expression
+    formatted (bool): matches the formatted text of the column if True,
+                      else the text of the value
+    returns predicate (Predicate)
+    """
+    compiled = re.compile(pattern)
+
+    def test(value):
+        if value is None:
+            return False
+        return compiled.match(u'{}'.format(value)) is not None
+    return Predicate(column_name, test, formatted,
+                     'matches {}'.format(pattern))
+
+
+def is_null(column_name):
+    """Matches rows where column is empty
+    args:
+    column_name (str): name of column
+    returns predicate (Predicate)
+    """
+    return Predicate(column_name, lambda value: value is None,
+                     description='is empty')
+
+
+def not_null(column_name):
+    """Matches rows where column has a value
+    args:
+    column_name (str): name of column
+    returns predicate (Predicate)
+    """
+    return Predicate(column_name, lambda value: value is not None,
+                     description='is not empty')
+
+
+def all_of(*predicates):
+    """Matches rows matching all predicates"""
+    return _Combined('and', list(predicates))
+
+
+def any_of(*predicates):
+    """Matches rows matching any of the predicates"""
+    return _Combined('or', list(predicates))
+
+
+def negate(predicate):
+    """Matches rows not matching predicate"""
+    return _Combined('not', [predicate])
+
+
+def compile_predicate(predicate):
+    """Compiles predicate
+    args:
+    predicate (Predicate): predicate to compile
+    returns: keys (list of tuples): column name and formatted flag, in the
+             order the row values must be given,
+             test (callable): function of list of row values
+    """
+    keys = predicate.columns()
+    positions = dict((key, i) for i, key in enumerate(keys))
+    return keys, predicate.compile(positions)
+
+
+def matching_indices(test, rows):
+    """Yields the index of the rows matching
+    args:
+    test (callable): compiled predicate
+    rows (iterable of tuples): row index and list of row values
+    returns: generator of int
+    """
+    for index, values in rows:
+        if test(values):
+            yield index
+
+
+def select_rows(table, predicate, rows=None):
+    """Selects the rows of a table matching predicate, in one pass
+    args:
+    table (Spotfire.Dxp.Data.DataTable): table to select from
+    predicate (Predicate): condition rows must match
+    rows (Spotfire.Dxp.Data.IndexSet or None): rows to select among, all
+                                                rows if None
+    returns: selected (Spotfire.Dxp.Data.IndexSet)
+    """
+    keys, test = compile_predicate(predicate)
+    LOGGER.debug('Selecting rows of %s where %r', table.Name, predicate)
+    selected = no_rows(table)
+    for index in matching_indices(test, iter_rows(table, keys, rows)):
+        selected.AddIndex(index)
+    return selected
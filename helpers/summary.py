@@ -0,0 +1,159 @@
+"""Author dbs: schema of eclipse summary tables, the column names parsed
+once into vector keyword, entity and history flag"""
+import re
+from collections import OrderedDict, namedtuple
+from basic import init_logging
+
+LOGGER = init_logging(__name__)
+
+# Entity type by first letter of the keyword
+ENTITY_TYPES = {'F': 'field', 'W': 'well', 'G': 'group', 'R': 'region',
+                'B': 'block', 'C': 'connection', 'S': 'segment',
+                'A': 'aquifer'}
+OTHER = 'other'
+
+# Columns that are not vectors, dates and ensemble bookkeeping
+SKIP_PATTERN = re.compile(r'(date|time)', re.IGNORECASE)
+META_COLUMNS = frozenset(['REAL', 'ITER', 'ENSEMBLE'])
+
+# Keyword endings of production and injection totals
+CUMULATIVE_ENDINGS = ('PT', 'IT')
+
+NAME_PATTERN = re.compile(r'([^:]+)(?::(.*))?$')
+
+MAX_CACHED = 16
+_CACHE = OrderedDict()
+
+
+class VectorName(namedtuple('VectorName', ['column', 'keyword',
+                                           'entity_type', 'entity',
+                                           'history'])):
+
+    """Parsed summary column name, like WOPRH:OP_1 with keyword WOPR,
+       entity_type well, entity OP_1 and history True
+    """
+
+    __slots__ = ()
+
+    @property
+    def vector(self):
+        """Returns keyword without entity letter, like OPR, the same for
+           field, well and group vectors, keywords of other entity types
+           are returned whole
+        """
+        if self.entity_type == OTHER:
+            return self.keyword
+        return self.keyword[1:]
+
+    @property
+    def cumulative(self):
+        """Returns True for production and injection totals, like FOPT or
+           WWIT, that only grow, False for rates, ratios and pressures
+        """
+        return self.keyword.endswith(CUMULATIVE_ENDINGS)
+
+
+def parse_vector_name(column_name):
+    """Parses summary column name
+    args:
+    column_name (str): name like FOPT, WOPRH:OP_1 or BPR:10,10,5
+    returns name (VectorName or None): None for date, time and ensemble
+                                       columns
+    """
+    if column_name in META_COLUMNS or SKIP_PATTERN.match(column_name):
+        return None
+    match = NAME_PATTERN.match(column_name)
+    if match is None:
+        return None
+    keyword, entity = match.groups()
+    entity_type = ENTITY_TYPES.get(keyword[0], OTHER)
+    if entity_type == 'field' and entity is None:
+        entity = 'FIELD'
+    history = len(keyword) > 2 and keyword.endswith('H')
+    if history:
+        keyword = keyword[:-1]
+    return VectorName(column_name, keyword, entity_type, entity, history)
+
+
+class SummarySchema(object):
+
+    """Vectors and entities of a summary table, in column order without
+       duplicates
+    """
+
+    def __init__(self, column_names):
+        """
+        args:
+        column_names (list of str): names of the columns of the table
+        """
+        self.records = []
+        vectors = OrderedDict()
+        keywords = OrderedDict()
+        entities = {}
+        for column_name in column_names:
+            record = parse_vector_name(column_name)
+            if record is None:
+                continue
+            self.records.append(record)
+            vectors[record.vector] = None
+            keywords[record.keyword] = None
+            if record.entity is not None:
+                entities.setdefault(record.entity_type,
+                                    OrderedDict())[record.entity] = None
+        self.vectors = list(vectors)
+        self.keywords = list(keywords)
+        self._entities = dict((entity_type, list(names))
+                              for entity_type, names in entities.items())
+
+    def entities(self, entity_type):
+        """Returns names of entities of type, like the wells
+        args:
+        entity_type (str): among ENTITY_TYPES values, or other
+        returns names (list of str): a copy, safe to change
+        """
+        return list(self._entities.get(entity_type, ()))
+
+    @property
+    def wells(self):
+        """Returns names of the wells"""
+        return self.entities('well')
+
+    def columns(self, keyword=None, entity_type=None, entity=None,
+                history=None):
+        """Returns names of columns matching, None matches anything
+        args:
+        keyword (str or None): keyword without history H, like WOPR
+        entity_type (str or None): type of entity, like well
+        entity (str or None): name of entity, like OP_1
+        history (bool or None): history vectors if True, others if False
+        returns names (list of str)
+        """
+        return [record.column for record in self.records
+                if (keyword is None or record.keyword == keyword) and
+                (entity_type is None or record.entity_type == entity_type) and
+                (entity is None or record.entity == entity) and
+                (history is None or record.history == history)]
+
+
+def fingerprint(column_names):
+    """Returns key identifying a list of column names"""
+    return len(column_names), hash(tuple(column_names))
+
+
+def summary_schema(column_names):
+    """Returns schema of columns, cached by their fingerprint so that
+       tables with unchanged columns are parsed once
+    args:
+    column_names (list of str): names of the columns of the table
+    returns schema (SummarySchema): shared, do not change
+    """
+    key = fingerprint(column_names)
+    schema = _CACHE.pop(key, None)
+    if schema is None:
+        schema = SummarySchema(column_names)
+        LOGGER.debug('Parsed %i columns, %i vectors', len(column_names),
+                     len(schema.records))
+        if len(_CACHE) >= MAX_CACHED:
+            _CACHE.popitem(last=False)
+    _CACHE[key] = schema
+    return schema
@@ -1,19 +1,44 @@
 import re
-from basic import init_logging, list_string, controlled_list, create_line
+from itertools import chain
+from basic import init_logging, list_string, create_line
+from basic import Short
+from instrument import instrument_functions, record_size
 from basic import join_list
-from basic import get_list_entry
 from boxes import deletion_message, yes_no_message, ok_message
-from boxes import announce_no_data
+from boxes import announce_no_data, no_deletion
+from datatypes import ColumnTypes, TYPE_NAMES, python_value
+from docindex import get_index
+from batch import active_batch, batch, queue_mutation
+from selection import Predicate, is_in, select_rows
+from rowsets import all_rows, no_rows, from_indices
+from columns import iter_rows, read_columns
+from columns import type_name as column_type_name
+from relations import column_index, plan_relations, missing_relations
+from relations import relation_expression
+from loader import add_reference, lazy_import, load_type, load_types
+
+# Only needed by some of the functions, imported on first use
+aggregate = lazy_import('aggregate')
+csvfiles = lazy_import('csvfiles')
+downsample = lazy_import('downsample')
+ensemble = lazy_import('ensemble')
+keyindex = lazy_import('keyindex')
+quantiles = lazy_import('quantiles')
+resample = lazy_import('resample')
+summary = lazy_import('summary')
+sbdf = lazy_import('sbdf')
 
 LOGGER = init_logging(__name__)
 
+DATA = 'Spotfire.Dxp.Data'
+DATA_IMPORT = 'Spotfire.Dxp.Data.Import'
+
 def doc_tables(doc):
     """Gets tables from a spotfire document
     args:
     doc (Spotfire document instance): document to read from
     """
-    LOGGER.debug('Passed data type')
-    LOGGER.debug(type(doc))
+    LOGGER.debug('Passed data type %s', type(doc))
     return doc.Data.Tables
 
 
@@ -26,39 +51,50 @@ def get_table_names(doc):
         names: list of strings, names of the different tables
 
     """
-    names = []
-    LOGGER.debug('Looping through tables')
-    for table in doc_tables(doc):
-
-        names.append(table.Name)
-
+    names = get_index(doc).names('tables')
     LOGGER.debug('Returning table')
     return names
 
 
+def _remove_tables(doc, table_names):
+    """Removes tables from document, without asking
+    args:
+    doc (Spotfire document instance): document to read from
+    table_names (list of strings): names of tables to delete
+    """
+    tables = doc_tables(doc)
+    index = get_index(doc)
+    for table_name in table_names:
+        table = tables[table_name]
+        tables.Remove(table)
+        index.remove('tables', table_name)
+        LOGGER.debug('%s deleted', table_name)
+
+
 def delete_tables(doc, table_names):
     """Deletes tables in document from a list
     args:
     doc (Spotfire document instance): document to read from
     table_names (list of strings): names of tables to delete
     """
-    LOGGER.debug('About to delete tables')
-    LOGGER.debug(table_names)
+    LOGGER.debug('About to delete tables %s', Short(table_names))
     if table_names:
         if type(table_names) == str:
             table_list = []
             table_list.append(table_names)
             table_names = table_list
-        LOGGER.debug('Passed conversion')
-        LOGGER.debug(table_names)
+        description = 'Delete tables {}'.format(list_string(
+            join_list(table_names)))
+        if queue_mutation(doc, 'delete_tables', description,
+                          _remove_tables, doc, table_names,
+                          targets=[('tables', name) for name in table_names]):
+            LOGGER.debug('Queued: %s', description)
+            return
+
         confirmation = deletion_message(table_names, 'table')
 
         if confirmation:
-            tables = doc_tables(doc)
-            for table_name in table_names:
-                table = tables[table_name]
-                tables.Remove(table)
-                LOGGER.debug('%s deleted'.format(table_name))
+            _remove_tables(doc, table_names)
 
         else:
            no_deletion(table_names, 'table')
@@ -130,110 +166,423 @@ def get_table(doc, table_name='Active'):
         table = doc.ActiveDataTableReference
 
     else:
-        tables = doc_tables(doc)
-        try:
-            table = tables[table_name]
-            # doc.Data.Tables[table_name]
-        except IndexError:
+        table = get_index(doc).table(table_name)
+        if table is None:
 
             valid_tables = get_table_names(doc)
-            announce_no_data(name, valid_tables, 'table')
+            announce_no_data(table_name, valid_tables, 'table')
 
     return table
 
 
-def copy_table(doc, table_name, newname):
-    """Copies data table in spotfire project
+def copy_table(doc, table_name, newname, column_names=None, pattern=None,
+               rows=None):
+    """Copies data table in spotfire project, whole, or only the columns
+       and rows selected, read in one pass so that time and memory follow
+       what is kept
     args:
     doc (Spotfire document instance): document to read from
     table_name (str): name of table
+    newname (str): name of copy, not copied if a table has the name
+    column_names (list of str or None): names of columns to keep
+    pattern (str or None): regex the names of columns to keep match, the
+                           selections add up, all columns if both are None
+    rows (selection.Predicate, IndexSet or None): rows to keep, all if
+                                                  None
+    raises: KeyError: if a column in column_names is not in the table
     """
-    #from Spotfire.Dxp.Data import sourceTable
-    from Spotfire.Dxp.Data.Import import DataTableDataSource
     table = get_table(doc, table_name)
-    tablesource = DataTableDataSource(table)
-    try:
-        doc.Data.Tables.Add(newname, tablesource)
-        LOGGER.debug('Copied table {} to {}'.format(table_name, newname))
-    except ValueError:
+    if get_index(doc).table(newname) is not None:
         message = ("Table {} already exists!" +
                    " no copy will be made").format(newname)
         heading = "Warning!"
         ok_message(message, heading)
+        return
+
+    if column_names is None and pattern is None and rows is None:
+        DataTableDataSource = load_type(DATA_IMPORT, 'DataTableDataSource')
+        _record_table_size(_add_or_replace_table(
+            doc, newname, DataTableDataSource(table)))
+        LOGGER.debug('Copied table %s to %s', table_name, newname)
+        return
+
+    names = [column.Name for column in table.Columns]
+    if column_names is not None or pattern is not None:
+        wanted = set(_as_row(column_names or ()))
+        missing = wanted.difference(names)
+        if missing:
+            raise KeyError('Columns {} are not in table {}'.format(
+                list_string(join_list(sorted(missing))), table_name))
+        matcher = re.compile(pattern).match if pattern is not None else None
+        names = [name for name in names if name in wanted or
+                 (matcher is not None and matcher(name))]
+        if not names:
+            ok_message('No columns of table {} selected, no copy will be '
+                       'made'.format(table_name))
+            return
+    if isinstance(rows, Predicate):
+        rows = select_rows(table, rows)
+
+    columns = read_columns(table, names, rows)
+    # Arrays hold missing values as 0, lists with None tell sbdf they are
+    values = [column.to_list() if 1 in column.missing else column.values
+              for column in columns]
+    types = [column.type_name if column.type_name in sbdf.VALUE_TYPES
+             else None for column in columns]
+    LOGGER.debug('Copying %i columns and %i rows of %s to %s', len(names),
+                 len(columns[0]) if columns else 0, table_name, newname)
+    make_table_from_columns(doc, newname, names, values, types)
+
+
+TEXT_CHUNK_ROWS = 5000
+
+
+def _as_row(row):
+    """Makes sure a table row is a list or tuple, single values are wrapped
+    args:
+    row (list, tuple or single value): row to check
+    returns: row (list or tuple)
+    """
+    if not isinstance(row, (list, tuple)):
+        row = [row]
+    return row
 
-    except TypeError:
 
-        table.ReplaceData(tablesource)
-        LOGGER.debug("This did not work")
+MAX_REPORTED_LINES = 10
 
 
-def table_text_writer(list_input):
+def _warn_skipped_lines(skipped, count, header):
+    """Warns once about lines that does not match the header length
+    args:
+    skipped (list of tuples): index and line of the first skipped lines
+    count (int): number of skipped lines
+    header (list): the header line
+    """
+    message = ('{} lines do not have same length as header [{}], ' +
+               'they will be skipped:').format(count, join_list(header))
+    for i, text_list in skipped:
+        message += '\nLine {}: [{}]'.format(i, join_list(text_list))
+    if count > len(skipped):
+        message += '\n...'
+    ok_message(message)
 
-    """Writes table input
+
+def table_text_chunks(list_input, chunk_rows=TEXT_CHUNK_ROWS,
+                      skip_line=None):
+    """Generates tab separated table text, a chunk of lines at a time
 
     args:
 
-    list_input (list of lists): input to be written
+    list_input (iterable of lists): header followed by rows, can be a
+                                    generator
+    chunk_rows (int): number of lines in each chunk
+    skip_line (callable or None): called with index, line and header for
+                                  lines not the same length as the header
 
-    returns: stream
-    """
-    from System.IO import  StreamWriter, MemoryStream, SeekOrigin
+    returns: generator of strings
 
+    raises: ValueError: if there is no header in list_input
+    """
+    rows = iter(list_input)
+    try:
+        header = _as_row(next(rows))
+    except StopIteration:
+        raise ValueError('No header line in table input')
 
-    list_input = controlled_list(list_input)
-    LOGGER.debug(list_input)
-    LOGGER.debug('--------')
-    header = controlled_list(list_input.pop(0))
     length_of_header = len(header)
-    head_line = create_line(header)
+    lines = [create_line(header)]
+    written = 0
+    for i, text_list in enumerate(rows):
+
+        text_list = _as_row(text_list)
+        if len(text_list) != length_of_header:
+            if skip_line is not None:
+                skip_line(i, text_list, header)
+            continue
+
+        lines.append(create_line(text_list))
+        written += 1
+        if len(lines) >= chunk_rows:
+            yield ''.join(lines)
+            lines = []
 
     # if only a header line
-    if not list_input:
-        text = ' ' * (length_of_header)
+    if not written:
+        lines.append(' ' * length_of_header)
+
+    if lines:
+        yield ''.join(lines)
 
-    else:
-        text =''
 
-        LOGGER.debug('Loop')
-        for i, text_list in enumerate(list_input):
+def table_text_writer(list_input, stream=None, chunk_rows=TEXT_CHUNK_ROWS):
 
-            text_list = controlled_list(text_list)
-            LOGGER.debug(text_list)
-            if len(text_list) != length_of_header:
+    """Writes table input, streaming it in chunks into the stream
 
-                message = ('Line {} in text: [{}] does not have ' +
-                           ' same length as header [{}], will be ' +
-                           'skipped').format(i, join_list(text_list),
-                                             join_list(header))
-                ok_message(message)
-            else:
+    args:
 
-                text += create_line(text_list)
+    list_input (iterable of lists): input to be written, header first,
+                                    can be a generator
+    stream (System.IO.Stream or None): stream to write to, a new
+                                       MemoryStream if None
+    chunk_rows (int): number of lines written to stream at a time
+
+    returns: stream
+    """
+    StreamWriter, MemoryStream, SeekOrigin = load_types(
+        'System.IO', ['StreamWriter', 'MemoryStream', 'SeekOrigin'])
+
+    if stream is None:
+        stream = MemoryStream()
+    skipped = []
+    counts = {'skipped': 0}
+    header = []
+
+    def skip_line(i, text_list, header_line):
+        """Keeps the first skipped lines for the warning"""
+        counts['skipped'] += 1
+        if len(skipped) < MAX_REPORTED_LINES:
+            skipped.append((i, text_list))
+            header[:] = header_line
 
-    text = head_line + text
-    stream = MemoryStream()
     writer = StreamWriter(stream)
-    writer.Write(text)
+    for chunk in table_text_chunks(list_input, chunk_rows, skip_line):
+        writer.Write(chunk)
+
+    if skipped:
+        _warn_skipped_lines(skipped, counts['skipped'], header)
     writer.Flush()
     stream.Seek(0, SeekOrigin.Begin)
     return stream
 
 
-def make_table(doc, table_name, column_names, data=()):
+def _add_or_replace_table(doc, table_name, source):
+    """Adds table from data source, replaces data if table exists
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table
+    source (Spotfire.Dxp.Data.DataSource): source of data
+    returns table (Spotfire.Dxp.Data.DataTable or None): None if queued in
+                                                        a batch
+    """
+    description = 'Add or replace table {}'.format(table_name)
+    if queue_mutation(doc, 'add_tables', description, _add_or_replace_table,
+                      doc, table_name, source,
+                      targets=[('tables', table_name)]):
+        return None
+
+    tables = doc_tables(doc)
+    index = get_index(doc)
+    if tables.Contains(table_name):
+        table = tables[table_name]
+        table.ReplaceData(source)
+        index.invalidate('columns', table_name)
+        keyindex.drop_key_indexes(doc, table_name)
+    else:
+        table = tables.Add(table_name, source)
+        index.add('tables', table_name, table)
+    return table
+
+
+def _record_table_size(table):
+    """Adds the rows and columns of a table made to the statistics of the
+       public function making it, nothing for tables queued in a batch
+    args:
+    table (Spotfire.Dxp.Data.DataTable or None): table made
+    """
+    if table is not None:
+        record_size(table.RowCount, table.Columns.Count)
+
+
+# Ways make_table treats an existing table, replace its rows, add the rows
+# with new keys, or add them all, replacing rows with the same keys
+MODES = ('replace', 'append', 'upsert')
+KEY_NAMES = ('REAL', 'DATE')
+
+
+def _text_source(column_names, data, column_types):
+    """Returns text data source of rows, streamed through tab separated text
+    """
+    add_reference('System.Data')
+    CultureInfo = load_type('System.Globalization', 'CultureInfo')
+    TextFileDataSource, TextDataReaderSettings = load_types(
+        DATA_IMPORT, ['TextFileDataSource', 'TextDataReaderSettings'])
+    DataType = load_type(DATA, 'DataType')
+
+    types = ColumnTypes(column_names, column_types)
+    text_input = chain([column_names], types.encode(data))
+    stream = table_text_writer(text_input)
+
+    readerSettings = TextDataReaderSettings()
+    readerSettings.Separator = "\t"
+    readerSettings.Culture = CultureInfo.InvariantCulture
+    readerSettings.AddColumnNameRow(0)
+    for i, type_name in enumerate(types.type_names()):
+
+        readerSettings.SetDataType(i, getattr(DataType, type_name))
+        LOGGER.debug('%s added as column %i of type %s',
+                     column_names[i], i, type_name)
+
+    return TextFileDataSource(stream, readerSettings)
+
+
+def _sbdf_source(column_names, columns, column_types):
+    """Returns sbdf data source of columns"""
+    MemoryStream, SeekOrigin = load_types('System.IO', ['MemoryStream',
+                                                        'SeekOrigin'])
+    SbdfFileDataSource = load_type(DATA_IMPORT, 'SbdfFileDataSource')
+
+    stream = MemoryStream()
+    sbdf.write_sbdf(sbdf.NetStreamOutput(stream), column_names, columns,
+                    column_types)
+    stream.Seek(0, SeekOrigin.Begin)
+    return SbdfFileDataSource(stream)
+
+
+def _data_source(column_names, data, column_types, use_sbdf):
+    """Returns data source of rows, through sbdf or text"""
+    if use_sbdf:
+        columns = sbdf.rows_to_columns(data, len(column_names))
+        return _sbdf_source(column_names, columns, column_types)
+    return _text_source(column_names, data, column_types)
+
+
+def _add_rows(doc, table_name, source, replaced, keys, key_names):
+    """Adds rows from data source to table, after removing the rows with
+       the keys replaced, and keeps the key index up to date
+    args:
+    doc (Spotfire document instance): document of table
+    table_name (str): name of table
+    source (Spotfire.Dxp.Data.DataSource): source of rows to add
+    replaced (list of tuples): keys of rows to remove first
+    keys (list of tuples): keys of the rows added, in order
+    key_names (list of str): names of key columns
+    """
+    description = 'Add {} rows to table {}'.format(len(keys), table_name)
+    if queue_mutation(doc, 'add_tables', description, _add_rows, doc,
+                      table_name, source, replaced, keys, key_names,
+                      targets=[('tables', table_name)]):
+        return
+
+    AddRowsSettings, RowSelection = load_types(DATA, ['AddRowsSettings',
+                                                      'RowSelection'])
+    table = doc_tables(doc)[table_name]
+    if replaced:
+        # Rows are found in the table as it is now, the index may hold
+        # rows queued after it was last read
+        keyindex.drop_key_indexes(doc, table_name)
+        rows = keyindex.key_index(doc, table, key_names).rows
+        indices = [rows[key] for key in replaced if key in rows]
+        if indices:
+            table.RemoveRows(RowSelection(from_indices(table, indices)))
+        table.AddRows(source, AddRowsSettings(table, source))
+        # Row indices after the removed rows have moved, built again on use
+        keyindex.drop_key_indexes(doc, table_name)
+    else:
+        table.AddRows(source, AddRowsSettings(table, source))
+        keyindex.rows_added(doc, table, key_names, len(keys))
+    LOGGER.debug(description)
+
+
+def _add_new_rows(doc, table, column_names, data, column_types, use_sbdf,
+                  mode, key_names):
+    """Adds the rows of data with keys not in table, and for upsert, also
+       those with keys in table, replacing the rows there, see make_table.
+       The keys are registered in the key index at once, so that the next
+       append sees them also when the rows are queued in a batch
+    returns count (int): number of rows added
+    """
+    key_names = list(_as_row(key_names))
+    missing = [name for name in key_names if name not in column_names]
+    if missing:
+        raise KeyError('Key columns {} are not among the columns'.format(
+            list_string(join_list(missing))))
+    positions = [list(column_names).index(name) for name in key_names]
+    # The rows added get the types of the columns of the table
+    columns = table.Columns
+    types = dict((name, column_type_name(columns[name]))
+                 for name in column_names if columns.Contains(name))
+    types = dict((name, type_name) for name, type_name in types.items()
+                 if type_name in TYPE_NAMES)
+    if isinstance(column_types, dict):
+        types.update(column_types)
+    elif column_types is not None:
+        types.update(zip(column_names, column_types))
+
+    index = keyindex.key_index(doc, table, key_names)
+    rows = index.rows
+    width = len(column_names)
+    keys = []
+    replaced = []
+    counts = {'kept': 0, 'repeated': 0, 'short': 0}
+    seen = set()
+
+    def new_rows():
+        """Yields rows with new keys, or keys to replace"""
+        for row in data:
+            row = _as_row(row)
+            if len(row) != width:
+                if use_sbdf:
+                    counts['short'] += 1
+                else:
+                    # Left for the text writer to skip, with its warning
+                    yield row
+                continue
+            key = index.row_key(row, positions)
+            if key in seen:
+                counts['repeated'] += 1
+                continue
+            if key in rows:
+                if mode == 'append':
+                    counts['kept'] += 1
+                    continue
+                replaced.append(key)
+            seen.add(key)
+            keys.append(key)
+            yield row
+
+    source = _data_source(column_names, new_rows(), types, use_sbdf)
+    if counts['short']:
+        LOGGER.warning('%i rows do not have %i values, they were left out',
+                       counts['short'], width)
+    LOGGER.info('%i new rows for %s, %i replacing rows, %i rows kept, %i '
+                'repeated keys left out', len(keys) - len(replaced),
+                table.Name, len(replaced), counts['kept'],
+                counts['repeated'])
+    if keys:
+        index.queue(keys)
+        _add_rows(doc, table.Name, source, replaced, keys, key_names)
+    return len(keys)
+
+
+def make_table(doc, table_name, column_names, data=(), column_types=None,
+               use_sbdf=False, mode='replace', key_names=KEY_NAMES):
     """Makes data table in spotfire project
     args:
     doc (Spotfire document instance): document to read from
     table_name (str): name of table
     column_names (list like): names of the columns in the table
+    data (iterable of lists): rows of the table, can be a generator
+    column_types (dict, list or None): type of columns by name or position,
+                                       among datatypes.TYPE_NAMES, types not
+                                       given are inferred from data
+    use_sbdf (bool): import through sbdf instead of tab separated text,
+                     all rows must then match the header, rows appended
+                     that do not are left out
+    mode (str): among MODES, what to do if the table exists, replace its
+                rows, append the rows with keys not in the table, or upsert,
+                append all rows, removing the rows of the table with the
+                same keys first. Only the rows added are imported, the keys
+                of the table are read once and kept while its number of rows
+                does not change
+    key_names (list of str): names of the columns identifying a row, for
+                             append and upsert
+    raises: ValueError: if mode is not among MODES
+            KeyError: if a key column is not among column_names
     """
-    import clr
-    clr.AddReference('System.Data')
-    import System
-    from Spotfire.Dxp.Data.Import import TextFileDataSource, TextDataReaderSettings
-
-    from Spotfire.Dxp.Data import DataType
+    if mode not in MODES:
+        raise ValueError('{} is not a mode, choose among {}'.format(
+            mode, ', '.join(MODES)))
 
-    tables = doc_tables(doc)
     col_lengths = len(column_names) -1
     if col_lengths <1:
 
@@ -241,47 +590,165 @@ def make_table(doc, table_name, column_names, data=()):
                    'any data columns, this is useless, process stopped!')
 
         ok_message(message)
-
+        return
+
+    column_names = _as_row(column_names)
+    table = get_index(doc).table(table_name)
+    if mode != 'replace' and table is not None:
+        count = _add_new_rows(doc, table, column_names, data, column_types,
+                              use_sbdf, mode, key_names)
+        record_size(count, len(column_names))
     else:
+        source = _data_source(column_names, data, column_types, use_sbdf)
+        _record_table_size(_add_or_replace_table(doc, table_name, source))
 
-        text_input = [column_names]
-        text_input.extend(data)
-        LOGGER.debug(text_input)
-        stream = table_text_writer(text_input)
-
-        readerSettings = TextDataReaderSettings()
-        readerSettings.Separator = "\t"
-        readerSettings.AddColumnNameRow(0)
-        for i, col_n in enumerate(controlled_list(column_names)):
-
-            readerSettings.SetDataType(i, DataType.String)
-            LOGGER.debug(col_n + " Added as column " + str(i))
-
-        source = TextFileDataSource(stream, readerSettings)
 
-        if tables.Contains(table_name):
-            tables[table_name].ReplaceData(source)
-        else:
-            tables.Add(table_name, source)
+def make_table_from_columns(doc, table_name, column_names, columns,
+                            column_types=None):
+    """Makes data table in spotfire project from columns, through sbdf
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table
+    column_names (list of str): names of the columns in the table
+    columns (list of sequences): values of the columns, lists or
+                                 array.array, None or NaN for missing
+    column_types (dict, list or None): type of columns by name or position,
+                                       among sbdf.VALUE_TYPES, types not
+                                       given are inferred from columns
+    """
+    _record_table_size(_add_or_replace_table(doc, table_name, _sbdf_source(
+        column_names, columns, column_types)))
 
 
-def make_table_from_csv(doc,table_name, file_path):
-    """Makes table from csv
+def make_table_from_csv(doc, table_name, file_path, column_names=None,
+                        pattern=None, vectors=None, column_types=None,
+                        delimiter=','):
+    """Makes table from csv, or replaces the data of the table if it
+       exists. With a selection of columns, or types, the file is streamed
+       line by line and only the columns selected reach spotfire, so that
+       time and memory follow the data kept, not the size of the file
     args:
     doc (Spotfire document instance): document to read from
     table_name (str): name of table
+    file_path (str): path of file
+    column_names (list of str or None): names of columns to keep
+    pattern (str or None): regex the names of columns to keep match
+    vectors (list of str or None): summary keywords, like WOPR, or vectors,
+                                   like OPR, the columns of which to keep,
+                                   the selections add up, and DATE, REAL,
+                                   ITER and ENSEMBLE are kept with any
+    column_types (dict, list or None): type of columns by name or position
+                                       among the columns kept, among
+                                       datatypes.TYPE_NAMES, types not given
+                                       are inferred
+    delimiter (str): separator of values
+    raises: KeyError: if a column in column_names is not in the file
+    """
+    file_path = r'{}'.format(file_path)
+    if (column_names is None and pattern is None and vectors is None and
+            column_types is None):
+        TextFileDataSource, TextDataReaderSettings = load_types(
+            DATA_IMPORT, ['TextFileDataSource', 'TextDataReaderSettings'])
+        # specify any settings for the file
+        settings = TextDataReaderSettings()
+        settings.Separator = delimiter
+        _record_table_size(_add_or_replace_table(
+            doc, table_name, TextFileDataSource(file_path, settings)))
+        return
+
+    header = csvfiles.read_header(file_path, delimiter)
+    indices = csvfiles.selected_indices(header, column_names, pattern,
+                                        vectors)
+    LOGGER.debug('Importing %i of %i columns of %s', len(indices),
+                 len(header), file_path)
+    make_table(doc, table_name, [header[index] for index in indices],
+               csvfiles.projected_rows(file_path, indices, delimiter),
+               column_types)
+
+
+def make_ensemble_table(doc, table_name, file_pattern, column_names=None,
+                        pattern=None, vectors=None, column_types=None,
+                        delimiter=',', workers=None):
+    """Makes table of an ensemble, one csv file per realization, found by
+       glob and read in parallel, with columns REAL and ITER first and the
+       columns of any realization, empty where a realization does not have
+       them, in one import
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table, replaced if it exists
+    file_pattern (str): glob of the files, like
+                        ens/realization-*/iter-*/share/results/tables/
+                        unsmry--monthly.csv
+    column_names, pattern, vectors: selection of columns, as for
+                                    make_table_from_csv
+    column_types (dict, list or None): type of columns by name, or by
+                                       position after REAL and ITER, among
+                                       datatypes.TYPE_NAMES, types not given
+                                       are inferred
+    delimiter (str): separator of values
+    workers (int or None): threads reading files, ensemble.WORKERS if None
+    returns realization_count (int): number of files read
+    """
+    realizations = ensemble.find_realizations(file_pattern)
+    if not realizations:
+        ok_message('No realization files match {}'.format(file_pattern))
+        return 0
+
+    if workers is None:
+        workers = ensemble.WORKERS
+
+    def read(realization):
+        return ensemble.read_realization(realization, column_names, pattern,
+                                         vectors, delimiter)
+
+    ensemble.parallel_map(read, realizations, workers)
+    names = ensemble.union_names(realizations)
+    types = {'REAL': 'Integer', 'ITER': 'String'}
+    if isinstance(column_types, dict):
+        types.update(column_types)
+    elif column_types is not None:
+        types.update(zip(names, column_types))
+    LOGGER.debug('Read %i realizations with %i columns', len(realizations),
+                 len(names))
+    make_table(doc, table_name, list(ensemble.KEY_NAMES) + names,
+               ensemble.ensemble_rows(realizations, names), types)
+    return len(realizations)
+
+
+def _add_relation(doc, first_table_name, second_table_name, relation_string):
+    """Adds relation between tables
+    args:
+    doc (Spotfire document instance): document to read from
+    first_table_name (str): name of table
+    second_table_name (str): name of table
+    relation_string (str): expression relating the tables
+    raises: KeyError: if one of the tables does not exist
     """
-    from Spotfire.Dxp.Data.Import import TextFileDataSource, TextDataReaderSettings
+    tables = doc_tables(doc)
+    # set the left and right tables
+    first= tables[first_table_name]
+    second= tables[second_table_name]
+    # add the relation
+    doc.Data.Relations.Add(first, second, relation_string)
 
-    file_path=r'{}'.format(file_path)
-    # specify any settings for the file
-    settings= TextDataReaderSettings()
-    settings.Separator=','
-    dataSource=TextFileDataSource(file_path, settings)
 
-    tables = doc_tables(doc)
-    #datasource name and datasource to add table
-    tables.Add(table_name, dataSource)
+def _add_queued_relation(current, doc, first_table_name, second_table_name,
+                         relation_string):
+    """Adds relation queued in a batch, the batch reports it if tables are
+       missing by then
+    args:
+    current (batch.Batch): batch the relation was queued in
+    doc (Spotfire document instance): document to read from
+    first_table_name (str): name of table
+    second_table_name (str): name of table
+    relation_string (str): expression relating the tables
+    """
+    try:
+        _add_relation(doc, first_table_name, second_table_name,
+                      relation_string)
+    except KeyError:
+        current.fail(('Could not set up relation {}, ensure that both ' +
+                      'tables exist').format(relation_string))
 
 
 def define_relation(doc, first_table_name, second_table_name,
@@ -297,24 +764,30 @@ def define_relation(doc, first_table_name, second_table_name,
        column name is common between the tables, and equal to
        first_col_name
     box_message (bool): decides if user will get message in pop up box
+    returns: defined (bool): False if the relation could not be set up,
+                             True when queued in a batch, which reports
+                             the relations it could not set up
     """
-    from Spotfire.Dxp.Data import DataRelation
     if second_col_name is None:
         second_col_name = first_col_name
-    tables = doc_tables(doc)
-    # set the left and right tables
+    # "Region" is the column that relates the two tables
+    relation_string = relation_expression(first_table_name, first_col_name,
+                                          second_table_name, second_col_name)
+    if queue_mutation(doc, 'add_relations',
+                      'Add relation {}'.format(relation_string),
+                      _add_queued_relation, active_batch(doc), doc,
+                      first_table_name, second_table_name, relation_string,
+                      targets=[('tables', first_table_name),
+                               ('tables', second_table_name)]):
+        return True
+
     try:
-        first= tables[first_table_name]
-        second= tables[second_table_name]
-        # add the relation
-        # "Region" is the column that relates the two tables
-        relation_string = "[{}].[{}] = [{}].[{}]".format(first_table_name,
-                                                         first_col_name,
-                                                         second_table_name,
-                                                         second_col_name)
-        doc.Data.Relations.Add(first, second, relation_string)
+        _add_relation(doc, first_table_name, second_table_name,
+                      relation_string)
+        defined = True
 
     except KeyError:
+        defined = False
         message = ('Could not set up relation between {} in table {}\n' +
                    ' and {} in table {}\n.' +
                    'Ensure that both tables exist').format(first_table_name,
@@ -323,6 +796,20 @@ def define_relation(doc, first_table_name, second_table_name,
                                                          second_col_name)
         if box_message:
             ok_message(message)
+        else:
+            LOGGER.warning(message)
+
+    return defined
+
+
+def get_summary_schema(doc, table_name):
+    """Fetches schema of summary vectors from columns in a table
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table
+    returns. schema (summary.SummarySchema): vectors, keywords and entities
+    """
+    return summary.summary_schema(get_column_names(doc, table_name))
 
 
 def get_vector_names(doc, table_name):
@@ -332,19 +819,7 @@ def get_vector_names(doc, table_name):
     table_name (str): name of table
     returns. vector_names (list): names of vectors
     """
-    col_names = get_column_names(doc, table_name)
-    vector_names = []
-    for col_name in col_names:
-        if re.match(r'(date|time)', col_name.lower()):
-            continue
-        extract_name = col_name.split(':')[0]
-        extract_name = extract_name[1:]
-        if extract_name.endswith('H'):
-            extract_name = extract_name[:-1]
-
-        if extract_name not in vector_names:
-            vector_names.append(extract_name)
-    return vector_names
+    return list(get_summary_schema(doc, table_name).vectors)
 
 
 def get_well_names(doc, table_name):
@@ -356,18 +831,7 @@ def get_well_names(doc, table_name):
     returns. well_names (list): names of wells
     """
     LOGGER.debug('Fetching table with name %s', table_name)
-    col_names = get_column_names(doc, table_name)
-    well_names = []
-    for col_name in col_names:
-        m = re.match(r'W[^:]+.(.*)', col_name)
-        if m:
-            well_name = m.group(1)
-            if well_name not in well_names:
-                well_names.append(well_name)
-        else:
-            LOGGER.debug(col_name + " does not match")
-
-    return well_names
+    return get_summary_schema(doc, table_name).wells
 
 
 def make_vector_and_well_tables(doc, in_table_name):
@@ -378,8 +842,7 @@ def make_vector_and_well_tables(doc, in_table_name):
     in_table_name (str): name of table to extract from
 
     """
-    vector_names = get_vector_names(doc, in_table_name)
-    well_names = get_well_names(doc, in_table_name)
+    schema = get_summary_schema(doc, in_table_name)
 
     vector_table_name = 'Vectors'
     well_table_name = 'Wells'
@@ -390,8 +853,8 @@ def make_vector_and_well_tables(doc, in_table_name):
                    ' a different name!')
         ok_message(message)
     else:
-        make_table(doc, vector_table_name, vector_table_name , vector_names)
-        make_table(doc, well_table_name, well_table_name , well_names)
+        make_table(doc, vector_table_name, vector_table_name, schema.vectors)
+        make_table(doc, well_table_name, well_table_name, schema.wells)
 
 
 def make_vector_and_well_table(doc, in_table_name,
@@ -404,55 +867,47 @@ def make_vector_and_well_table(doc, in_table_name,
     out_table_name (str): name of table to make
 
     """
-    vector_names = get_vector_names(doc, in_table_name)
-    well_names = get_well_names(doc, in_table_name)
-
-    length = 0
-
-    for entry in (vector_names, well_names):
-
-        entry_length = len(entry)
-        if entry_length > length:
-
-            length = entry_length
+    schema = get_summary_schema(doc, in_table_name)
+    vector_names = schema.vectors
+    well_names = schema.wells
+    length = max(len(vector_names), len(well_names))
 
+    # Shorter column padded with blanks
     header = ['Vectors', 'Wells']
-    text_list = []
-    i = 0
-    while i <=length:
-
-        text_list.append([get_list_entry(vector_names, i),
-                          get_list_entry(well_names, i)])
-        i +=1
-
-    LOGGER.debug(text_list)
+    text_list = ([vector_names[i] if i < len(vector_names) else ' ',
+                  well_names[i] if i < len(well_names) else ' ']
+                 for i in range(length))
+    LOGGER.debug('%i vectors and %i wells', len(vector_names),
+                 len(well_names))
 
-    make_table(doc, out_table_name, header, text_list)
+    make_table(doc, out_table_name, header, text_list,
+               ['String', 'String'])
 
 
-def add_relations(doc):
+def add_relations(doc, spanning=False):
 
-    """Adds relations between columns with common name across all tables
+    """Adds relations between columns with common name across all tables,
+       only those missing, so that running it again adds nothing
     args:
     doc (Spotfire document instance): document to read from
+    spanning (bool): if False the first table is related to the others
+                     over the columns it shares with them, if True all
+                     tables sharing a column are related over it
+    returns relations (list of tuples): first table name, second table
+                                        name and column name of the
+                                        relations added
     """
-    table_names = get_table_names(doc)
-    name_count = {}
-    # Finding common columns
-    for table_name in table_names:
-        column_names = get_column_names(doc, table_name)
-        for column_name in column_names:
-            name_count[column_name] = name_count.get(column_name,0) + 1
-    relation_names = []
-    for col_name in name_count:
-        if name_count[col_name] > 1:
-            relation_names.append(col_name)
+    index = column_index(doc)
+    table_names = [table.Name for table in doc_tables(doc)]
+    missing = missing_relations(doc, plan_relations(index, table_names,
+                                                    spanning))
+    LOGGER.debug('Adding %i relations', len(missing))
 
-    base_table_name = table_names.pop(0)
-
-    for table_name in table_names:
-        for col_name in relation_names:
-            define_relation(doc, base_table_name, table_name, col_name)
+    # Relations that fail are reported once by the batch
+    with batch(doc, confirm=False):
+        for first, second, col_name in missing:
+            define_relation(doc, first, second, col_name)
+    return missing
 
 
 def get_column_names(doc, table_name):
@@ -463,8 +918,9 @@ def get_column_names(doc, table_name):
     table_name (str): name of table
     returns. col_names (list): names of the columns
     """
-    table = get_table(doc, table_name)
-    col_names = [c.Name for c in table.Columns]
+    if table_name == 'Active':
+        table_name = get_table(doc, table_name).Name
+    col_names = get_index(doc).names('columns', table_name)
     return col_names
 
 
@@ -478,7 +934,6 @@ def get_column_names_search(doc, table_name, pattern, regex=False):
     search_column_names = []
     LOGGER.debug('Searching for pattern %s', pattern)
     for column_name in column_names:
-        LOGGER.debug(column_name)
         found = False
         if regex:
             match =re.match(r'{}'.format(pattern), column_name)
@@ -497,42 +952,55 @@ def get_column_names_search(doc, table_name, pattern, regex=False):
     return search_column_names
 
 
+def _rename_columns(doc, table_name, switch_dict):
+    """Renames columns in data table, without asking
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table
+    switch_dict (dict): new column names by old names
+    """
+    table = get_table(doc, table_name)
+    LOGGER.debug('Renaming %s', Short(switch_dict))
+
+    for col in list(table.Columns):
+        col_name = col.Name
+        # This does not work in spotfire 10..
+        #LOGGER.debug('%s: %s', col_name, switch_dict[col_name])
+
+        new_name = switch_dict.get(col_name)
+        if new_name is not None:
+            col.Name = new_name
+            LOGGER.debug('Moving %s to %s', col_name, new_name)
+        else:
+            LOGGER.debug('Skipping %s', col_name)
+    get_index(doc).invalidate('columns', table.Name)
+    LOGGER.debug('Done with swithing')
+
+
 def rename_columns(doc, table_name, orig_names, new_names):
     """Renames selected columns in data table
     args:
     doc (Spotfire document instance): document to read from
     """
-    LOGGER.debug('--------------')
-    LOGGER.debug(orig_names)
-    LOGGER.debug(new_names)
+    LOGGER.debug('Renaming %s to %s', Short(orig_names), Short(new_names))
     if orig_names and new_names:
+        switch_dict = dict(zip(orig_names, new_names))
+        description = 'Rename {} to {} in table {}'.format(
+            list_string(orig_names), list_string(new_names), table_name)
+        if queue_mutation(doc, 'rename_columns', description,
+                          _rename_columns, doc, table_name, switch_dict,
+                          targets=[('tables', table_name)]):
+            LOGGER.debug('Queued: %s', description)
+            return
+
         heading = 'Renaming columns in table {}!'.format(table_name)
         message = ('Do you want to rename' +
                    ' {} to {}?').format(list_string(orig_names),
                                         list_string(new_names))
         confirmation = yes_no_message(message, heading)
         if confirmation:
-            table = get_table(doc, table_name)
-            switch_dict = dict(zip(orig_names, new_names))
-
-            LOGGER.debug(switch_dict)
-
-            for col in table.Columns:
-                col_name = col.Name
-                # This does not work in spotfire 10..
-                #LOGGER.debug('%s: %s', col_name, switch_dict[col_name])
-
-                if col_name in orig_names:
-                    try:
-                        new_name = switch_dict[col_name]
-                        col.Name = new_name
-                        LOGGER.debug('Moving %s to %s', col, new_name)
-                    except KeyError:
-                        LOGGER.warning('%s not in list', col)
-                else:
-                    LOGGER.debug('Skipping %s', col_name)
-            LOGGER.debug('Done with swithing')
-      else:
+            _rename_columns(doc, table_name, switch_dict)
+    else:
         heading = 'Nothing to replace!!'
         message = 'Couldnt find anything to replace in rename columns'
         ok_message(message, heading)
@@ -544,12 +1012,37 @@ def rename_column_search(doc, table_name, pattern):
     doc (Spotfire document instance): document to read from
     """
     replace_names = get_column_names_search(doc, table_name, pattern)
-    (replace_names)
     new_names = [s.replace(pattern,'') for s in replace_names]
-    LOGGER.debug(new_names)
     rename_columns(doc, table_name, replace_names, new_names)
 
 
+def _remove_columns(doc, table_name, column_names, box_message=True):
+    """Removes columns from data table, without asking
+    args:
+    doc (Spotfire document instance): document to read from
+    table_name (str): name of table
+    column_names (list): names of the columns to be deleted
+    box_message (bool): shows missing columns in box if True, logs if False
+    """
+    table = get_table(doc, table_name)
+    index = get_index(doc)
+    missing = []
+    for column_name in column_names:
+        try:
+            table.Columns.Remove(column_name)
+            index.remove('columns', column_name, table.Name)
+        except ValueError:
+            missing.append(column_name)
+
+    if missing:
+        message = 'No columns named {} in table {}'.format(
+            list_string(join_list(missing)), table_name)
+        if box_message:
+            ok_message(message)
+        else:
+            LOGGER.warning(message)
+
+
 def delete_columns(doc, table_name, column_names, box_message=True):
    """Removes columns from data table
     args:
@@ -557,7 +1050,6 @@ def delete_columns(doc, table_name, column_names, box_message=True):
     table_name (str): name of table
     col_list (list): names of the columns to be deleted
     """
-   table = get_table(doc, table_name)
    extra_text = 'in table {}'.format(table_name)
    if column_names:
        if type(column_names) == str:
@@ -565,21 +1057,20 @@ def delete_columns(doc, table_name, column_names, box_message=True):
            column_list.append(column_names)
            column_names = column_list
 
+   description = 'Delete columns {} {}'.format(
+       list_string(join_list(column_names)), extra_text)
+   if queue_mutation(doc, 'delete_columns', description, _remove_columns,
+                     doc, table_name, column_names, False,
+                     targets=[('tables', table_name)]):
+       LOGGER.debug('Queued: %s', description)
+       return
+
    confirmation = deletion_message(column_names, 'column',extra_text)
    if confirmation:
-       for column_name in column_names:
-           try:
-               table.Columns.Remove(column_name)
-           except ValueError:
-               message = 'No column named {} in table {}'.format(column_name,
-                                                                 table_name)
-               if box_message:
-                   ok_message(message)
-               else:
-                   LOGGER.warning(message)
+       _remove_columns(doc, table_name, column_names, box_message)
 
    else:
-       no_deletion(column_names, extra_text)
+       no_deletion(column_names, 'column', extra_text)
 
 
 def delete_column(doc, table_name, column_name):
@@ -603,29 +1094,54 @@ def delete_columns_search(doc, table_name, pattern, regex=False):
 
 
 def findrowfilter(table):
-    from Spotfire.Dxp.Data import IndexSet
-    """Returns number of rows in a table
+    """Returns empty row filter sized for the rows in a table, see
+       rowsets for other row sets
     args:
        table (spotfire table instance): table to find rows from
     """
-    #Identify the number of rows in the data table
-    count = table.RowCount
-    rowfilter = IndexSet(count, False)
-    return rowfilter
+    return no_rows(table)
 
 
-def _delete_rows_(table, rowfilter, printstr='all rows'):
+def _remove_selected_rows(table, select):
+    """Removes the rows of table select gives, when a batch applies
+    args:
+    table (Spotfire.Dxp.Data.DataTable): table to delete from
+    select (callable): function of table giving the rows to delete
+    """
+    RowSelection = load_type(DATA, 'RowSelection')
+    table.RemoveRows(RowSelection(select(table)))
+
+
+def _delete_rows_(table, rowfilter, printstr='all rows', doc=None,
+                  select=None):
 
     """Deletes rows in a data table based on a filter
     args:
         table (Spotfire.table): table to delete from
-        rowfilter (Spotfire.Dxp.Data.rowFilter): filter to delete with
+        rowfilter (Spotfire.Dxp.Data.rowFilter or None): filter to delete
+            with, from select if None
+        printstr (str): description of rows for the confirmation
+        doc (Spotfire document instance or None): document of table, the
+            deletion is queued if a batch is active for it
+        select (callable or None): function of table giving the rows to
+            delete, called when the batch applies if queued, so that the
+            rows are selected after the changes queued before
 
     """
-    from Spotfire.Dxp.Data import RowSelection
+    RowSelection = load_type(DATA, 'RowSelection')
     heading = "REMOVE ROWS"
 
     message =  'Deleting {} from table {}'.format(printstr, table.Name)
+    if select is None:
+        select = lambda _: rowfilter
+    if doc is not None and queue_mutation(doc, 'delete_rows', message,
+                                          _remove_selected_rows, table,
+                                          select,
+                                          targets=[('tables', table.Name)]):
+        return
+
+    if rowfilter is None:
+        rowfilter = select(table)
     confirmation = yes_no_message(message, heading)
     if confirmation:
 
@@ -644,19 +1160,9 @@ def delete_all_rows(doc, table_name='Active'):
       doc (Spotfire document instance): document to work with
       table_name (str): name of table to delete from
     """
-    from Spotfire.Dxp.Data import IndexSet
-    from Spotfire.Dxp.Data import DataValueCursor
-
     table = get_table(doc, table_name)
-    rowfilter = findrowfilter(table)
-    cursor =DataValueCursor.CreateFormatted(table.Columns[0])
-
-    for row in table.GetRows(cursor):
-        rowfilter.AddIndex(row.Index)
-
-    rowfilter = rowfilter
-    LOGGER.debug('Rows in table' + str(len(str(rowfilter))))
-    _delete_rows_(table, rowfilter)
+    LOGGER.debug('Rows in table %i', table.RowCount)
+    _delete_rows_(table, None, doc=doc, select=all_rows)
 
 
 def del_based_on_column_value(doc, column_name, remove_list, table_name='Active'):
@@ -666,23 +1172,91 @@ def del_based_on_column_value(doc, column_name, remove_list, table_name='Active'
       doc (Spotfire document instance): document to work with
       table_name (str): name of table to delete from
       column_name (str): name of column with criteria in
-      remove_list (list): values of column that triggers delete
+      remove_list (list): values of column that triggers delete, compared
+                          with the values as formatted in spotfire
     """
-    from Spotfire.Dxp.Data import DataValueCursor
-    from System import Convert
+    predicate = is_in(column_name, remove_list, formatted=True)
+    printstr = '{} from column {}'.format(join_list(remove_list), column_name)
+    delete_rows_where(doc, predicate, table_name, printstr)
+
+
+def get_rows_where(doc, predicate, table_name='Active', rows=None):
 
+    """Selects rows in datatable matching a predicate, in one pass
+    args:
+      doc (Spotfire document instance): document to work with
+      predicate (selection.Predicate): condition rows must match
+      table_name (str): name of table to select from
+      rows (Spotfire.Dxp.Data.IndexSet or None): rows to select among
+    returns: rowfilter (Spotfire.Dxp.Data.IndexSet)
+    """
     table = get_table(doc, table_name)
+    return select_rows(table, predicate, rows)
 
-    cursor = []
-    cursor = DataValueCursor.CreateFormatted(table.Columns[column_name])
-    rowfilter = findrowfilter(table)
 
-    for row in table.GetRows(cursor):
-        if Convert.ToString(cursor.CurrentValue) in remove_list:
-            rowfilter.AddIndex(row.Index)
+def delete_rows_where(doc, predicate, table_name='Active', printstr=None):
 
-    printstr = '{} from column {}'.format(join_list(remove_list), column_name)
-    _delete_rows_(table, rowfilter, printstr)
+    """Removes rows in datatable matching a predicate
+    args:
+      doc (Spotfire document instance): document to work with
+      predicate (selection.Predicate): condition rows must match
+      table_name (str): name of table to delete from
+      printstr (str or None): description of rows for the confirmation
+    """
+    table = get_table(doc, table_name)
+    if printstr is None:
+        printstr = 'rows where {!r}'.format(predicate)
+    _delete_rows_(table, None, printstr, doc,
+                  lambda table: select_rows(table, predicate))
+
+
+def mark_rows_where(doc, predicate, table_name='Active', marking_name=None):
+
+    """Marks rows in datatable matching a predicate
+    args:
+      doc (Spotfire document instance): document to work with
+      predicate (selection.Predicate): condition rows must match
+      table_name (str): name of table to mark in
+      marking_name (str or None): name of marking, default marking if None
+    returns: rowfilter (Spotfire.Dxp.Data.IndexSet): the marked rows
+    """
+    RowSelection = load_type(DATA, 'RowSelection')
+
+    table = get_table(doc, table_name)
+    rowfilter = select_rows(table, predicate)
+    markings = doc.Data.Markings
+    if marking_name is None:
+        marking = markings.DefaultMarkingReference
+    else:
+        marking = markings[marking_name]
+    marking.SetSelection(RowSelection(rowfilter), table)
+    return rowfilter
+
+
+def get_columns(doc, table_name, column_names, rows=None, use_numpy=False):
+
+    """Fetches columns in a data table, typed and in one pass over the rows
+    args:
+       doc (Spotfire document instance): document to read from
+       table_name (str): name of table to read from
+       column_names (list of str): names of columns to read
+       rows (Spotfire.Dxp.Data.IndexSet or None): rows to read, all if None
+       use_numpy (bool): returns numpy masked arrays when numpy is
+                         available, if True
+
+    returns: columns (dict): columns.ColumnData, or numpy masked arrays,
+                             by column name, rows line up across columns
+    """
+    table = get_table(doc, table_name)
+    column_names = _as_row(column_names)
+    columns = read_columns(table, column_names, rows)
+    if use_numpy:
+        try:
+            return dict((column.name, column.to_numpy())
+                        for column in columns)
+        except ImportError:
+            LOGGER.debug('No numpy, returning arrays')
+    return dict((column.name, column) for column in columns)
 
 
 def get_column_as_list(doc, table_name, col_name):
@@ -693,8 +1267,11 @@ def get_column_as_list(doc, table_name, col_name):
        table_name (str): name of table to read from
        col_name (str): name of column to read
 
+    returns values (list of str): formatted values, empty values left out,
+                                  see get_columns for typed values that
+                                  line up with the rows
     """
-    from Spotfire.Dxp.Data import DataValueCursor #, List
+    DataValueCursor = load_type(DATA, 'DataValueCursor')
     table = get_table(doc, table_name)
     # place generic data cursor on a specific column
     cursor = DataValueCursor.CreateFormatted(table.Columns[col_name])
@@ -707,13 +1284,233 @@ def get_column_as_list(doc, table_name, col_name):
         # into some defined condition
 
         value = cursor.CurrentValue
-        if value <> str.Empty:
+        if value != str.Empty:
             values.append(value)
 
     return values
 
 
-def make_mean_table(doc, table_name, mean_table_name, category_names):
+NUMERIC_TYPES = ('Integer', 'LongInteger', 'Real', 'SingleReal')
 
 
-    pass
+def _numeric_names(table, exclude):
+    """Returns names of the numeric columns of table, except exclude"""
+    return [column.Name for column in table.Columns
+            if column.Name not in exclude and
+            column_type_name(column) in NUMERIC_TYPES]
+
+
+def make_mean_table(doc, table_name, mean_table_name, category_names,
+                    value_names=None, statistics=('mean',)):
+
+    """Makes table with statistics of columns grouped by categories, in one
+       streaming pass over the table
+    args:
+       doc (Spotfire document instance): document to read from
+       table_name (str): name of table to aggregate
+       mean_table_name (str): name of table to make
+       category_names (list of str): names of columns to group by,
+                                     like DATE and WELL
+       value_names (list of str or None): names of columns to aggregate,
+                                          all numeric columns if None
+       statistics (list of str): among aggregate.STATISTICS, the columns
+                                 keep their names when there is only one,
+                                 else they are named like Avg(FOPT)
+    """
+    statistics = _as_row(statistics)
+    aggregate.check_statistics(statistics)
+    category_names = list(_as_row(category_names))
+    table = get_table(doc, table_name)
+    # Types make_table does not write are inferred
+    category_types = [column_type_name(table.Columns[name])
+                      for name in category_names]
+    category_types = [type_name if type_name in TYPE_NAMES else None
+                      for type_name in category_types]
+    if value_names is None:
+        value_names = _numeric_names(table, category_names)
+    value_names = list(_as_row(value_names))
+    LOGGER.debug('Aggregating %i columns by %s', len(value_names),
+                 list_string(join_list(category_names)))
+
+    rows = (values for _, values in iter_rows(table, category_names +
+                                              value_names))
+    groups = aggregate.group_by(rows, len(category_names))
+
+    names = aggregate.result_names(value_names, statistics)
+    value_types = ['Integer' if statistic == 'count' else 'Real'
+                   for _ in value_names for statistic in statistics]
+    data = ([python_value(value) for value in row]
+            for row in aggregate.result_rows(groups, statistics))
+    make_table(doc, mean_table_name, category_names + names, data,
+               category_types + value_types)
+
+
+def make_percentile_table(doc, table_name, percentile_table_name,
+                          category_names=('DATE',), value_names=None,
+                          percentiles=(10, 50, 90), sketch_size=None,
+                          exact_limit=None):
+
+    """Makes table with percentiles of columns over the rows of each
+       category, like P10, P50 and P90 of vectors over realizations per
+       DATE, in one streaming pass. Percentiles are exact for categories
+       with up to exact_limit values, else estimated with a sketch of
+       bounded size. The table is long, the categories, a VECTOR column
+       with the name of the value column, and one column per percentile,
+       so that make_linechart can plot it with x_name DATE, y_names like
+       P10, P50 and P90 and line_by_names VECTOR
+    args:
+       doc (Spotfire document instance): document to read from
+       table_name (str): name of table to read, like a summary table
+       percentile_table_name (str): name of table to make
+       category_names (list of str): names of columns to group by
+       value_names (list of str or None): names of columns to get
+                                          percentiles of, all numeric
+                                          columns if None
+       percentiles (list of numbers): percentiles between 0 and 100,
+                                      the statistical ones, P10 is low
+       sketch_size (int or None): accuracy of the sketches, rank error is
+                                  about 1.7 / sketch_size,
+                                  quantiles.SKETCH_SIZE if None
+       exact_limit (int or None): number of values per category and column
+                                  kept exactly, quantiles.EXACT_LIMIT if
+                                  None
+    """
+    category_names = list(_as_row(category_names))
+    percentiles = _as_row(percentiles)
+    for percentile in percentiles:
+        if not 0 <= percentile <= 100:
+            raise ValueError('Percentile {} is not between 0 and 100'.format(
+                percentile))
+    table = get_table(doc, table_name)
+    category_types = [column_type_name(table.Columns[name])
+                      for name in category_names]
+    category_types = [type_name if type_name in TYPE_NAMES else None
+                      for type_name in category_types]
+    if value_names is None:
+        value_names = _numeric_names(table, category_names)
+    value_names = list(_as_row(value_names))
+    LOGGER.debug('Percentiles of %i columns by %s', len(value_names),
+                 list_string(join_list(category_names)))
+
+    rows = (values for _, values in iter_rows(table, category_names +
+                                              value_names))
+    if sketch_size is None:
+        sketch_size = quantiles.SKETCH_SIZE
+    if exact_limit is None:
+        exact_limit = quantiles.EXACT_LIMIT
+    groups = quantiles.group_sketches(rows, len(category_names), sketch_size,
+                                      exact_limit)
+
+    names = (category_names + ['VECTOR'] +
+             quantiles.percentile_names(percentiles))
+    types = category_types + ['String'] + ['Real'] * len(percentiles)
+    data = ([python_value(value) for value in row]
+            for row in quantiles.percentile_rows(groups, value_names,
+                                                 percentiles))
+    make_table(doc, percentile_table_name, names, data, types)
+
+
+
+def make_downsampled_table(doc, table_name, downsampled_table_name, x_name,
+                           y_names, line_by_names=(), points=None,
+                           method='lttb'):
+
+    """Makes table with the points of each line that keep its shape, so
+       that charts of dense lines plot a fraction of the rows, read in one
+       pass over the table. Each line, a combination of the line by
+       columns, keeps about points points per y column, and the columns
+       keep their names, so that a line chart can plot the table as it
+       would plot the original
+    args:
+       doc (Spotfire document instance): document to read from
+       table_name (str): name of table to read, like a summary table
+       downsampled_table_name (str): name of table to make
+       x_name (str): name of column on x axis, like DATE
+       y_names (list of str): names of columns on y axis
+       line_by_names (list of str): names of columns making one line each,
+                                    like REAL, none if None
+       points (int or None): points to keep per line and y column,
+                             downsample.POINTS if None
+       method (str): among downsample.METHODS, lttb for Largest Triangle
+                     Three Buckets, minmax for the first, last, smallest and
+                     largest value per bucket of x
+    """
+    downsample.check_method(method)
+    if points is None:
+        points = downsample.POINTS
+    line_by_names = list(_as_row(line_by_names or ()))
+    y_names = list(_as_row(y_names))
+    names = line_by_names + [x_name] + y_names
+    table = get_table(doc, table_name)
+    types = [column_type_name(table.Columns[name]) for name in names]
+    types = [type_name if type_name in TYPE_NAMES else None
+             for type_name in types]
+    LOGGER.debug('Downsampling %i columns by %s with %s', len(y_names),
+                 list_string(join_list(line_by_names)), method)
+
+    rows = (values for _, values in iter_rows(table, names))
+    groups = downsample.group_lines(rows, len(line_by_names))
+    data = ([python_value(value) for value in row]
+            for row in downsample.downsampled_rows(groups, points, method))
+    make_table(doc, downsampled_table_name, names, data, types)
+
+
+
+def make_resampled_table(doc, table_name, resampled_table_name,
+                         frequency='month', date_name='DATE',
+                         category_names=('REAL',), value_names=None,
+                         rules=None, label='end'):
+
+    """Makes table with one row per period of the dates, and category, in
+       one streaming pass over the table, so that charts over time plot a
+       table ten to a hundred times smaller than daily data. Step columns,
+       like totals, get their last value in the period, rate columns their
+       mean. The date column gets the last day of each period by default,
+       the date the totals were reached, and the columns keep their
+       names, so that a line chart can plot the table as it would plot
+       the original. Remade on each call
+    args:
+       doc (Spotfire document instance): document to read from
+       table_name (str): name of table to read, like a summary table
+       resampled_table_name (str): name of table to make
+       frequency (str): among resample.FREQUENCIES, month, quarter or year
+       date_name (str): name of date column
+       category_names (list of str): names of columns to keep apart, like
+                                     REAL, none if None
+       value_names (list of str or None): names of columns to resample,
+                                          all numeric columns if None
+       rules (str, dict or None): step or rate, for all columns or by
+                                  column name, summary totals like FOPT are
+                                  step and the others rate if None
+       label (str): among resample.LABELS, end dates each period by its
+                    last day, start by its first day
+    """
+    resample.check_frequency(frequency)
+    resample.check_label(label)
+    category_names = list(_as_row(category_names or ()))
+    table = get_table(doc, table_name)
+    category_types = [column_type_name(table.Columns[name])
+                      for name in category_names]
+    category_types = [type_name if type_name in TYPE_NAMES else None
+                      for type_name in category_types]
+    if value_names is None:
+        value_names = _numeric_names(table, category_names + [date_name])
+    value_names = list(_as_row(value_names))
+    value_rules = resample.column_rules(value_names, rules)
+    LOGGER.debug('Resampling %i columns by %s to %s', len(value_names),
+                 list_string(join_list(category_names)), frequency)
+
+    rows = (values for _, values in iter_rows(table, category_names +
+                                              [date_name] + value_names))
+    groups = resample.group_periods(rows, len(category_names), frequency,
+                                    value_rules, label)
+    data = ([python_value(value) for value in row]
+            for row in resample.resampled_rows(groups))
+    make_table(doc, resampled_table_name,
+               category_names + [date_name] + value_names, data,
+               category_types + ['Date'] + ['Real'] * len(value_names))
+
+
+# _record_table_size records to the function calling it
+instrument_functions(globals(), __name__,
+                     skip=('_as_row', '_record_table_size'))
@@ -1,10 +1,23 @@
 """Author dbs: helper functions for use in spotfire scripts"""
 import logging
+import math
 import sys
 import re
-from . import basic
-from . import pages
-from . import tables
+from collections import namedtuple
+import basic
+import expressions
+import pages
+from basic import join_list
+from boxes import ok_message
+from datatypes import STRING_TYPES
+from docindex import get_index
+from batch import batch, queue_mutation
+from instrument import instrument_functions
+from loader import lazy_import, load_type, load_types
+
+tables = lazy_import('tables')
+
+VISUALS = 'Spotfire.Dxp.Application.Visuals'
 
 
 LOGGER = basic.init_logging(__name__)
@@ -17,7 +30,7 @@ def viz_as_content(viz):
     returns viz_content (Spotfire.Dxp.Application.Visuals.VisualContent)
     """
 
-    from Spotfire.Dxp.Application.Visuals import VisualContent
+    VisualContent = load_type(VISUALS, 'VisualContent')
     viz_content = viz.As[VisualContent]()
     return viz_content
 
@@ -54,22 +67,21 @@ def get_visual(doc, page_name, viz_name, check=False):
       page_name (str): name of page
 
     """
-    from Spotfire.Dxp.Application.Visuals import VisualContent
+    VisualContent = load_type(VISUALS, 'VisualContent')
     page = pages.get_page(doc, page_name)
-    viz_names = get_visual_names(page)
-    # print(viz_names)
+    index = get_index(doc)
     viz = None
-    if not viz_names:
+    if not len(page.Visuals):
         message = 'No visuals on page {}'.format(page_name)
         ok_message(message)
 
     else:
 
-        for vis in page.Visuals:
-            if vis.Title == viz_name:
-                viz = vis
-                viz = viz.As[VisualContent]()
-        if viz is None and check:
+        viz = index.visual(page.Title, viz_name)
+        if viz is not None:
+            viz = viz.As[VisualContent]()
+        elif check:
+            viz_names = index.names('visuals', page.Title)
             message = ('There is no visual on page {} ' +
                        'called {}').format(page_name, viz_name)
 
@@ -99,6 +111,17 @@ def get_chart_names(page):
     return chart_names
 
 
+def viz_types():
+    """Returns spotfire visual types by the names the helpers use"""
+    BarChart, BoxPlot, ScatterPlot, LineChart, HtmlTextArea = load_types(
+        VISUALS, ['BarChart', 'BoxPlot', 'ScatterPlot', 'LineChart',
+                  'HtmlTextArea'])
+
+    return {'barchart': BarChart, 'boxplot': BoxPlot,
+            'scatter': ScatterPlot, 'linechart': LineChart,
+            'textarea': HtmlTextArea}
+
+
 def add_viz_to_page(doc, viz_type, viz_name, table_name, page_name='Active'):
     """Adds vizualisation to page
     args:
@@ -108,13 +131,7 @@ def add_viz_to_page(doc, viz_type, viz_name, table_name, page_name='Active'):
     viz_name (str): name of visual
     returns viz (spotfire visual)
     """
-    from Spotfire.Dxp.Application.Visuals import BarChart, BoxPlot, ScatterPlot
-    from Spotfire.Dxp.Application.Visuals import  LineChart, HtmlTextArea
-    from Spotfire.Dxp.Application.Visuals import Visualization
-
-    viz_dict = {'barchart': BarChart, 'boxplot': BoxPlot,
-                'scatter': ScatterPlot, 'linechart': LineChart,
-                'textarea': HtmlTextArea}
+    viz_dict = viz_types()
 
     viz = None
     if viz_type not in viz_dict:
@@ -130,64 +147,109 @@ def add_viz_to_page(doc, viz_type, viz_name, table_name, page_name='Active'):
         page = pages.get_page(doc, page_name)
         viz = get_visual(doc, page_name, viz_name)
 
-        if viz is None:
+        added = viz is None
+        if added:
             viz = page.Visuals.AddNew[viz_dict[viz_type]]()
             message = 'Making visual {} on page {}'.format(viz_name,
                                                            page_name)
             heading = "INFO"
             ok_message(message, heading)
 
-        print(viz)
-        viz.Data.DataTableReference = tables.get_page(doc, table_name)
+        LOGGER.debug('Visual %s', viz)
+        viz.Data.DataTableReference = tables.get_table(doc, table_name)
         try:
             viz_cont = viz_as_content(viz)
             viz_cont.Title = viz_name
             viz_cont.ShowTitle = True
         except AttributeError:
-            print('Cannot set title')
+            LOGGER.warning('Cannot set title of %s', viz_name)
 
-        print('Created {}'.format(viz_name))
+        if added:
+            get_index(doc).add('visuals', viz_name, viz.Visual, page.Title)
+
+        LOGGER.debug('Created %s', viz_name)
     return viz
 
 
 def make_linechart(doc, table_name, x_name, y_names,
                    y_stat_names, line_by_names, page_name='Active',
-                   viz_name=None):
+                   viz_name=None, downsample=None, points=None,
+                   resample=None):
 
-    """Adds vizualisation to page
+    """Adds line chart to page, every y column with every statistic
     args:
     doc (Spotfire document instance): document to read from
+    table_name (str): name of table to plot
+    x_name (str): name of column on x axis, DATE is binned by year and
+                  month unless resampled
+    y_names (list of str): names of columns on y axis
+    y_stat_names (str or list of str): aggregations of y, like Avg, ''
+                                       for the columns as they are
+    line_by_names (list of str, str or None): names of columns making one
+                                              line each, one line per y
+                                              column if None or empty
     page_name (str): name of page
     viz_name (str): name of visual
+    downsample (str or None): method among downsample.METHODS, if given
+                              the chart plots a companion table, named
+                              like Summary (lttb), with about points
+                              points per line and y column, remade on
+                              each call
+    points (int or None): points kept per line, downsample.POINTS if None
+    resample (str or None): frequency among resample.FREQUENCIES, if given
+                            the chart plots a companion table with one row
+                            per period and line, named like
+                            Summary (month), dated by the last day of
+                            each period, before any downsampling, remade
+                            on each call
     returns viz (spotfire visual)
     """
     viz_type = 'linechart'
+    # None or '' is one line per y column
+    if not line_by_names:
+        line_by_names = []
+    elif isinstance(line_by_names, STRING_TYPES):
+        line_by_names = [line_by_names]
+    if resample is not None:
+        resampled_table_name = '{} ({})'.format(table_name, resample)
+        tables.make_resampled_table(doc, table_name, resampled_table_name,
+                                    resample, x_name, line_by_names, y_names)
+        table_name = resampled_table_name
+    if downsample is not None:
+        downsampled_table_name = '{} ({})'.format(table_name, downsample)
+        tables.make_downsampled_table(doc, table_name,
+                                      downsampled_table_name, x_name,
+                                      y_names, line_by_names, points,
+                                      downsample)
+        table_name = downsampled_table_name
     viz = add_viz_to_page(doc, viz_type, viz_name, table_name, page_name)
-    viz_content = viz_as_content(viz)
+    if viz is None:
+        return None
+    viz_content = viz.As[viz_types()[viz_type]]()
     if viz_name is not None:
         viz_content.Title = viz_name
 
-    if x_name == 'DATE':
-
-        x_expression = 'BinByDateTime([DATE],"Year.Month",2)'
-
+    if x_name == 'DATE' and resample is None:
+        x_expression = expressions.bin_by_datetime(x_name)
     else:
-        x_expression = "[" + x_name + "]"
-    viz.XAxis.Expression = x_expression
-
+        x_expression = expressions.Column(x_name)
+    viz_content.XAxis.Expression = expressions.render(x_expression)
+
+    viz_content.YAxis.Expression = expressions.axis_expression(y_names,
+                                                               y_stat_names)
+    if line_by_names:
+        viz_content.LineByAxis.Expression = expressions.render(
+            expressions.categorical(*line_by_names))
     # single line
-    color_expression = '<[Axis.Default.Names]>'
+    viz_content.ColorAxis.Expression = '<[Axis.Default.Names]>'
 
-    viz.YAxis.Expression = basic.create_expression(y_names, y_stat_names)
-    viz.LineByAxis.Expression = basic.create_expression(line_by_names,'')
-    viz.ColorAxis.Expression = color_expression
-
-    viz.Legend.Visible = True
+    viz_content.Legend.Visible = True
+    return viz_content
 
 
 def get_html(doc, page_name):
 
-    from Spotfire.Dxp.Application.Visuals import HtmlTextArea
+    HtmlTextArea = load_type(VISUALS, 'HtmlTextArea')
     viz = get_visual(doc, page_name, 'Text Area')
 
 
@@ -195,24 +257,178 @@ def get_html(doc, page_name):
     return html
 
 
-def make_histograms(doc, table_name, column_names, page_name, color_by, bins):
-    """Adds histograms to page
+class VisualSpec(namedtuple('VisualSpec', ['viz_type', 'title',
+                                             'table_name', 'x', 'y',
+                                             'color_by', 'bins'])):
+
+    """What add_visuals makes, visual type and title, table to plot, x
+       column, y expression, columns to colour by and number of bins of x
+    """
+
+    __slots__ = ()
+
+
+def visual_spec(viz_type, title, table_name, x=None, y=None, color_by=None,
+                bins=None):
+    """Returns spec of a visual for add_visuals
+    args:
+    viz_type (str): type of visual, among viz_types
+    title (str): title of visual
+    table_name (str): name of table to plot
+    x (str or None): name of column on x axis
+    y (str or None): expression on y axis, like Count() or Avg([FOPT])
+    color_by (str, list of str or None): names of columns to colour by
+    bins (int or None): number of even intervals x is binned in, x is
+                        used as it is if None
+    returns spec (VisualSpec)
+    """
+    if isinstance(color_by, STRING_TYPES):
+        color_by = [color_by]
+    return VisualSpec(viz_type, title, table_name, x, y,
+                      tuple(color_by or ()), bins)
+
+
+def _x_expression(spec):
+    """Returns x axis expression of spec, categorical for bar charts and
+       box plots"""
+    if spec.bins:
+        node = expressions.bin_by_even_intervals(spec.x, spec.bins)
+    else:
+        node = expressions.Column(spec.x)
+    if spec.viz_type in ('barchart', 'boxplot'):
+        node = expressions.categorical(node)
+    return expressions.render(node)
+
+
+def _configure(viz, spec, table):
+    """Sets table, title and axes of visual from spec"""
+    viz.Data.DataTableReference = table
+    viz.Title = spec.title
+    viz.ShowTitle = True
+    if spec.x is not None:
+        viz.XAxis.Expression = _x_expression(spec)
+    if spec.y is not None:
+        viz.YAxis.Expression = spec.y
+    if spec.color_by:
+        viz.ColorAxis.Expression = expressions.render(
+            expressions.categorical(*spec.color_by))
+
+
+def grid_layout(page, visuals, columns=None):
+    """Places visuals on page in a grid, row by row
+    args:
+    page (Spotfire.Dxp.Application.Page): page the visuals are on
+    visuals (list of Spotfire.Dxp.Application.Visual): visuals to place
+    columns (int or None): visuals per row, about the square root of the
+                           number of visuals if None
+    """
+    if not visuals:
+        return
+    LayoutDefinition = load_type('Spotfire.Dxp.Application.Layout',
+                                 'LayoutDefinition')
+    if columns is None:
+        columns = int(math.ceil(math.sqrt(len(visuals))))
+    layout = LayoutDefinition()
+    layout.BeginStackedSection()
+    for start in range(0, len(visuals), columns):
+        layout.BeginSideBySideSection()
+        for viz in visuals[start:start + columns]:
+            layout.Add(viz)
+        layout.EndSection()
+    layout.EndSection()
+    page.ApplyLayout(layout)
+
+
+def _add_visuals(doc, page_title, specs, columns):
+    """Makes visuals of specs on page, visuals with the same title are
+       reused, then lays out the page
+    args:
+    doc (Spotfire document instance): document to change
+    page_title (str): title of page
+    specs (list of VisualSpec): visuals to make
+    columns (int or None): visuals per row of the grid, no layout if 0
+    """
+    index = get_index(doc)
+    page = index.page(page_title)
+    viz_dict = viz_types()
+    table_refs = {}
+    # Titles of the page read once, the first visual of a title wins
+    existing = {}
+    for visual in page.Visuals:
+        existing.setdefault(visual.Title, visual)
+    made = []
+    added = 0
+    for spec in specs:
+        table = table_refs.get(spec.table_name)
+        if table is None:
+            table = table_refs[spec.table_name] = tables.get_table(
+                doc, spec.table_name)
+        viz = existing.get(spec.title)
+        if viz is None:
+            viz = page.Visuals.AddNew[viz_dict[spec.viz_type]]()
+            existing[spec.title] = viz.Visual
+            index.add('visuals', spec.title, viz.Visual, page_title)
+            added += 1
+        else:
+            viz = viz.As[viz_dict[spec.viz_type]]()
+        _configure(viz, spec, table)
+        made.append(viz.Visual)
+    LOGGER.info('Made %i visuals on page %s, %i of them new', len(made),
+                page_title, added)
+    if columns != 0:
+        grid_layout(page, made, columns)
+
+
+def add_visuals(doc, specs, page_name, columns=None):
+    """Adds visuals to page in one batch, the page is looked up once and
+       no message is shown per visual
+    args:
+    doc (Spotfire document instance): document to change
+    specs (list of VisualSpec): visuals to make, see visual_spec
+    page_name (str): name of page, made if missing
+    columns (int or None): visuals per row of the grid layout, about the
+                           square root of the number of visuals if None,
+                           the layout is left as it is if 0
+    """
+    viz_dict = viz_types()
+    wrong = sorted(set(spec.viz_type for spec in specs
+                       if spec.viz_type not in viz_dict))
+    if wrong:
+        message = ('{} is not a valid visual choose among ' +
+                   '[{}]').format(join_list(wrong),
+                                  join_list(sorted(viz_dict)))
+        ok_message(message, 'WARNING!')
+        return
+
+    page = pages.get_page(doc, page_name, True)
+    if page is None:
+        return
+    for table_name in set(spec.table_name for spec in specs):
+        tables.get_table(doc, table_name)
+
+    description = 'Add {} visuals to page {}'.format(len(specs), page.Title)
+    with batch(doc, confirm=False):
+        queue_mutation(doc, 'add_visuals', description, _add_visuals, doc,
+                       page.Title, list(specs), columns,
+                       targets=[('pages', page.Title)])
+
+
+def make_histograms(doc, table_name, column_names, page_name, color_by=None,
+                    bins=None):
+    """Adds histograms to page, in one batch and laid out in a grid
     args:
     doc (Spotfire document instance): document to read from
     table_name (str): name of table to plot data from
     column_names (list of str): names of columns to plot
     page_name (str): name of page
-    color_byt (list of str): names of columns to colour by
-    bins (int): number of bins
+    color_by (str, list of str or None): names of columns to colour by
+    bins (int or None): number of bins, the values are used as categories
+                        if None
     """
-
-    table = tables.get_table(doc, table_name)
-    pages.get_page(doc, page_name, True)
-    viz_type = 'barchart'
-    for colum_name in column_names:
-
-        add_viz_to_page(doc, viz_type, column_name, table_name, page_name)
-
+    specs = [visual_spec('barchart', column_name, table_name, column_name,
+                         'Count()', color_by, bins)
+             for column_name in column_names]
+    add_visuals(doc, specs, page_name)
 
 
 def make_histograms_search(doc, table_name, column_search, page_name, color_by,
@@ -227,3 +443,4 @@ def make_histograms_search(doc, table_name, column_search, page_name, color_by,
     make_histograms(doc, table_name, column_names, page_name, color_by, bins)
 
 
+instrument_functions(globals(), __name__)